@@ -0,0 +1,186 @@
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, Union
+from GameState import GameState
+from OnitamaGame import OnitamaGame
+from Pieces import Pieces
+from Player import Player
+from Turn import Turn
+
+
+class AIWorker:
+    """
+    A class which computes computer players' turns on a background thread, so
+    the GUI keeps handling events and drawing while a player thinks.
+
+    Each request searches a copy of the game, so the game on screen is never
+    changed by the search, and the player is moved back onto its own game
+    when the search ends. A request can be cancelled: if it has not started
+    it never runs, and a running search is stopped through the player's stop
+    method (see PlayerAlphaBeta.stop); its turn is thrown away.
+
+    While a human chooses a turn, a computer player can ponder on the same
+    thread (see ponder): it searches the human's position until the next
+    request, filling its transposition table for its reply.
+
+    >>> from Player import PlayerRandom
+    >>> game = OnitamaGame(5, PlayerRandom(Pieces.G1), PlayerRandom(Pieces.G2))
+    >>> worker = AIWorker()
+    >>> worker.request(game)
+    >>> turn = worker.result(timeout=5)
+    >>> game.is_legal_move(turn.row_o, turn.col_o, turn.row_d, turn.col_d)
+    True
+    >>> worker.close()
+
+    === Private Attributes ===
+    _executor : The thread the turns are computed on.
+    _future : The turn being computed, or None.
+    _player : The player computing it, or None.
+    _ponder_future : The ponder running, or None.
+    _ponderer : The player pondering, or None.
+    """
+    # Seconds between repeated stop calls while waiting for a ponder to end.
+    _STOP_INTERVAL: float = 0.005
+    _executor: ThreadPoolExecutor
+    _future: Union[Future, None]
+    _player: Union[Player, None]
+    _ponder_future: Union[Future, None]
+    _ponderer: Union[Player, None]
+
+    def __init__(self) -> None:
+        """
+        Initializes a worker with no request.
+        """
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ai')
+        self._future = None
+        self._player = None
+        self._ponder_future = None
+        self._ponderer = None
+
+    def request(self, game: OnitamaGame) -> None:
+        """
+        Starts computing the turn of the player to move in <game>, cancelling
+        any earlier request and ending any ponder. The player is moved onto a
+        copy of the game until the request is done, so it must not be asked
+        for turns elsewhere until then.
+        """
+        self.cancel()
+        self._player = game.whose_turn
+        self._future = self._executor.submit(AIWorker._compute, self._player, GameState.from_game(game))
+
+    @staticmethod
+    def _compute(player: Player, state: GameState) -> Union[Turn, None]:
+        """
+        Returns the turn <player> picks in a new game in the position <state>.
+        """
+        return AIWorker._search_copy(player, state, player.get_turn)
+
+    @staticmethod
+    def _search_copy(player: Player, state: GameState,
+                     search: Callable[[], Union[Turn, None]]) -> Union[Turn, None]:
+        """
+        Returns the result of <search> with <player> moved onto a new game in
+        the position <state>, and moves the player back onto its own game.
+        """
+        game = player.onitama
+        try:
+            # to_game attaches the player to the new game.
+            if player.player_id == Pieces.G1:
+                state.to_game(player1=player)
+            else:
+                state.to_game(player2=player)
+            return search()
+        finally:
+            player.set_onitama(game)
+
+    def ponder(self, game: OnitamaGame, player: Player) -> None:
+        """
+        Starts <player> pondering (see PlayerAlphaBeta.ponder) on a copy of
+        <game>, in which its opponent is to move, ending any earlier ponder.
+        The ponder runs until the next request or cancel, and like a request
+        moves the player onto the copy.
+
+        Precondition: no request is busy and <player> has a ponder method.
+        """
+        self.stop_pondering()
+        self._ponderer = player
+        self._ponder_future = self._executor.submit(AIWorker._ponder, player, GameState.from_game(game))
+
+    @staticmethod
+    def _ponder(player: Player, state: GameState) -> Union[Turn, None]:
+        """
+        Makes <player> ponder in a new game in the position <state>.
+        """
+        return AIWorker._search_copy(player, state, player.ponder)
+
+    def pondering(self) -> bool:
+        """
+        Returns whether a ponder was started and not ended.
+        """
+        return self._ponder_future is not None
+
+    def stop_pondering(self) -> None:
+        """
+        Ends the ponder, if any, and waits for its search to notice, which
+        takes a few milliseconds.
+        """
+        if self._ponder_future is not None:
+            self._stop(self._ponder_future, self._ponderer)
+            self._ponder_future = None
+            self._ponderer = None
+
+    def _stop(self, future: Future, player: Player) -> None:
+        """
+        Cancels <future>, or if <player> is already running it, stops the
+        player until <future> is done. The player is stopped again and again,
+        in case its search had only just started and reset its stop flag. A
+        player without a stop method is left to finish on its own.
+        """
+        if not future.cancel() and hasattr(player, 'stop'):
+            while not future.done():
+                player.stop()
+                wait([future], timeout=self._STOP_INTERVAL)
+
+    def busy(self) -> bool:
+        """
+        Returns whether a request was made whose result has not been taken.
+        """
+        return self._future is not None
+
+    def done(self) -> bool:
+        """
+        Returns whether the turn of the current request is ready.
+        """
+        return self._future is not None and self._future.done()
+
+    def result(self, timeout: Union[float, None] = None) -> Union[Turn, None]:
+        """
+        Returns the turn of the current request, waiting at most <timeout>
+        seconds for it, and forgets the request.
+
+        Precondition: busy() is true.
+        """
+        future, self._future, self._player = self._future, None, None
+        return future.result(timeout)
+
+    def cancel(self) -> None:
+        """
+        Cancels the current request and ends the ponder, if any. Like
+        stop_pondering, waits for a running search to notice.
+        """
+        self.stop_pondering()
+        if self._future is not None:
+            self._stop(self._future, self._player)
+            self._future = None
+            self._player = None
+
+    def close(self) -> None:
+        """
+        Cancels the current request and stops the thread without waiting for it.
+        """
+        self.cancel()
+        self._executor.shutdown(wait=False)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
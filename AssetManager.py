@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+import pygame
+from typing import Dict, Iterable, List, Tuple, Union
+
+
+class AssetManager:
+    """
+    A class which loads the GUI's images. Every file is decoded at most once
+    and every (file, size) is scaled at most once, whichever ImageGenerator
+    asks for it.
+
+    load_atlas packs the scaled images the GUI needs into one atlas surface
+    and hands them out as subsurfaces of it. The atlas is also saved,
+    uncompressed, in <cache_dir>, so the next launch with the same images and
+    sizes reads one file instead of decoding and scaling every PNG. The cache
+    file name is a hash of the requested images, their sizes and the size and
+    modification time of each source file, so changed assets are rebuilt.
+
+    === Attributes ===
+    img_dir : Directory of the image files.
+    cache_dir : Directory of the cached atlases.
+    atlas : The atlas surface, or None before load_atlas.
+    atlas_cached : Whether the atlas was read from the disk cache.
+
+    === Private Attributes ===
+    _surfaces : Loaded images keyed by (filename, size), where size None is the file's own size.
+    """
+    # Width of the atlas; wider images get a shelf of their own.
+    ATLAS_WIDTH: int = 2048
+    _VERSION: int = 1
+    img_dir: str
+    cache_dir: str
+    atlas: Union[pygame.Surface, None]
+    atlas_cached: bool
+    _surfaces: Dict[Tuple[str, Union[Tuple[int, int], None]], pygame.Surface]
+
+    def __init__(self, img_dir: str = './assets/img', cache_dir: str = './assets/cache') -> None:
+        """
+        Initializes an asset manager with no images loaded.
+        """
+        self.img_dir = img_dir
+        self.cache_dir = cache_dir
+        self.atlas = None
+        self.atlas_cached = False
+        self._surfaces = {}
+
+    def get_image(self, filename: str, size: Union[Tuple[int, int], None] = None) -> pygame.Surface:
+        """
+        Returns the image in <filename>, relative to <img_dir>, smoothscaled to
+        <size> unless it is None. The same surface is returned for the same
+        arguments, so it must not be modified.
+        """
+        key = (filename, size)
+        surface = self._surfaces.get(key)
+        if surface is None:
+            if size is None:
+                surface = pygame.image.load(os.path.join(self.img_dir, filename)).convert()
+            else:
+                surface = pygame.transform.smoothscale(self.get_image(filename), size)
+            self._surfaces[key] = surface
+        return surface
+
+    def load_atlas(self, sprites: Iterable[Tuple[str, Tuple[int, int]]]) -> None:
+        """
+        Makes every (filename, size) of <sprites> available to get_image from
+        one atlas, read from the disk cache if possible and built and saved
+        there otherwise.
+        """
+        sprites = sorted(set(sprites), key=lambda sprite: (-sprite[1][1], sprite))
+        path = os.path.join(self.cache_dir, f'atlas-{self._get_cache_key(sprites)}.raw')
+        self.atlas_cached = self._read_atlas(path, sprites)
+        if not self.atlas_cached:
+            self._build_atlas(path, sprites)
+
+    def _get_cache_key(self, sprites: List[Tuple[str, Tuple[int, int]]]) -> str:
+        """
+        Returns the hash naming the cached atlas of <sprites>.
+        """
+        digest = hashlib.sha1(str(self._VERSION).encode())
+        for filename, size in sprites:
+            stat = os.stat(os.path.join(self.img_dir, filename))
+            digest.update(f'{filename}:{size}:{stat.st_size}:{stat.st_mtime_ns};'.encode())
+        return digest.hexdigest()[:16]
+
+    def _pack(self, sprites: List[Tuple[str, Tuple[int, int]]]) -> Tuple[List[pygame.Rect], Tuple[int, int]]:
+        """
+        Returns the rectangle of each of <sprites>, which are sorted by
+        decreasing height, packed in shelves, and the size of the atlas.
+        """
+        rects = []
+        x = y = shelf = width = 0
+        for _, (w, h) in sprites:
+            if x and x + w > self.ATLAS_WIDTH:
+                x, y, shelf = 0, y + shelf, 0
+            rects.append(pygame.Rect(x, y, w, h))
+            x += w
+            shelf = max(shelf, h)
+            width = max(width, x)
+        return rects, (width, y + shelf)
+
+    def _use_atlas(self, atlas: pygame.Surface, sprites: List[Tuple[str, Tuple[int, int]]],
+                   rects: List[pygame.Rect]) -> None:
+        """
+        Makes each of <sprites> the subsurface of <atlas> at its rectangle.
+        """
+        self.atlas = atlas
+        for sprite, rect in zip(sprites, rects):
+            self._surfaces[sprite] = atlas.subsurface(rect)
+
+    def _read_atlas(self, path: str, sprites: List[Tuple[str, Tuple[int, int]]]) -> bool:
+        """
+        Loads the atlas of <sprites> from <path>. Returns False if there is
+        no usable cached atlas.
+        """
+        try:
+            with open(path, 'rb') as file:
+                header = json.loads(file.readline())
+                data = file.read()
+        except (OSError, ValueError):
+            return False
+        if header.get('sprites') != [[filename, list(size)] for filename, size in sprites]:
+            return False
+        rects, size = self._pack(sprites)
+        if len(data) != size[0] * size[1] * 3:
+            return False
+        self._use_atlas(pygame.image.frombuffer(data, size, 'RGB').convert(), sprites, rects)
+        return True
+
+    def _build_atlas(self, path: str, sprites: List[Tuple[str, Tuple[int, int]]]) -> None:
+        """
+        Builds the atlas of <sprites> by decoding and scaling their files, and
+        saves it at <path> if the cache directory can be written.
+        """
+        rects, size = self._pack(sprites)
+        atlas = pygame.Surface(size).convert()
+        for (filename, sprite_size), rect in zip(sprites, rects):
+            atlas.blit(self.get_image(filename, sprite_size), rect)
+        self._use_atlas(atlas, sprites, rects)
+        header = {'sprites': [[filename, list(sprite_size)] for filename, sprite_size in sprites]}
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(path + '.tmp', 'wb') as file:
+                file.write(json.dumps(header).encode() + b'\n')
+                file.write(pygame.image.tostring(atlas, 'RGB'))
+            os.replace(path + '.tmp', path)
+        except OSError:
+            pass
@@ -0,0 +1,274 @@
+from typing import List, Union
+import numpy as np
+from MoveGenerator import MoveGenerator
+from OnitamaGame import OnitamaGame
+from Pieces import Pieces
+from Turn import Turn
+
+
+class BatchEngine:
+    """
+    A class which holds many games of Onitama of the same board size in NumPy
+    arrays and generates legal moves, makes moves and detects winners for all
+    of them at once. The rules are those of OnitamaGame: the legal actions of
+    a game are exactly the turns of Player.get_valid_turns, in the same order,
+    and the winner is the one OnitamaGame.get_winner reports.
+
+    Squares are numbered row * size + col. Styles are numbered by their index
+    in OnitamaGame.get_styles(). An action is one integer,
+    (style * size * size + origin) * moves + j, which moves the piece on
+    <origin> to the j-th in-bounds destination of the style (see
+    MoveGenerator.get_destinations).
+
+    NumPy is only needed by this module; the rest of the engine does not
+    depend on it.
+
+    === Attributes ===
+    EMPTY, M1, G1, M2, G2 : Codes of the squares in <board>.
+    size : Size of the board of every game.
+    count : Number of games.
+    board : int8 array of shape (count, size * size) of square codes.
+    owners : int8 array of shape (count, 5): 0 for the spare style, 1 for G1, 2 for G2.
+    side : int8 array of shape (count,): 0 if G1 is to move, 1 if G2 is.
+    done : bool array of shape (count,), true once a game is over.
+    winner : int8 array of shape (count,): 0 if G1 won, 1 if G2 won, -1 otherwise.
+    plies : int32 array of shape (count,) of the moves made in each game.
+    style_names : The name of each style.
+    moves : The largest number of destinations of a style, the last axis of an action.
+    actions : Number of actions, the length of a row of legal_mask.
+
+    === Private Attributes ===
+    _destinations :
+        Array of shape (2, 5, size * size, moves) of the destination of each
+        (side, style, origin, j), or -1.
+    _thrones : The square each side's grandmaster must reach to win.
+    """
+    EMPTY: int = 0
+    M1: int = 1
+    G1: int = 2
+    M2: int = 3
+    G2: int = 4
+    _CODES = {Pieces.EMPTY: EMPTY, Pieces.M1: M1, Pieces.G1: G1, Pieces.M2: M2, Pieces.G2: G2}
+    _TOKENS = (Pieces.EMPTY, Pieces.M1, Pieces.G1, Pieces.M2, Pieces.G2)
+    _OWNERS = {Pieces.EMPTY: 0, Pieces.G1: 1, Pieces.G2: 2}
+    size: int
+    count: int
+    board: np.ndarray
+    owners: np.ndarray
+    side: np.ndarray
+    done: np.ndarray
+    winner: np.ndarray
+    plies: np.ndarray
+    style_names: List[str]
+    moves: int
+    actions: int
+    _destinations: np.ndarray
+    _thrones: np.ndarray
+
+    def __init__(self, count: int, size: int = 5) -> None:
+        """
+        Initializes <count> games of the given <size>, all in the start position.
+
+        >>> engine = BatchEngine(3)
+        >>> engine.board.shape, engine.owners[0].tolist(), engine.side.tolist()
+        ((3, 25), [1, 1, 2, 2, 0], [0, 0, 0])
+        """
+        self.size = size
+        self.count = count
+        start = OnitamaGame(size)
+        styles = start.get_styles()
+        self.style_names = [sty.name for sty in styles]
+        tables = [[MoveGenerator.get_destinations(size, sty, side) for sty in styles]
+                  for side in (Pieces.G1, Pieces.G2)]
+        self.moves = max(len(destinations) for side_tables in tables for table in side_tables
+                         for destinations in table)
+        self._destinations = np.full((2, len(styles), size * size, self.moves), -1, dtype=np.intp)
+        for p, side_tables in enumerate(tables):
+            for s, table in enumerate(side_tables):
+                for origin, destinations in enumerate(table):
+                    for j, (square, _, _) in enumerate(destinations):
+                        self._destinations[p, s, origin, j] = square
+        self.actions = self._destinations[0].size
+        middle = size // 2
+        self._thrones = np.array([(size - 1) * size + middle, middle])
+        self.board = np.zeros((count, size * size), dtype=np.int8)
+        self.owners = np.zeros((count, len(styles)), dtype=np.int8)
+        self.side = np.zeros(count, dtype=np.int8)
+        self.done = np.zeros(count, dtype=bool)
+        self.winner = np.full(count, -1, dtype=np.int8)
+        self.plies = np.zeros(count, dtype=np.int32)
+        for i in range(count):
+            self.set_game(i, start)
+
+    def set_game(self, index: int, game: OnitamaGame) -> None:
+        """
+        Copies the position of <game> into game number <index>.
+
+        Precondition: <game> has this engine's size.
+        """
+        size = self.size
+        self.board[index] = [self._CODES[game.get_token(row, col)] for row in range(size) for col in range(size)]
+        self.owners[index] = [self._OWNERS[sty.owner] for sty in game.get_styles()]
+        self.side[index] = 0 if game.whose_turn is game.player1 else 1
+        self.plies[index] = len(game.onitama_stack)
+        self._update_winners(np.array([index]))
+
+    def get_game(self, index: int) -> OnitamaGame:
+        """
+        Returns a new OnitamaGame in the position of game number <index>.
+
+        >>> engine = BatchEngine(2)
+        >>> game = engine.get_game(1)
+        >>> game.get_token(0, 2), game.whose_turn is game.player1
+        ('X', True)
+        """
+        size = self.size
+        game = OnitamaGame(size)
+        codes = self.board[index].tolist()
+        game.set_board(size, [[self._TOKENS[codes[row * size + col]] for col in range(size)]
+                              for row in range(size)])
+        owners = (Pieces.EMPTY, Pieces.G1, Pieces.G2)
+        game.set_style_owners([owners[owner] for owner in self.owners[index].tolist()])
+        game.whose_turn = game.player2 if self.side[index] else game.player1
+        return game
+
+    def legal_mask(self, games: Union[np.ndarray, None] = None) -> np.ndarray:
+        """
+        Returns a bool array of shape (len(games), actions) which is true for
+        every legal action of each of the given <games>, or of every game if
+        <games> is None. Finished games have no legal actions.
+
+        >>> engine = BatchEngine(2)
+        >>> engine.legal_mask().sum(axis=1).tolist()
+        [10, 10]
+        """
+        if games is None:
+            games = np.arange(self.count)
+        side = self.side[games].astype(np.intp)
+        count = games.size
+        size_squared = self.size * self.size
+        # Own pieces are codes 1, 2 for G1 and 3, 4 for G2. The extra last
+        # column is the off-board destination -1, which is always blocked.
+        own = np.ones((count, size_squared + 1), dtype=bool)
+        own[:, :size_squared] = (self.board[games] - 1) // 2 == side[:, None]
+        destinations = self._destinations[side]
+        blocked = own[np.arange(count)[:, None], destinations.reshape(count, -1)].reshape(destinations.shape)
+        owned = (self.owners[games] == side[:, None] + 1) & ~self.done[games, None]
+        mask = ~blocked & own[:, None, :size_squared, None] & owned[:, :, None, None]
+        return mask.reshape(count, -1)
+
+    def step(self, actions: np.ndarray) -> None:
+        """
+        Makes the action actions[i] in game number i, for every game which is
+        not over and whose action is not negative, then updates the winners.
+
+        Precondition: Every action made is legal (see legal_mask).
+
+        >>> engine = BatchEngine(1)
+        >>> engine.step(np.array([engine.encode(0, 2, 0)]))
+        >>> engine.get_game(0).get_token(1, 2), engine.side.tolist(), engine.owners[0].tolist()
+        ('X', [1], [0, 1, 2, 2, 1])
+        """
+        active = np.flatnonzero((actions >= 0) & ~self.done)
+        if active.size == 0:
+            return
+        actions = actions[active]
+        side = self.side[active].astype(np.intp)
+        size_squared = self.size * self.size
+        style, rest = np.divmod(actions, size_squared * self.moves)
+        origin, j = np.divmod(rest, self.moves)
+        destination = self._destinations[side, style, origin, j]
+        self.board[active, destination] = self.board[active, origin]
+        self.board[active, origin] = self.EMPTY
+        # The used style becomes the spare one and the mover takes the old spare.
+        spare = np.argmin(self.owners[active], axis=1)
+        self.owners[active, spare] = side + 1
+        self.owners[active, style] = 0
+        self.side[active] ^= 1
+        self.plies[active] += 1
+        self._update_winners(active)
+
+    def _update_winners(self, games: np.ndarray) -> None:
+        """
+        Sets <winner> and <done> of the given <games> as OnitamaGame.get_winner would.
+        """
+        board = self.board[games]
+        has_g1 = (board == self.G1).any(axis=1)
+        has_g2 = (board == self.G2).any(axis=1)
+        winner = np.full(games.size, -1, dtype=np.int8)
+        winner[~has_g2] = 0
+        winner[~has_g1] = 1
+        winner[board[:, self._thrones[0]] == self.G1] = 0
+        winner[board[:, self._thrones[1]] == self.G2] = 1
+        self.winner[games] = winner
+        self.done[games] = winner >= 0
+
+    def random_actions(self, rng: np.random.Generator, mask: Union[np.ndarray, None] = None) -> np.ndarray:
+        """
+        Returns one legal action per game chosen uniformly at random with <rng>,
+        or -1 for a game without legal actions. <mask> is legal_mask() if given.
+
+        >>> engine = BatchEngine(4)
+        >>> actions = engine.random_actions(np.random.default_rng(0))
+        >>> bool(engine.legal_mask()[np.arange(4), actions].all())
+        True
+        """
+        if mask is None:
+            mask = self.legal_mask()
+        # Pick the r-th legal action of each row, with r uniform below the row's count.
+        counts = np.cumsum(mask, axis=1, dtype=np.int32)
+        picks = (rng.random(mask.shape[0]) * counts[:, -1]).astype(np.int32)
+        actions = (counts <= picks[:, None]).sum(axis=1)
+        actions[counts[:, -1] == 0] = -1
+        return actions
+
+    def rollout(self, rng: np.random.Generator, max_plies: int = 200) -> None:
+        """
+        Plays uniformly random moves in every game until all are over or
+        <max_plies> more moves were made. A game in which the player to move
+        has no legal action is stopped without a winner, as Simulator does.
+
+        >>> engine = BatchEngine(50)
+        >>> engine.rollout(np.random.default_rng(1))
+        >>> bool(engine.done.all())
+        True
+        """
+        actions = np.full(self.count, -1, dtype=np.intp)
+        for _ in range(max_plies):
+            # Only the games still being played are generated for.
+            games = np.flatnonzero(~self.done)
+            if games.size == 0:
+                break
+            choices = self.random_actions(rng, self.legal_mask(games))
+            self.done[games[choices < 0]] = True
+            actions.fill(-1)
+            actions[games] = choices
+            self.step(actions)
+
+    def encode(self, style: int, origin: int, j: int) -> int:
+        """
+        Returns the action which moves the piece on <origin> to the <j>-th
+        destination of the style with index <style>.
+        """
+        return (style * self.size * self.size + origin) * self.moves + j
+
+    def get_turn(self, index: int, action: int) -> Turn:
+        """
+        Returns <action> of game number <index> as a Turn.
+
+        >>> engine = BatchEngine(1)
+        >>> turn = engine.get_turn(0, engine.encode(0, 2, 0))
+        >>> turn.row_o, turn.col_o, turn.row_d, turn.col_d, turn.style_name, turn.player
+        (0, 2, 1, 2, 'crab', 'X')
+        """
+        style, rest = divmod(int(action), self.size * self.size * self.moves)
+        origin, j = divmod(rest, self.moves)
+        side = int(self.side[index])
+        destination = int(self._destinations[side, style, origin, j])
+        return Turn(origin // self.size, origin % self.size, destination // self.size, destination % self.size,
+                    self.style_names[style], (Pieces.G1, Pieces.G2)[side])
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,51 @@
+import numpy as np
+from BatchEngine import BatchEngine
+from hypothesis import given, settings
+from hypothesis.strategies import integers, sampled_from
+
+
+def turn_tuples(game) -> list:
+    """
+    Returns the legal turns of the player to move in <game> as tuples, in the
+    order of 'get_valid_turns', or no turns once the game is over.
+    """
+    if game.get_winner() is not None:
+        return []
+    return [(turn.row_o, turn.col_o, turn.row_d, turn.col_d, turn.style_name)
+            for style_turns in game.whose_turn.get_valid_turns().values() for turn in style_turns]
+
+
+@settings(max_examples = 10, deadline = None)
+@given(size = sampled_from([5, 7, 9]), seed = integers(min_value = 0, max_value = 10 ** 6))
+def test_batch_matches_game(size, seed) -> None:
+    """
+    This test plays random games in a batch and, after every step, checks each
+    game's legal actions, board, style owners and winner against an
+    OnitamaGame which made the same moves.
+    """
+    rng = np.random.default_rng(seed)
+    engine = BatchEngine(8, size)
+    games = [engine.get_game(i) for i in range(engine.count)]
+    for _ in range(80):
+        mask = engine.legal_mask()
+        for i, game in enumerate(games):
+            turns = [engine.get_turn(i, action) for action in np.flatnonzero(mask[i])]
+            assert [(turn.row_o, turn.col_o, turn.row_d, turn.col_d, turn.style_name)
+                    for turn in turns] == turn_tuples(game)
+            assert engine.get_game(i).get_board() == game.get_board()
+            assert engine.get_game(i).get_styles_deep_copy() == game.get_styles_deep_copy()
+            winner = game.get_winner()
+            assert engine.winner[i] == (-1 if winner is None else [game.player1, game.player2].index(winner))
+        if engine.done.all():
+            break
+        actions = engine.random_actions(rng, mask)
+        for i, game in enumerate(games):
+            if actions[i] >= 0:
+                turn = engine.get_turn(i, actions[i])
+                assert game.move(turn.row_o, turn.col_o, turn.row_d, turn.col_d, turn.style_name)
+        engine.step(actions)
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main(['BatchEngine_Tests.py'])
@@ -0,0 +1,126 @@
+from typing import Dict, List, Union
+from OnitamaBoard import OnitamaBoard
+from Player import Player
+from Pieces import Pieces
+
+
+class BitboardBoard(OnitamaBoard):
+    """
+    An OnitamaBoard that stores the position as one integer bitboard per piece
+    type instead of a nested list. The square (row, col) is the bit at index
+    row * size + col, so boards of any odd size fit in a Python int.
+
+    It has the same public methods as OnitamaBoard and can be selected with
+    OnitamaGame(size, player1, player2, board_class=BitboardBoard).
+
+    === Private Attributes ===
+    _bitboards :
+        Maps each of M1, G1, M2 and G2 to the bitboard of the squares it occupies.
+    _occupied :
+        The union of all four bitboards.
+
+    === Representation Invariants ===
+    - The four bitboards never share a bit.
+    - Only the tokens M1, G1, M2, G2 and EMPTY can be stored.
+    """
+    _bitboards: Dict[str, int]
+    _occupied: int
+
+    def __init__(self, size: int, player1: Player, player2: Player, board: Union[List[List[str]], None] = None) -> None:
+        """
+        Constructs a bitboard-backed Onitama board, see OnitamaBoard.__init__.
+        """
+        self._bitboards = {Pieces.M1: 0, Pieces.G1: 0, Pieces.M2: 0, Pieces.G2: 0}
+        self._occupied = 0
+        super().__init__(size, player1, player2, board)
+
+    def get_token(self, row: int, col: int) -> str:
+        """
+        Returns the player token that is in the given <row> <col> position, or the empty
+        character if no player token is there or if the position provided is invalid.
+
+        >>> player1 = Player('id1')
+        >>> player2 = Player('id2')
+        >>> board = BitboardBoard(5, player1, player2)
+        >>> board.get_token(-1, -3)
+        ' '
+        >>> board.get_token(2, 3)
+        ' '
+        >>> board.get_token(4, 1)
+        'y'
+        """
+        if 0 <= row < self.size and 0 <= col < self.size:
+            bit = 1 << (row * self.size + col)
+            if self._occupied & bit:
+                for token, bitboard in self._bitboards.items():
+                    if bitboard & bit:
+                        return token
+        return Pieces.EMPTY
+
+    def set_token(self, row: int, col: int, token: str) -> None:
+        """
+        Sets the given position on the board to be the given player (or empty)
+        <token>.
+
+        >>> player1 = Player('id1')
+        >>> player2 = Player('id2')
+        >>> board = BitboardBoard(7, player1, player2)
+        >>> board.set_token(3, 3, Pieces.G2)
+        >>> board.get_token(3, 3) == Pieces.G2
+        True
+        >>> board.set_token(3, 3, Pieces.EMPTY)
+        >>> board.get_token(3, 3) == Pieces.EMPTY
+        True
+        """
+        square = row * self.size + col
+        bit = 1 << square
+        if self._occupied & bit:
+            for key, bitboard in self._bitboards.items():
+                if bitboard & bit:
+                    self._bitboards[key] = bitboard ^ bit
+                    self._unindex(square, key)
+                    break
+            self._occupied ^= bit
+        if token != Pieces.EMPTY:
+            self._bitboards[token] |= bit
+            self._occupied |= bit
+            self._index(square, token)
+
+    def deep_copy(self) -> List[List[str]]:
+        """
+        Creates and returns a nested list copy of this board's current state.
+        """
+        return [[self.get_token(row, col) for col in range(self.size)]
+                for row in range(self.size)]
+
+    def set_board(self, board: List[List[str]]) -> None:
+        """
+        Sets the current board's state to the state of the board which is passed in as a parameter.
+        """
+        for key in self._bitboards:
+            self._bitboards[key] = 0
+        self._occupied = 0
+        for row, tokens in enumerate(board):
+            for col, token in enumerate(tokens):
+                if token != Pieces.EMPTY:
+                    bit = 1 << (row * self.size + col)
+                    self._bitboards[token] |= bit
+                    self._occupied |= bit
+        self._index_board(board)
+
+    def get_bitboard(self, token: str) -> int:
+        """
+        Returns the bitboard of the squares occupied by <token>.
+
+        >>> player1 = Player('id1')
+        >>> player2 = Player('id2')
+        >>> board = BitboardBoard(5, player1, player2)
+        >>> bin(board.get_bitboard(Pieces.G1))
+        '0b100'
+        """
+        return self._bitboards[token]
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
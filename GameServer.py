@@ -0,0 +1,449 @@
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+import sys
+from concurrent.futures import Executor, ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Dict, List, Set, Tuple, Union
+from GameState import GameState
+from OnitamaGame import OnitamaGame
+from Pieces import Pieces
+from Simulator import Simulator
+
+
+class _Match:
+    """
+    A game hosted by GameServer.
+
+    === Attributes ===
+    game_id : The number of the game.
+    game : The game.
+    ai : The tokens of the sides played by the server.
+    ai_player : Simulator spec of the server's player.
+    subscribers : The connections sent an update after every change.
+    thinking : Whether the server is computing a turn for the game.
+    """
+    __slots__ = ('game_id', 'game', 'ai', 'ai_player', 'subscribers', 'thinking')
+    game_id: int
+    game: OnitamaGame
+    ai: str
+    ai_player: str
+    subscribers: Set[asyncio.StreamWriter]
+    thinking: bool
+
+    def __init__(self, game_id: int, game: OnitamaGame, ai: str, ai_player: str) -> None:
+        """
+        Initializes a match with no subscribers.
+        """
+        self.game_id = game_id
+        self.game = game
+        self.ai = ai
+        self.ai_player = ai_player
+        self.subscribers = set()
+        self.thinking = False
+
+
+class GameServer:
+    """
+    An asyncio TCP server hosting many Onitama games in one event loop.
+
+    Clients send one JSON object per line and get one JSON object per line
+    back. A request has an "op" and may have an "id", which is echoed in its
+    response. Responses are {"id", "ok": true, ...} or {"id", "ok": false,
+    "error"}. The ops are
+        create : {"size": 5, "ai": "", "ai_player": "PlayerRandom"} starts a
+                 game and returns its "game" number and "state". "ai" holds
+                 the tokens of the sides the server plays ("X", "Y", "XY"),
+                 with the player spec of Simulator.make_player (see
+                 check_ai_player).
+        move : {"game", "turn": [row_o, col_o, row_d, col_d, style_name]}
+               plays a legal turn of the side to move.
+        undo : {"game"} takes back the last ply, and in a game against the
+               server also the server's ply before it.
+        state : {"game"} returns the "state".
+        subscribe : {"game"} sends the connection {"event": "update", "game",
+                    "state"} after every later change, including the
+                    server's own turns.
+        close : {"game"} removes the game.
+    A state is {"size", "board": one string per row, "styles": {"X": [...],
+    "Y": [...], "spare": name}, "turn", "winner", "plies", "turns": the
+    legal turns as [row_o, col_o, row_d, col_d, style_name]}.
+
+    Moves are checked against the game's legal turns, which also checks that
+    the mover owns the style and that the style allows the move, before
+    OnitamaGame.move plays them. The server's own turns are computed in an
+    executor, by default a pool of worker processes, on a GameState copy of
+    the position, so searches never block the loop; a turn whose position
+    was changed meanwhile is thrown away.
+
+    >>> async def demo():
+    ...     server = GameServer()
+    ...     port = await server.start(port=0)
+    ...     reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    ...     writer.write(b'{"id": 1, "op": "create"}\\n')
+    ...     created = json.loads(await reader.readline())
+    ...     writer.write(json.dumps({'op': 'move', 'game': created['game'],
+    ...                              'turn': [0, 2, 1, 2, 'crab']}).encode() + b'\\n')
+    ...     moved = json.loads(await reader.readline())
+    ...     writer.close()
+    ...     await server.stop()
+    ...     return created['state']['turn'], moved['state']['turn'], moved['state']['board'][1]
+    >>> asyncio.run(demo())
+    ('X', 'Y', '  X  ')
+
+    === Attributes ===
+    AI_PLAYERS : The players clients may ask the server to play, with the arguments they may set.
+    MAX_TIME_LIMIT : The most seconds the server's player may spend on one turn.
+    games : The hosted games, keyed by game number.
+    workers : Number of worker processes computing the server's turns.
+
+    === Private Attributes ===
+    _server : The asyncio server, or None when stopped.
+    _executor : Where the server's turns are computed, created on first use.
+    _next_game : The number of the next game created.
+    _tasks : The running tasks computing the server's turns.
+    """
+    AI_PLAYERS: Dict[str, Tuple[str, ...]] = {
+        'PlayerRandom': (),
+        'PlayerAlphaBeta': ('time_limit', 'node_limit', 'max_depth'),
+        'PlayerMCTS': ('exploration', 'simulations', 'time_limit', 'seed'),
+    }
+    MAX_TIME_LIMIT: float = 5.0
+    games: Dict[int, _Match]
+    workers: int
+    _server: Union[asyncio.AbstractServer, None]
+    _executor: Union[Executor, None]
+    _next_game: int
+    _tasks: Set[asyncio.Task]
+
+    def __init__(self, workers: Union[int, None] = None, executor: Union[Executor, None] = None) -> None:
+        """
+        Initializes a server with no games, which computes its turns in
+        <executor>, or in a pool of <workers> processes (all cores by default)
+        if it is None.
+        """
+        self.games = {}
+        self.workers = workers if workers is not None else os.cpu_count() or 1
+        self._server = None
+        self._executor = executor
+        self._next_game = 1
+        self._tasks = set()
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8765) -> int:
+        """
+        Starts listening on <host> and <port>, or a free port if <port> is 0,
+        and returns the port.
+        """
+        self._server = await asyncio.start_server(self._serve, host, port, limit=1 << 16)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        """
+        Stops listening, cancels the server's turns and drops every game.
+        """
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for task in list(self._tasks):
+            task.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self.games.clear()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Answers the requests of one connection until it closes.
+        """
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                writer.write(json.dumps(self.handle(line, writer)).encode() + b'\n')
+                await writer.drain()
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError, asyncio.CancelledError):
+            pass
+        finally:
+            for match in self.games.values():
+                match.subscribers.discard(writer)
+            writer.close()
+
+    def handle(self, line: Union[bytes, str], writer: Union[asyncio.StreamWriter, None] = None) -> Dict:
+        """
+        Returns the response to the request <line> sent by the connection
+        <writer>.
+        """
+        try:
+            request = json.loads(line)
+        except ValueError:
+            return {'id': None, 'ok': False, 'error': 'invalid JSON'}
+        if not isinstance(request, dict):
+            return {'id': None, 'ok': False, 'error': 'a request must be a JSON object'}
+        response = {'id': request.get('id')}
+        try:
+            response.update(self._dispatch(request, writer))
+            response['ok'] = True
+        except (KeyError, TypeError, ValueError) as error:
+            response['ok'] = False
+            response['error'] = str(error.args[0]) if error.args else type(error).__name__
+        return response
+
+    def _dispatch(self, request: Dict, writer: Union[asyncio.StreamWriter, None]) -> Dict:
+        """
+        Carries out <request> and returns the fields of its response.
+        Raises ValueError if it cannot be carried out.
+        """
+        op = request.get('op')
+        if op == 'create':
+            return self._create(request)
+        match = self.games.get(request.get('game'))
+        if match is None:
+            raise ValueError(f"no game {request.get('game')}")
+        if op == 'move':
+            self._move(match, request.get('turn'))
+        elif op == 'undo':
+            self._undo(match)
+        elif op == 'subscribe':
+            if writer is not None:
+                match.subscribers.add(writer)
+        elif op == 'close':
+            del self.games[request['game']]
+            return {'game': request['game']}
+        elif op != 'state':
+            raise ValueError(f'unknown op {op}')
+        return {'game': request['game'], 'state': self.get_state(match.game)}
+
+    def _create(self, request: Dict) -> Dict:
+        """
+        Starts a game for a create <request>.
+        """
+        size = request.get('size', 5)
+        if not isinstance(size, int) or size < 5 or size % 2 == 0 or size > 13:
+            raise ValueError('size must be odd and between 5 and 13')
+        ai = request.get('ai') or ''
+        if not isinstance(ai, str) or set(ai) - {Pieces.G1, Pieces.G2}:
+            raise ValueError('ai must hold the tokens of the server\'s sides')
+        ai_player = request.get('ai_player', 'PlayerRandom')
+        if ai:
+            self.check_ai_player(ai_player)
+        game_id = self._next_game
+        self._next_game += 1
+        match = _Match(game_id, OnitamaGame(size), ai, ai_player)
+        self.games[game_id] = match
+        self._schedule_ai(match)
+        return {'game': game_id, 'state': self.get_state(match.game)}
+
+    def _move(self, match: _Match, turn: List) -> None:
+        """
+        Plays the client's <turn> in <match>.
+        """
+        game = match.game
+        if game.get_winner() is not None:
+            raise ValueError('the game is over')
+        if match.thinking or game.whose_turn.player_id in match.ai:
+            raise ValueError('it is the server\'s turn')
+        if not isinstance(turn, list) or len(turn) != 5:
+            raise ValueError('turn must be [row_o, col_o, row_d, col_d, style_name]')
+        row_o, col_o, row_d, col_d, style_name = turn
+        if not any((legal.row_d, legal.col_d) == (row_d, col_d)
+                   for legal in game.get_legal_turns_by_style(style_name)
+                   if (legal.row_o, legal.col_o) == (row_o, col_o)):
+            raise ValueError(f'illegal turn {turn}')
+        game.move(row_o, col_o, row_d, col_d, style_name)
+        self._changed(match)
+
+    def _undo(self, match: _Match) -> None:
+        """
+        Takes back the last ply of <match>, and the server's ply before it if
+        that leaves the server to move.
+        """
+        game = match.game
+        if match.thinking:
+            raise ValueError('it is the server\'s turn')
+        if game.onitama_stack.empty():
+            raise ValueError('nothing to undo')
+        game.undo()
+        if game.whose_turn.player_id in match.ai and not game.onitama_stack.empty() and \
+                len(match.ai) == 1:
+            game.undo()
+        self._changed(match)
+
+    def _changed(self, match: _Match) -> None:
+        """
+        Sends the new state of <match> to its subscribers and lets the server
+        move if it is its turn.
+        """
+        self._publish(match)
+        self._schedule_ai(match)
+
+    def _publish(self, match: _Match) -> None:
+        """
+        Sends the state of <match> to its subscribers, dropping any which
+        disconnected or do not keep up.
+        """
+        if not match.subscribers:
+            return
+        line = json.dumps({'event': 'update', 'game': match.game_id, 'state': self.get_state(match.game)}).encode() + b'\n'
+        for writer in list(match.subscribers):
+            if writer.is_closing() or writer.transport.get_write_buffer_size() > 1 << 20:
+                match.subscribers.discard(writer)
+            else:
+                writer.write(line)
+
+    def _schedule_ai(self, match: _Match) -> None:
+        """
+        Starts computing the server's turn in <match> if it is the server's
+        turn and the game is not over.
+        """
+        game = match.game
+        if match.thinking or game.get_winner() is not None or game.whose_turn.player_id not in match.ai:
+            return
+        match.thinking = True
+        task = asyncio.get_running_loop().create_task(self._play_ai(match))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _play_ai(self, match: _Match) -> None:
+        """
+        Computes the server's turn in <match> in the executor and plays it.
+        """
+        game = match.game
+        state = GameState.from_game(game)
+        try:
+            turn = await asyncio.get_running_loop().run_in_executor(
+                self._get_executor(), GameServer.compute_turn, match.ai_player, int(state))
+        except Exception:
+            # A player which failed, e.g. in a worker process which died,
+            # leaves the game waiting for a client's undo or close.
+            turn = None
+        finally:
+            match.thinking = False
+        if self.games.get(match.game_id) is not match or GameState.from_game(game) != state:
+            return
+        if turn is None or not game.move(*turn):
+            return
+        self._changed(match)
+
+    def _get_executor(self) -> Executor:
+        """
+        Returns the executor of the server's turns, starting it if needed.
+        """
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=get_context('spawn'))
+        return self._executor
+
+    @classmethod
+    def check_ai_player(cls, spec: str) -> None:
+        """
+        Raises ValueError unless <spec> builds a player of AI_PLAYERS, setting
+        only its allowed arguments, whose turns take at most MAX_TIME_LIMIT
+        seconds, so that no client can tie up a worker.
+
+        >>> GameServer.check_ai_player('PlayerAlphaBeta:time_limit=0.5,max_depth=4')
+        >>> GameServer.check_ai_player('PlayerAlphaBeta:time_limit=None,max_depth=64')
+        Traceback (most recent call last):
+        ...
+        ValueError: invalid ai_player: time_limit must be a number of seconds up to 5.0
+        """
+        if not isinstance(spec, str):
+            raise ValueError('invalid ai_player: not a player spec')
+        name, _, arguments = spec.partition(':')
+        if name not in cls.AI_PLAYERS:
+            raise ValueError(f'invalid ai_player: must be one of {", ".join(cls.AI_PLAYERS)}')
+        allowed = cls.AI_PLAYERS[name]
+        for argument in filter(None, arguments.split(',')):
+            if argument.partition('=')[0].strip() not in allowed:
+                raise ValueError(f'invalid ai_player: {name} only takes {", ".join(allowed) or "no arguments"}')
+        try:
+            player = Simulator.make_player(spec, Pieces.G1)
+        except Exception as error:
+            raise ValueError(f'invalid ai_player: {error}')
+        try:
+            if hasattr(player, 'time_limit'):
+                time_limit = player.time_limit
+                if isinstance(time_limit, bool) or not isinstance(time_limit, (int, float)) \
+                        or not 0 < time_limit <= cls.MAX_TIME_LIMIT:
+                    raise ValueError(f'invalid ai_player: time_limit must be a number of seconds '
+                                     f'up to {cls.MAX_TIME_LIMIT}')
+        finally:
+            if hasattr(player, 'close'):
+                player.close()
+
+    @staticmethod
+    def compute_turn(spec: str, state: int) -> Union[Tuple[int, int, int, int, str], None]:
+        """
+        Returns the turn a player built from <spec> picks in the position
+        <state> (see GameState), or None if it has no turn.
+        """
+        state = GameState(state)
+        player = Simulator.make_player(spec, state.whose_turn)
+        if player.player_id == Pieces.G1:
+            state.to_game(player1=player)
+        else:
+            state.to_game(player2=player)
+        turn = player.get_turn()
+        if hasattr(player, 'close'):
+            player.close()
+        if turn is None:
+            return None
+        return turn.row_o, turn.col_o, turn.row_d, turn.col_d, turn.style_name
+
+    @staticmethod
+    def get_state(game: OnitamaGame) -> Dict:
+        """
+        Returns the state of <game> sent to clients.
+
+        >>> state = GameServer.get_state(OnitamaGame(5))
+        >>> state['board'][0], state['styles'], state['turn'], len(state['turns'])
+        ('xxXxx', {'X': ['crab', 'horse'], 'Y': ['mantis', 'rooster'], 'spare': 'dragon'}, 'X', 10)
+        """
+        winner = game.get_winner()
+        styles = {Pieces.G1: [], Pieces.G2: [], 'spare': None}
+        for sty in game.get_styles():
+            if sty.owner == Pieces.EMPTY:
+                styles['spare'] = sty.name
+            else:
+                styles[sty.owner].append(sty.name)
+        return {'size': game.size,
+                'board': [''.join(row) for row in game.get_board()],
+                'styles': styles,
+                'turn': game.whose_turn.player_id,
+                'winner': winner.player_id if winner is not None else None,
+                'plies': len(game.onitama_stack),
+                'turns': [] if winner is not None else [list(move) for move in game.iter_legal_moves()]}
+
+
+async def serve(host: str, port: int, workers: Union[int, None]) -> None:
+    """
+    Runs a GameServer until it is interrupted.
+    """
+    server = GameServer(workers)
+    port = await server.start(host, port)
+    print(f'Serving Onitama on {host}:{port}', flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+def main(argv: Union[List[str], None] = None) -> None:
+    """
+    Runs the server from the command line.
+    """
+    parser = argparse.ArgumentParser(description='Host many Onitama games over a JSON lines TCP protocol.')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen on')
+    parser.add_argument('--port', type=int, default=8765, help='port to listen on')
+    parser.add_argument('--workers', type=int, default=None, help='processes computing the server\'s turns')
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
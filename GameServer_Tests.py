@@ -0,0 +1,96 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from GameServer import GameServer
+from LoadTest import LoadTest
+from Pieces import Pieces
+
+
+async def _send(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, request: dict) -> dict:
+    """
+    Sends <request> and returns the next line the server sends back.
+    """
+    writer.write(json.dumps(request).encode() + b'\n')
+    return json.loads(await reader.readline())
+
+
+def test_server_protocol() -> None:
+    """
+    This test plays a game over the server and checks that responses echo
+    their ids, that illegal turns and unknown games are refused without
+    changing the game, that subscribers are sent the new state, and that
+    undo and close work.
+    """
+    async def run() -> None:
+        server = GameServer()
+        port = await server.start(port=0)
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        watch_reader, watch_writer = await asyncio.open_connection('127.0.0.1', port)
+        try:
+            created = await _send(reader, writer, {'id': 'a', 'op': 'create'})
+            assert created['id'] == 'a' and created['ok'] and created['state']['turn'] == Pieces.G1
+            game_id = created['game']
+            assert (await _send(watch_reader, watch_writer, {'op': 'subscribe', 'game': game_id}))['ok']
+            # mantis belongs to the other player.
+            refused = await _send(reader, writer, {'id': 2, 'op': 'move', 'game': game_id,
+                                                   'turn': [0, 2, 1, 2, 'mantis']})
+            assert refused['id'] == 2 and not refused['ok'] and 'illegal' in refused['error']
+            assert not (await _send(reader, writer, {'op': 'state', 'game': 99}))['ok']
+            assert not (await _send(reader, writer, {'op': 'fly', 'game': game_id}))['ok']
+            turn = created['state']['turns'][0]
+            moved = await _send(reader, writer, {'op': 'move', 'game': game_id, 'turn': turn})
+            assert moved['ok'] and moved['state']['turn'] == Pieces.G2 and moved['state']['plies'] == 1
+            update = json.loads(await asyncio.wait_for(watch_reader.readline(), 5))
+            assert update['event'] == 'update' and update['state'] == moved['state']
+            undone = await _send(reader, writer, {'op': 'undo', 'game': game_id})
+            assert undone['state'] == created['state']
+            assert (await _send(reader, writer, {'op': 'close', 'game': game_id}))['ok']
+            assert game_id not in server.games
+        finally:
+            writer.close()
+            watch_writer.close()
+            await server.stop()
+    asyncio.run(run())
+
+
+def test_server_plays_and_load_test() -> None:
+    """
+    This test checks that the server answers a client's turn with its own in
+    a game against it, and runs a small load test in which every move is
+    accepted.
+    """
+    async def run() -> None:
+        server = GameServer(executor=ThreadPoolExecutor(max_workers=2))
+        port = await server.start(port=0)
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        watch_reader, watch_writer = await asyncio.open_connection('127.0.0.1', port)
+        try:
+            created = await _send(reader, writer, {'op': 'create', 'ai': Pieces.G2,
+                                                   'ai_player': 'PlayerAlphaBeta:time_limit=1,max_depth=2'})
+            game_id = created['game']
+            await _send(watch_reader, watch_writer, {'op': 'subscribe', 'game': game_id})
+            moved = await _send(reader, writer, {'op': 'move', 'game': game_id,
+                                                 'turn': created['state']['turns'][0]})
+            assert moved['ok']
+            plies = [json.loads(await asyncio.wait_for(watch_reader.readline(), 10))['state']['plies']
+                     for _ in range(2)]
+            assert plies == [1, 2]
+            state = (await _send(reader, writer, {'op': 'state', 'game': game_id}))['state']
+            assert state['plies'] == 2 and state['turn'] == Pieces.G1
+            for spec in ('NoSuchPlayer', 'PlayerAlphaBeta:time_limit=None,max_depth=64',
+                         'PlayerAlphaBeta:book="/etc/passwd"', 'PlayerMCTS:time_limit=60', 'Player.PlayerRandom'):
+                refused = await _send(reader, writer, {'op': 'create', 'ai': Pieces.G2, 'ai_player': spec})
+                assert not refused['ok'] and 'ai_player' in refused['error']
+            report = await LoadTest('127.0.0.1', port, games=20, connections=2, concurrency=8, seed=3).run()
+            assert report['games'] == 20 and report['errors'] == 0 and report['moves'] > 0
+            assert 0 < report['p50_ms'] <= report['p99_ms']
+        finally:
+            writer.close()
+            watch_writer.close()
+            await server.stop()
+    asyncio.run(run())
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main(['GameServer_Tests.py'])
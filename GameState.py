@@ -0,0 +1,161 @@
+from __future__ import annotations
+from typing import Tuple, Type, Union
+from OnitamaBoard import OnitamaBoard
+from OnitamaGame import OnitamaGame
+from Pieces import Pieces
+from Player import Player
+
+
+class GameState(int):
+    """
+    An immutable Onitama position packed into a single integer: the board
+    size, the side to move, the owner of each of the five styles and the
+    token on every square. Being an int, a state is hashable, compares and
+    hashes in constant time and takes a few dozen bytes, so search trees,
+    caches and record files can hold millions of them.
+
+    The bits are, from the lowest:
+        4 bits: the board size,
+        1 bit: 1 if it is G2's turn,
+        2 bits per style, in the order of OnitamaGame.get_styles(): 0 for the
+            spare style, 1 for G1, 2 for G2,
+        3 bits per square (row * size + col): 0 for EMPTY, 1 for M1, 2 for G1,
+            3 for M2, 4 for G2.
+
+    >>> state = GameState.from_game(OnitamaGame(5))
+    >>> state.size, state.whose_turn, state.get_token(0, 2), state.get_owners()
+    (5, 'X', 'X', ('X', 'X', 'Y', 'Y', ' '))
+    >>> state == GameState.from_bytes(state.to_bytes())
+    True
+
+    Boards larger than MAX_SIZE, or games without exactly STYLES styles, do
+    not fit this layout.
+
+    === Attributes ===
+    MAX_SIZE : The largest board size that fits in the size bits.
+    STYLES : The number of styles a state stores.
+    """
+    __slots__ = ()
+    _TOKENS = (Pieces.EMPTY, Pieces.M1, Pieces.G1, Pieces.M2, Pieces.G2)
+    _CODES = {Pieces.EMPTY: 0, Pieces.M1: 1, Pieces.G1: 2, Pieces.M2: 3, Pieces.G2: 4}
+    _OWNERS = (Pieces.EMPTY, Pieces.G1, Pieces.G2)
+    _OWNER_CODES = {Pieces.EMPTY: 0, Pieces.G1: 1, Pieces.G2: 2}
+    MAX_SIZE: int = 0xF
+    STYLES: int = 5
+    # Bit offset of the first square.
+    _SQUARES = 5 + 2 * STYLES
+
+    @classmethod
+    def from_game(cls, game: OnitamaGame) -> GameState:
+        """
+        Returns the state of the current position of <game>. Only the pieces
+        on the board are visited, through the board's location index.
+        Raises ValueError if the board is larger than MAX_SIZE or the game
+        does not have STYLES styles.
+
+        >>> GameState.from_game(OnitamaGame(17))
+        Traceback (most recent call last):
+        ...
+        ValueError: a state holds boards of size at most 15, not 17
+        """
+        size = game.size
+        if size > cls.MAX_SIZE:
+            raise ValueError(f'a state holds boards of size at most {cls.MAX_SIZE}, not {size}')
+        styles = game.get_styles()
+        if len(styles) != cls.STYLES:
+            raise ValueError(f'a state holds {cls.STYLES} styles, not {len(styles)}')
+        packed = size | (game.whose_turn is game.player2) << 4
+        for i, sty in enumerate(styles):
+            packed |= cls._OWNER_CODES[sty.owner] << (5 + 2 * i)
+        for side, monk in ((Pieces.G1, Pieces.M1), (Pieces.G2, Pieces.M2)):
+            grandmasters = game.get_grandmasters(side)
+            for square in game.get_squares(side):
+                token = side if square in grandmasters else monk
+                packed |= cls._CODES[token] << (cls._SQUARES + 3 * square)
+        return cls(packed)
+
+    @classmethod
+    def from_bytes(cls, data: bytes, byteorder: str = 'little', *, signed: bool = False) -> GameState:
+        """
+        Returns the state stored in <data> by to_bytes.
+        """
+        return cls(int.from_bytes(data, byteorder, signed=signed))
+
+    def to_bytes(self, length: Union[int, None] = None, byteorder: str = 'little', *,
+                 signed: bool = False) -> bytes:
+        """
+        Returns this state as a fixed number of bytes for its board size
+        (12 bytes for a 5x5 board), unless another <length> is given.
+
+        >>> len(GameState.from_game(OnitamaGame(5)).to_bytes())
+        12
+        """
+        if length is None:
+            length = self.get_byte_length(self.size)
+        return int(self).to_bytes(length, byteorder, signed=signed)
+
+    @classmethod
+    def get_byte_length(cls, size: int) -> int:
+        """
+        Returns the number of bytes to_bytes uses for a board of <size>.
+        """
+        return (cls._SQUARES + 3 * size * size + 7) // 8
+
+    @property
+    def size(self) -> int:
+        """
+        The size of the board.
+        """
+        return self & 0xF
+
+    @property
+    def whose_turn(self) -> str:
+        """
+        The grandmaster token, G1 or G2, of the player to move.
+        """
+        return Pieces.G2 if self >> 4 & 1 else Pieces.G1
+
+    def get_owners(self) -> Tuple[str, ...]:
+        """
+        Returns the owner of each style, in the order of OnitamaGame.get_styles().
+        """
+        return tuple(self._OWNERS[self >> (5 + 2 * i) & 0x3] for i in range(self.STYLES))
+
+    def get_token(self, row: int, col: int) -> str:
+        """
+        Returns the token on the square at <row>, <col>.
+
+        Precondition: <row> and <col> are on the board.
+        """
+        return self._TOKENS[self >> (self._SQUARES + 3 * (row * self.size + col)) & 0x7]
+
+    def to_game(self, player1: Union[Player, None] = None, player2: Union[Player, None] = None,
+                board_class: Type[OnitamaBoard] = OnitamaBoard) -> OnitamaGame:
+        """
+        Returns a new OnitamaGame in this position, played by <player1> and
+        <player2> and stored with <board_class>. Its undo history is empty.
+
+        >>> game = OnitamaGame(5)
+        >>> game.move(0, 2, 1, 2, 'crab')
+        True
+        >>> copy = GameState.from_game(game).to_game()
+        >>> copy.get_board() == game.get_board(), copy.whose_turn is copy.player2
+        (True, True)
+        """
+        size = self.size
+        game = OnitamaGame(size, player1, player2, board_class=board_class)
+        game.set_board(size, [[self.get_token(row, col) for col in range(size)] for row in range(size)])
+        game.set_style_owners(list(self.get_owners()))
+        game.whose_turn = game.player2 if self.whose_turn == Pieces.G2 else game.player1
+        return game
+
+    def __repr__(self) -> str:
+        """
+        Returns a representation of this state.
+        """
+        return f'GameState({int(self):#x})'
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
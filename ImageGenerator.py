@@ -1,5 +1,9 @@
 import pygame
-from typing import Dict
+from pygame.locals import (
+    BLEND_MULT,
+)
+from typing import Dict, List, Tuple, Union
+from AssetManager import AssetManager
 
 
 class ImageGenerator:
@@ -8,36 +12,74 @@ class ImageGenerator:
     """
     EMPTY: str = ' '
     img_dir = './assets/img'
+    # Filename, without the extension, of the image of each key.
+    FILES: Dict[str, str] = {EMPTY: 'space'}
+    # Loads and scales the image files, shared by every ImageGenerator.
+    assets: AssetManager
+    # Size the images are scaled to, or None for their own size.
+    size: Union[Tuple[int, int], None]
     # Contains the image mapping for each piece
     images: Dict[str, pygame.Surface]
+    # Rotated and tinted images, built once on first use.
+    sprites: Dict[Tuple, pygame.Surface]
 
-    def __init__(self, pygame: pygame) -> None:
+    def __init__(self, pygame: pygame, assets: Union[AssetManager, None] = None,
+                 size: Union[Tuple[int, int], None] = None) -> None:
         """
         Initialize the pygame image for EMPTY which is the default return value for get_image.
+        The images are loaded through <assets>, or a new AssetManager if it is None,
+        and scaled to <size> unless it is None.
         """
-        self.images = {
-            self.EMPTY:  pygame.image.load(f'{self.img_dir}/space.png').convert(),
-        }
+        self.assets = assets if assets is not None else AssetManager(self.img_dir)
+        self.size = size
+        self.images = {}
+        self.sprites = {}
+        self.add_images(ImageGenerator.FILES)
+
+    @classmethod
+    def get_filenames(cls) -> List[str]:
+        """
+        Returns the image files of this class, e.g. to load them into an atlas.
+        """
+        return [f'{filename}.png' for filename in {**ImageGenerator.FILES, **cls.FILES}.values()]
 
     def add_images(self, images: Dict[str, str]) -> None:
         """
         Generate and add images based on their key and filenames.
         """
         for key, filename in images.items():
-            self.images[key] = pygame.image.load(
-                f'{self.img_dir}/{filename}.png').convert()
+            self.images[key] = self.assets.get_image(f'{filename}.png', self.size)
 
     def scale_images(self, width: int, height: int) -> None:
         """
         Scale all of the images with the given width and height.
         """
-        # Scale the images
+        # Scaled images come from the asset manager, which scales each file once.
+        self.size = (width, height)
+        files = {**ImageGenerator.FILES, **self.FILES}
         for key in self.images:
-            self.images[key] = pygame.transform.smoothscale(
-                self.images[key], (width, height))
+            self.images[key] = self.assets.get_image(f'{files[key]}.png', self.size)
+        self.sprites = {}
 
     def get_image(self, key: str) -> pygame.Surface:
         """
         Returns the pygame image based on the key.
         """
-        return self.images.get(key, self.EMPTY).copy()
+        return self.images.get(key, self.images[self.EMPTY]).copy()
+
+    def get_sprite(self, key: str, tints: Tuple[Tuple[int, int, int, int], ...] = (),
+                   rotation: int = 0) -> pygame.Surface:
+        """
+        Returns the image of the key rotated by <rotation> degrees and then
+        multiplied by each colour of <tints>. Each combination is built once
+        and the same surface is returned afterwards, so it must not be modified.
+        """
+        sprite_key = (key, tints, rotation)
+        sprite = self.sprites.get(sprite_key)
+        if sprite is None:
+            sprite = self.images.get(key, self.images[self.EMPTY])
+            sprite = pygame.transform.rotate(sprite, rotation) if rotation else sprite.copy()
+            for tint in tints:
+                sprite.fill(tint, special_flags=BLEND_MULT)
+            self.sprites[sprite_key] = sprite
+        return sprite
@@ -0,0 +1,240 @@
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+from time import perf_counter
+from typing import Dict, List, Union
+
+
+class LoadTest:
+    """
+    A client which plays many games against a GameServer at once and measures
+    how long the server takes to answer each move.
+
+    The games are spread over a few connections. Requests on a connection are
+    pipelined and their responses matched by "id", so one connection carries
+    many games at a time, as a front end relaying many players would. Every
+    game plays random legal turns for both sides until it ends or reaches
+    <max_plies>.
+
+    === Attributes ===
+    host : Address of the server.
+    port : Port of the server.
+    games : Number of games played.
+    connections : Number of connections the games are spread over.
+    concurrency : Number of games in progress at a time.
+    max_plies : Plies after which a game is closed unfinished.
+    latencies : Seconds each answered move took, in the order they were answered.
+    errors : Number of requests the server refused.
+
+    === Private Attributes ===
+    _rng : The random number generator picking the turns.
+    """
+    host: str
+    port: int
+    games: int
+    connections: int
+    concurrency: int
+    max_plies: int
+    latencies: List[float]
+    errors: int
+    _rng: random.Random
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 8765, games: int = 1000,
+                 connections: int = 8, concurrency: int = 256, max_plies: int = 200,
+                 seed: Union[int, None] = None) -> None:
+        """
+        Initializes a load test which has not run yet.
+        """
+        self.host = host
+        self.port = port
+        self.games = games
+        self.connections = connections
+        self.concurrency = concurrency
+        self.max_plies = max_plies
+        self.latencies = []
+        self.errors = 0
+        self._rng = random.Random(seed)
+
+    async def run(self) -> Dict:
+        """
+        Plays the games and returns the report (see report).
+        """
+        self.latencies = []
+        self.errors = 0
+        clients = [await _Connection.open(self.host, self.port) for _ in range(self.connections)]
+        remaining = iter(range(self.games))
+        start = perf_counter()
+
+        async def play_games(client: _Connection) -> None:
+            for _ in remaining:
+                await self._play_game(client)
+        try:
+            await asyncio.gather(*(play_games(clients[index % len(clients)])
+                                   for index in range(min(self.concurrency, self.games))))
+        finally:
+            for client in clients:
+                await client.close()
+        return self.report(perf_counter() - start)
+
+    async def _play_game(self, client: _Connection) -> None:
+        """
+        Plays one game with random turns on <client>.
+        """
+        response = await client.request({'op': 'create'})
+        game_id = response['game']
+        state = response['state']
+        while state['winner'] is None and state['plies'] < self.max_plies and state['turns']:
+            start = perf_counter()
+            response = await client.request({'op': 'move', 'game': game_id,
+                                             'turn': self._rng.choice(state['turns'])})
+            self.latencies.append(perf_counter() - start)
+            if not response['ok']:
+                self.errors += 1
+                break
+            state = response['state']
+        await client.request({'op': 'close', 'game': game_id})
+
+    def report(self, seconds: float) -> Dict:
+        """
+        Returns the number of games and moves, the median and 99th percentile
+        move latencies in milliseconds, and the moves answered per second over
+        <seconds>.
+
+        >>> test = LoadTest(games=2)
+        >>> test.latencies = [i / 1000 for i in range(1, 101)]
+        >>> report = test.report(2.0)
+        >>> report['p50_ms'], report['p99_ms'], report['moves_per_second']
+        (50.0, 99.0, 50.0)
+        """
+        ordered = sorted(self.latencies)
+
+        def percentile(fraction: float) -> float:
+            if not ordered:
+                return 0.0
+            return round(ordered[max(0, math.ceil(len(ordered) * fraction) - 1)] * 1000, 3)
+        return {'games': self.games,
+                'moves': len(ordered),
+                'errors': self.errors,
+                'seconds': round(seconds, 3),
+                'p50_ms': percentile(0.5),
+                'p99_ms': percentile(0.99),
+                'moves_per_second': round(len(ordered) / seconds, 1) if seconds > 0 else 0.0}
+
+
+class _Connection:
+    """
+    A connection to a GameServer carrying pipelined requests.
+
+    === Private Attributes ===
+    _reader : The stream the responses are read from.
+    _writer : The stream the requests are written to.
+    _pending : The futures of the requests not yet answered, keyed by id.
+    _next_id : The id of the next request.
+    _listener : The task matching responses to requests.
+    """
+    _reader: asyncio.StreamReader
+    _writer: asyncio.StreamWriter
+    _pending: Dict[int, asyncio.Future]
+    _next_id: int
+    _listener: asyncio.Task
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Initializes a connection over <reader> and <writer>.
+        """
+        self._reader = reader
+        self._writer = writer
+        self._pending = {}
+        self._next_id = 0
+        self._listener = asyncio.get_running_loop().create_task(self._listen())
+
+    @classmethod
+    async def open(cls, host: str, port: int) -> _Connection:
+        """
+        Returns a new connection to the server at <host>, <port>.
+        """
+        reader, writer = await asyncio.open_connection(host, port, limit=1 << 16)
+        return cls(reader, writer)
+
+    async def request(self, request: Dict) -> Dict:
+        """
+        Sends <request> and returns the server's response.
+        """
+        self._next_id += 1
+        request['id'] = self._next_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[self._next_id] = future
+        self._writer.write(json.dumps(request).encode() + b'\n')
+        await self._writer.drain()
+        return await future
+
+    async def _listen(self) -> None:
+        """
+        Resolves the pending requests with the responses read until the
+        connection closes.
+        """
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    break
+                response = json.loads(line)
+                future = self._pending.pop(response.get('id'), None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError('connection closed'))
+            self._pending.clear()
+
+    async def close(self) -> None:
+        """
+        Closes the connection.
+        """
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except ConnectionError:
+            pass
+        self._listener.cancel()
+
+
+async def _run_local(test: LoadTest) -> Dict:
+    """
+    Runs <test> against a GameServer started in this process on a free port.
+    """
+    from GameServer import GameServer
+    server = GameServer()
+    test.port = await server.start(test.host, 0)
+    try:
+        return await test.run()
+    finally:
+        await server.stop()
+
+
+def main(argv: Union[List[str], None] = None) -> None:
+    """
+    Runs a load test from the command line and prints its report.
+    """
+    parser = argparse.ArgumentParser(description='Measure the move latency of an Onitama GameServer.')
+    parser.add_argument('--host', default='127.0.0.1', help='address of the server')
+    parser.add_argument('--port', type=int, default=8765, help='port of the server')
+    parser.add_argument('--local', action='store_true', help='start a server in this process')
+    parser.add_argument('--games', type=int, default=1000, help='games to play')
+    parser.add_argument('--connections', type=int, default=8, help='connections to spread the games over')
+    parser.add_argument('--concurrency', type=int, default=256, help='games in progress at a time')
+    parser.add_argument('--max-plies', type=int, default=200, help='plies after which a game is abandoned')
+    parser.add_argument('--seed', type=int, default=None, help='seed of the random turns')
+    args = parser.parse_args(argv)
+    test = LoadTest(args.host, args.port, args.games, args.connections, args.concurrency, args.max_plies, args.seed)
+    report = asyncio.run(_run_local(test) if args.local else test.run())
+    print(json.dumps(report))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,124 @@
+from array import array
+from typing import Iterable
+from Turn import Turn
+
+
+class Move:
+    """
+    A class of helpers for moves packed into one small integer,
+        origin | destination << bits | style << 2 * bits,
+    where the squares are row * size + col, bits is the square width of the
+    board (OnitamaGame.square_bits, see get_square_bits) and style is the
+    index of the style in OnitamaGame.get_styles(). Packed moves are what search, rollouts and
+    record files use: they cost no allocation, hash and compare as integers
+    and fit in typed arrays of TYPECODE. A move never has the same origin and
+    destination, so 0 is never a move and can stand for none.
+
+    Turn objects are only made from packed moves at the UI and API boundary,
+    with to_turn and from_turn.
+
+    >>> move = Move.encode(2, 7, 0)
+    >>> move, Move.origin(move), Move.destination(move), Move.style(move)
+    (1794, 2, 7, 0)
+
+    === Attributes ===
+    TYPECODE : The array typecode of move lists.
+    MAX_SQUARE_BITS : The widest square field which leaves 8 bits of style in a TYPECODE item.
+    """
+    TYPECODE: str = 'I'
+    MAX_SQUARE_BITS: int = 12
+
+    @classmethod
+    def get_square_bits(cls, size: int) -> int:
+        """
+        Returns the number of bits a square index takes in the packed moves
+        and undo records of a board of <size>: 8, or more on boards of over
+        256 squares. Raises ValueError if the moves of such a board do not
+        fit in TYPECODE.
+
+        >>> Move.get_square_bits(5), Move.get_square_bits(15), Move.get_square_bits(17)
+        (8, 8, 9)
+        >>> Move.get_square_bits(65)
+        Traceback (most recent call last):
+        ...
+        ValueError: moves on a board of size 65 do not fit in 32 bits
+        """
+        bits = max(8, (size * size - 1).bit_length())
+        if bits > cls.MAX_SQUARE_BITS:
+            raise ValueError(f'moves on a board of size {size} do not fit in 32 bits')
+        return bits
+
+    @staticmethod
+    def encode(origin: int, destination: int, style: int, bits: int = 8) -> int:
+        """
+        Returns the packed move from the square <origin> to the square
+        <destination> with the style at index <style>, with squares of <bits>.
+        """
+        return origin | destination << bits | style << 2 * bits
+
+    @staticmethod
+    def origin(move: int, bits: int = 8) -> int:
+        """
+        Returns the origin square of <move>, with squares of <bits>.
+        """
+        return move & (1 << bits) - 1
+
+    @staticmethod
+    def destination(move: int, bits: int = 8) -> int:
+        """
+        Returns the destination square of <move>, with squares of <bits>.
+        """
+        return move >> bits & (1 << bits) - 1
+
+    @staticmethod
+    def style(move: int, bits: int = 8) -> int:
+        """
+        Returns the index of the style of <move> in OnitamaGame.get_styles(),
+        with squares of <bits>.
+        """
+        return move >> 2 * bits
+
+    @staticmethod
+    def from_turn(game, turn: Turn) -> int:
+        """
+        Returns the packed move of <turn> in <game>.
+
+        >>> from OnitamaGame import OnitamaGame
+        >>> from Pieces import Pieces
+        >>> hex(Move.from_turn(OnitamaGame(5), Turn(0, 2, 1, 2, 'crab', Pieces.G1)))
+        '0x702'
+        """
+        size = game.size
+        bits = game.square_bits
+        style = [sty.name for sty in game.get_styles()].index(turn.style_name)
+        return (turn.row_o * size + turn.col_o) | (turn.row_d * size + turn.col_d) << bits | style << 2 * bits
+
+    @staticmethod
+    def to_turn(game, move: int) -> Turn:
+        """
+        Returns the Turn of the player to move in <game> for the packed <move>.
+
+        >>> from OnitamaGame import OnitamaGame
+        >>> turn = Move.to_turn(OnitamaGame(5), 0x702)
+        >>> turn.row_o, turn.col_o, turn.row_d, turn.col_d, turn.style_name
+        (0, 2, 1, 2, 'crab')
+        """
+        size = game.size
+        bits = game.square_bits
+        mask = (1 << bits) - 1
+        row_o, col_o = divmod(move & mask, size)
+        row_d, col_d = divmod(move >> bits & mask, size)
+        style_name = game.get_styles()[move >> 2 * bits].name
+        return Turn(row_o, col_o, row_d, col_d, style_name, game.whose_turn.player_id)
+
+    @classmethod
+    def to_array(cls, moves: Iterable[int] = ()) -> array:
+        """
+        Returns a typed array of the packed <moves>.
+        """
+        return array(cls.TYPECODE, moves)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
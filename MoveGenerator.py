@@ -0,0 +1,176 @@
+from array import array
+from typing import Dict, Iterator, List, Tuple
+from Move import Move
+from Pieces import Pieces
+from Style import Style
+from Turn import Turn
+
+
+class MoveGenerator:
+    """
+    A class which generates the legal turns of an Onitama position from
+    precomputed destination tables.
+
+    For every (board size, style moves, side) a table is built once which maps
+    each origin square to the in-bounds destination squares of that style. A
+    square is the index row * size + col. Legal turns are then produced by
+    skipping destinations occupied by the mover's own pieces, which is the only
+    check left of OnitamaGame.is_legal_move once bounds are known.
+
+    === Private Attributes ===
+    _tables :
+        Cache of destination tables keyed by (size, StyleDefinition, side). Entry
+        [origin] of a table is a tuple of (square, row, col) destinations in
+        the order of the style's moves.
+    """
+    _tables: Dict[Tuple, List[Tuple[Tuple[int, int, int], ...]]] = {}
+
+    @classmethod
+    def get_destinations(cls, size: int, style: Style, side: str) -> List[Tuple[Tuple[int, int, int], ...]]:
+        """
+        Returns the destination table of <style> for <side> on a board of <size>.
+        The moves of G1 are flipped, as G1 plays from row 0 towards row size - 1.
+
+        >>> crab = Style([(-1, 0), (0, -2), (0, 2)], 'crab', Pieces.G1)
+        >>> MoveGenerator.get_destinations(5, crab, Pieces.G1)[2]
+        ((7, 1, 2), (4, 0, 4), (0, 0, 0))
+        >>> MoveGenerator.get_destinations(5, crab, Pieces.G2)[2]
+        ((0, 0, 0), (4, 0, 4))
+        """
+        definition = style.definition
+        key = (size, definition, side)
+        table = cls._tables.get(key)
+        if table is None:
+            moves = definition.get_moves(side)
+            table = []
+            for row in range(size):
+                for col in range(size):
+                    table.append(tuple((row_d * size + col_d, row_d, col_d)
+                                       for row_d, col_d in ((row + d_row, col + d_col) for d_row, d_col in moves)
+                                       if 0 <= row_d < size and 0 <= col_d < size))
+            cls._tables[key] = table
+        return table
+
+    @classmethod
+    def get_valid_turns(cls, onitama, player_id: str, styles: List[Style]) -> Dict[str, List[Turn]]:
+        """
+        Returns a dictionary of the legal turns of the player <player_id> in
+        <onitama>, keyed by style name, given the player's <styles>. The
+        player's pieces come from the board's location index. The turns are the same,
+        and in the same order, as checking every move of every style with
+        OnitamaGame.is_legal_move.
+
+        >>> from OnitamaGame import OnitamaGame
+        >>> game = OnitamaGame(5)
+        >>> turns = game.player1.get_valid_turns()
+        >>> sorted((turn.row_d, turn.col_d) for turn in turns['crab'])
+        [(1, 0), (1, 1), (1, 2), (1, 3), (1, 4)]
+        >>> len(turns['horse'])
+        5
+        """
+        turns = {}
+        for sty in styles:
+            turns[sty.name] = []
+        # Only the player whose turn it is can move their pieces.
+        side = Pieces.G1 if onitama.whose_turn == onitama.player1 else Pieces.G2
+        if player_id != side:
+            return turns
+        size = onitama.size
+        own = onitama.get_squares(side)
+        origins = [(origin, origin // size, origin % size) for origin in sorted(own)]
+        for sty in styles:
+            table = cls.get_destinations(size, sty, side)
+            style_turns = turns[sty.name]
+            name = sty.name
+            for origin, row, col in origins:
+                for square, row_d, col_d in table[origin]:
+                    if square not in own:
+                        style_turns.append(Turn(row, col, row_d, col_d, name, player_id))
+        return turns
+
+    @classmethod
+    def get_valid_moves(cls, onitama, player_id: str) -> array:
+        """
+        Returns the legal turns of the player <player_id> in <onitama> as an
+        array of packed moves (see Move), in the order of get_valid_turns for
+        the player's styles, without creating any Turn.
+
+        >>> from OnitamaGame import OnitamaGame
+        >>> moves = MoveGenerator.get_valid_moves(OnitamaGame(5), Pieces.G1)
+        >>> len(moves), hex(moves[0])
+        (10, '0x500')
+        """
+        moves = array(Move.TYPECODE)
+        side = Pieces.G1 if onitama.whose_turn == onitama.player1 else Pieces.G2
+        if player_id != side:
+            return moves
+        size = onitama.size
+        bits = onitama.square_bits
+        own = onitama.get_squares(side)
+        origins = sorted(own)
+        append = moves.append
+        styles = onitama.get_styles()
+        for index in onitama.get_style_indices(player_id):
+            table = cls.get_destinations(size, styles[index], side)
+            style = index << 2 * bits
+            for origin in origins:
+                for square, _, _ in table[origin]:
+                    if square not in own:
+                        append(origin | square << bits | style)
+        return moves
+
+    @classmethod
+    def iter_moves(cls, onitama, player_id: str, styles: List[Style]) -> Iterator[Tuple[int, int, int, int, str]]:
+        """
+        Yields the legal turns of get_valid_turns, in the same order, one at a
+        time as (row_o, col_o, row_d, col_d, style_name), without building any
+        list or Turn, so a caller can stop as soon as it has what it needs.
+        The position must not change until the generator is exhausted.
+
+        >>> from OnitamaGame import OnitamaGame
+        >>> next(MoveGenerator.iter_moves(OnitamaGame(5), Pieces.G1, OnitamaGame(5).player1.get_styles()))
+        (0, 0, 1, 0, 'crab')
+        """
+        side = Pieces.G1 if onitama.whose_turn == onitama.player1 else Pieces.G2
+        if player_id != side:
+            return
+        size = onitama.size
+        own = onitama.get_squares(side)
+        origins = [(origin, origin // size, origin % size) for origin in sorted(own)]
+        for sty in styles:
+            table = cls.get_destinations(size, sty, side)
+            name = sty.name
+            for origin, row, col in origins:
+                for square, row_d, col_d in table[origin]:
+                    if square not in own:
+                        yield row, col, row_d, col_d, name
+
+    @classmethod
+    def count_valid_turns(cls, onitama, player_id: str, styles: List[Style]) -> int:
+        """
+        Returns the number of turns get_valid_turns would return, without
+        creating them.
+
+        >>> from OnitamaGame import OnitamaGame
+        >>> game = OnitamaGame(5)
+        >>> MoveGenerator.count_valid_turns(game, Pieces.G1, game.player1.get_styles())
+        10
+        """
+        side = Pieces.G1 if onitama.whose_turn == onitama.player1 else Pieces.G2
+        if player_id != side:
+            return 0
+        size = onitama.size
+        own = onitama.get_squares(side)
+        count = 0
+        for sty in styles:
+            table = cls.get_destinations(size, sty, side)
+            for origin in own:
+                for square, _, _ in table[origin]:
+                    if square not in own:
+                        count += 1
+        return count
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,107 @@
+from typing import Dict, List, Tuple
+from random import Random
+from OnitamaGame import OnitamaGame
+from Perft import Perft
+from Player import Player, PlayerRandom
+from Pieces import Pieces
+from hypothesis import given, settings
+from hypothesis.strategies import integers, sampled_from
+
+
+def reference_turns(player: Player) -> Dict[str, List[Tuple]]:
+    """
+    Returns the legal turns of <player> as (row_o, col_o, row_d, col_d) tuples,
+    computed by checking every move of every style with 'is_legal_move'.
+    """
+    turns = {}
+    for sty in player.get_styles():
+        turns[sty.name] = []
+        for row, col in player.get_tokens():
+            for d_row, d_col in sty.get_moves():
+                if player.player_id == Pieces.G1:
+                    d_row *= -1
+                    d_col *= -1
+                if player.onitama.is_legal_move(row, col, row + d_row, col + d_col):
+                    turns[sty.name].append((row, col, row + d_row, col + d_col))
+    return turns
+
+
+def generated_turns(player: Player) -> Dict[str, List[Tuple]]:
+    """
+    Returns the turns of 'get_valid_turns' for <player> as tuples.
+    """
+    turns = {}
+    for style_name, style_turns in player.get_valid_turns().items():
+        turns[style_name] = [(turn.row_o, turn.col_o, turn.row_d, turn.col_d)
+                             for turn in style_turns]
+    return turns
+
+
+@settings(max_examples = 30, deadline = None)
+@given(size = sampled_from([5, 7, 9, 11]), seed = integers(min_value = 0, max_value = 10 ** 6))
+def test_get_valid_turns_matches_is_legal_move(size, seed) -> None:
+    """
+    This test plays random games and checks that 'get_valid_turns' gives the
+    same turns, in the same order, as the 'is_legal_move' reference for both
+    players at every ply.
+    """
+    rng = Random(seed)
+    game = OnitamaGame(size, PlayerRandom(Pieces.G1), PlayerRandom(Pieces.G2))
+    for _ in range(60):
+        for player in (game.player1, game.player2):
+            assert generated_turns(player) == reference_turns(player)
+        turns = [turn for style_turns in game.whose_turn.get_valid_turns().values()
+                 for turn in style_turns]
+        if not turns or game.get_winner() is not None:
+            break
+        turn = rng.choice(turns)
+        assert game.move(turn.row_o, turn.col_o, turn.row_d, turn.col_d, turn.style_name)
+
+
+def test_lazy_turn_helpers() -> None:
+    """
+    This test plays random games and checks that the lazy turn iterator and
+    the any/count/capture helpers agree with 'get_valid_turns', and that
+    'get_random_turn' can pick every legal turn.
+    """
+    rng = Random(20)
+    game = OnitamaGame(5, PlayerRandom(Pieces.G1), PlayerRandom(Pieces.G2))
+    for ply in range(60):
+        for player in (game.player1, game.player2):
+            lazy = [(turn.row_o, turn.col_o, turn.row_d, turn.col_d) for turn in player.iter_valid_turns()]
+            # Before and after the game's cache is filled.
+            expected = [turn for style_turns in generated_turns(player).values() for turn in style_turns]
+            assert lazy == expected
+            assert [(turn.row_o, turn.col_o, turn.row_d, turn.col_d) for turn in player.iter_valid_turns()] == expected
+            assert player.count_valid_turns() == len(expected)
+            assert player.has_valid_turn() == bool(expected)
+            captures = [turn for turn in expected if game.get_token(turn[2], turn[3]) != Pieces.EMPTY]
+            capture = player.get_capture_turn()
+            assert (capture and (capture.row_o, capture.col_o, capture.row_d, capture.col_d)) == \
+                (captures[0] if captures else None)
+        player = game.whose_turn
+        if ply % 10 == 0:
+            picks = {(turn.row_o, turn.col_o, turn.row_d, turn.col_d, turn.style_name)
+                     for turn in (player.get_random_turn(rng) for _ in range(400))}
+            assert len(picks) == player.count_valid_turns()
+        turn = player.get_random_turn(rng)
+        if turn is None or game.get_winner() is not None:
+            break
+        assert game.move(turn.row_o, turn.col_o, turn.row_d, turn.col_d, turn.style_name)
+
+
+def test_perft_matches_across_board_classes() -> None:
+    """
+    This test checks the perft node counts of the start position on every
+    supported board size, and that every board class gives the same counts.
+    """
+    assert [Perft.perft(Perft.make_game(5), depth) for depth in range(5)] == [1, 10, 120, 1476, 20176]
+    for size in (5, 7, 9, 11, 13):
+        counts = {name: Perft.perft(Perft.make_game(size, board_class), 3)
+                  for name, board_class in Perft.BOARD_CLASSES.items()}
+        assert len(set(counts.values())) == 1, (size, counts)
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main(['MoveGenerator_Tests.py'])
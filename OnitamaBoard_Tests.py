@@ -1,9 +1,10 @@
 from typing import List
 from OnitamaBoard import OnitamaBoard
+from BitboardBoard import BitboardBoard
 from Player import Player, PlayerRandom
 from Pieces import Pieces
 from hypothesis import given
-from hypothesis.strategies import integers
+from hypothesis.strategies import integers, lists, sampled_from, tuples
 
 def test_construct_styles() -> None:
     """ 
@@ -72,6 +73,91 @@ def test_get_set_token() -> None:
     # Out of bounds test
     assert board.get_token(-1, 2) == Pieces.EMPTY
 
+@given(size = sampled_from([5, 7, 9, 11, 13]),
+       changes = lists(tuples(integers(min_value = 0, max_value = 12),
+                              integers(min_value = 0, max_value = 12),
+                              sampled_from([Pieces.M1, Pieces.M2, Pieces.G1, Pieces.G2, Pieces.EMPTY]))))
+def test_bitboard_matches_board(size, changes) -> None:
+    """
+    This test checks if 'BitboardBoard' stores the same position as 'OnitamaBoard'
+    after any sequence of 'set_token' calls, for every supported size.
+    """
+    player1 = PlayerRandom('id1')
+    player2 = PlayerRandom('id2')
+    board = OnitamaBoard(size, player1, player2)
+    bitboard = BitboardBoard(size, player1, player2)
+    assert bitboard.deep_copy() == board.deep_copy()
+
+    for row, col, token in changes:
+        if board.valid_coordinate(row, col):
+            board.set_token(row, col, token)
+            bitboard.set_token(row, col, token)
+            assert bitboard.get_token(row, col) == token
+    assert bitboard.deep_copy() == board.deep_copy()
+    assert str(bitboard) == str(board)
+
+    copy = BitboardBoard(size, player1, player2, board.deep_copy())
+    assert copy.deep_copy() == board.deep_copy()
+    assert bitboard.get_token(size, 0) == Pieces.EMPTY
+
+@given(size = sampled_from([5, 9, 13]),
+       board_class = sampled_from([OnitamaBoard, BitboardBoard]),
+       changes = lists(tuples(integers(min_value = 0, max_value = 12),
+                              integers(min_value = 0, max_value = 12),
+                              sampled_from([Pieces.M1, Pieces.M2, Pieces.G1, Pieces.G2, Pieces.EMPTY]))))
+def test_location_index(size, board_class, changes) -> None:
+    """
+    This test checks if 'get_squares' and 'get_grandmasters' always match a
+    full scan of the board after 'set_token' and 'set_board'.
+    """
+    player1 = PlayerRandom('id1')
+    player2 = PlayerRandom('id2')
+    board = board_class(size, player1, player2)
+    for row, col, token in changes:
+        if board.valid_coordinate(row, col):
+            board.set_token(row, col, token)
+
+    for side, monk in ((Pieces.G1, Pieces.M1), (Pieces.G2, Pieces.M2)):
+        squares = set()
+        grandmasters = set()
+        for row, tokens in enumerate(board.deep_copy()):
+            for col, token in enumerate(tokens):
+                if token in (side, monk):
+                    squares.add(row * size + col)
+                if token == side:
+                    grandmasters.add(row * size + col)
+        assert board.get_squares(side) == squares
+        assert board.get_grandmasters(side) == grandmasters
+
+    board.set_board(board_class(size, player1, player2).deep_copy())
+    assert board.get_squares(Pieces.G1) == set(range(size))
+    assert board.get_grandmasters(Pieces.G2) == {(size - 1) * size + size // 2}
+
+@given(swaps = lists(tuples(integers(min_value = 0, max_value = 4), integers(min_value = 0, max_value = 4)),
+                     max_size = 12))
+def test_style_owner_assignment(swaps) -> None:
+    """
+    This test checks that boards share interned style definitions, that the
+    owners kept in the board's assignment follow swaps and direct owner
+    changes with the hash up to date, and that copied styles are detached.
+    """
+    board = OnitamaBoard(5, PlayerRandom('id1'), PlayerRandom('id2'))
+    other = BitboardBoard(5, PlayerRandom('id1'), PlayerRandom('id2'))
+    assert all(a.definition is b.definition for a, b in zip(board.styles, other.styles))
+    owners = [sty.owner for sty in board.styles]
+    for i, j in swaps:
+        board.swap_style_owners(i, j)
+        owners[i], owners[j] = owners[j], owners[i]
+        assert [sty.owner for sty in board.styles] == owners
+        for side in (Pieces.G1, Pieces.G2):
+            assert board.get_player_styles(side) == [sty for sty in board.styles if sty.owner == side]
+    copies = board.get_styles_deep_copy()
+    board.styles[0].owner, board.styles[4].owner = board.styles[4].owner, board.styles[0].owner
+    assert [sty.owner for sty in copies] == owners
+    other.set_style_owners([sty.owner for sty in board.styles])
+    assert other.get_hash() == board.get_hash()
+    board.set_board(board.deep_copy())
+    assert other.get_hash() == board.get_hash()
 
 if __name__ == '__main__':
     import pytest
@@ -1,9 +1,14 @@
-from typing import List, Union
+from array import array
+from typing import Dict, Iterator, List, Set, Tuple, Type, Union
+from Move import Move
+from MoveGenerator import MoveGenerator
 from OnitamaBoard import OnitamaBoard
 from Player import Player
 from Pieces import Pieces
 from OnitamaStack import OnitamaStack
 from Style import Style
+from Turn import Turn
+from Zobrist import Zobrist
 
 
 class OnitamaGame:
@@ -17,41 +22,76 @@ class OnitamaGame:
     player1 : Player object representing player 1(Michael).
     player2 : Player object representing player 2(Ilir).
     whose_turn : Player whose turn it is.
-    board_stack : A stack of Onitama boards that 
+    onitama_stack : A stack of packed undo records, one per move made.
+    square_bits : Bits of a square index in packed moves and undo records (see Move.get_square_bits).
+    board_class : The OnitamaBoard class (or subclass, e.g. BitboardBoard) used to store the board.
 
     === Private Attributes ===
 
     _board: 
         Onitama board object with information on player positions and board layout.
+    _changed_squares:
+        Squares changed by move, undo or set_board since the last get_changes.
+    _changed_styles:
+        Indices of the styles whose owner changed since the last get_changes.
+    _legal_key:
+        The get_hash() of the position whose legal turns are cached, or None.
+    _legal_turns:
+        The legal turns of the player to move in that position, keyed by style name.
+    _legal_origins:
+        The same turns keyed by origin square, built on first use, or None.
+    _moves_key:
+        The get_hash() of the position whose packed legal moves are cached, or None.
+    _legal_moves:
+        The packed legal moves of the player to move in that position.
 
     === Representation Invariants ===
     - Size must be an odd number greater or equal to 5
 
     """
+    # Codes of the tokens that can be captured, as stored in an undo record.
+    _CAPTURE_CODES = {Pieces.EMPTY: 0, Pieces.M1: 1, Pieces.G1: 2, Pieces.M2: 3, Pieces.G2: 4}
+    _CAPTURED = (Pieces.EMPTY, Pieces.M1, Pieces.G1, Pieces.M2, Pieces.G2)
     size: int
     player1: Player
     player2: Player
     _board: OnitamaBoard
     whose_turn: Player
+    square_bits: int
     onitama_stack: OnitamaStack
-
-    def __init__(self, size: int = 5, player1: Union[Player, None] = None, player2: Union[Player, None] = None) -> None:
+    board_class: Type[OnitamaBoard]
+    _changed_squares: Set[int]
+    _changed_styles: Set[int]
+    _legal_key: Union[int, None]
+    _legal_turns: Dict[str, List[Turn]]
+    _legal_origins: Union[Dict[int, List[Turn]], None]
+    _moves_key: Union[int, None]
+    _legal_moves: array
+
+    def __init__(self, size: int = 5, player1: Union[Player, None] = None, player2: Union[Player, None] = None,
+                 board_class: Type[OnitamaBoard] = OnitamaBoard) -> None:
         """
-        DO NOT MODIFY THIS!!!
         Constructs a game of Onitama with 2 players passed in as parameters
         Sets <whose_turn> to <player1>
         Sets the <self.size> of Onitama to the passed in <size> if valid.
+        The board is stored with <board_class>, which must be OnitamaBoard or a
+        subclass of it such as BitboardBoard.
 
         Precondition: The size must be odd and greater than or equal to 5.
         """
         self.size = size
+        self.square_bits = Move.get_square_bits(size)
+        self.board_class = board_class
         self.player1 = player1 if player1 is not None else Player(Pieces.G1)
         self.player2 = player2 if player2 is not None else Player(Pieces.G2)
         self.player1.set_onitama(self)
         self.player2.set_onitama(self)
-        self._board = OnitamaBoard(self.size, self.player1, self.player2)
+        self._board = self.board_class(self.size, self.player1, self.player2)
         self.whose_turn = self.player1
         self.onitama_stack = OnitamaStack()
+        self._changed_squares = set(range(self.size * self.size))
+        self._changed_styles = set(range(len(self._board.styles)))
+        self._clear_legal_turns()
 
     def other_player(self, player: Player) -> Union[Player, None]:
         """
@@ -160,12 +200,8 @@ class OnitamaGame:
         Attempts to make a move for player1 or player2 (depending on whose turn it is) from
         position <row_o>, <col_o> to position <row_d>, <col_d>. 
 
-        On a successful move, it stores the current (unmodified) state of the board and 
-        the list of styles to <self.onitama_stack> by calling the 
-        <self.onitama_stack.push(var1, var2)> method.
-
-        After storing the move, it will make the valid move and modify the board and
-        actually make the move.
+        On a successful move, it records the move on <self.onitama_stack>
+        through make_move so that it can be reverted by undo.
 
         Returns true if the move was successfully made, false otherwise.
 
@@ -193,18 +229,110 @@ class OnitamaGame:
         >>> game.move(0, 3, 1, 3, 'horse')
         False
         """
-        style = None
         if self.is_legal_move(row_o, col_o, row_d, col_d):
-            self.onitama_stack.push(self.get_board(), self.get_styles_deep_copy())
-            for value in self.get_styles():
-                if value.name == style_name:
-                    style = value
-            self._board.set_token(row_d, col_d, self.get_token(row_o, col_o))
-            self._board.set_token(row_o, col_o, Pieces.EMPTY)
-            self._board.exchange_style(style)
-            self.whose_turn = self.other_player(self.whose_turn)
+            self.make_move(row_o, col_o, row_d, col_d, style_name)
+            self._record_changes(self.onitama_stack.peek())
+            self._clear_legal_turns()
             return True
         return False
+
+    def make_move(self, row_o: int, col_o: int, row_d: int, col_d: int, style_name: str) -> None:
+        """
+        Makes the move from <row_o>, <col_o> to <row_d>, <col_d> with the style
+        <style_name> without checking that it is legal, and pushes a single
+        packed undo record onto <self.onitama_stack>. The record holds the
+        origin and destination squares, the captured token, the two styles
+        whose owners were swapped and the side that moved, so making and
+        unmaking a move never copies the board or the styles. Each square
+        takes <square_bits> bits.
+
+        This is the fast path for search code, which must pair every call
+        with unmake_move.
+
+        Precondition: The move is legal, e.g. it came from get_valid_turns.
+
+        >>> game = OnitamaGame(5)
+        >>> game.make_move(0, 2, 1, 2, 'crab')
+        >>> game.get_token(1, 2), game.whose_turn is game.player2
+        ('X', True)
+        >>> game.unmake_move()
+        >>> game.get_token(0, 2), game.whose_turn is game.player1
+        ('X', True)
+        """
+        used = -1
+        for i, value in enumerate(self._board.styles):
+            if value.name == style_name:
+                used = i
+        size = self.size
+        self._make_move(row_o * size + col_o, row_d * size + col_d, used)
+
+    def make_packed_move(self, move: int) -> None:
+        """
+        Makes the packed <move> (see Move) like make_move, without checking
+        that it is legal. This is the form search and rollouts use.
+
+        Precondition: The move is legal, e.g. it came from get_legal_moves.
+
+        >>> game = OnitamaGame(5)
+        >>> game.make_packed_move(game.get_legal_moves()[0])
+        >>> game.get_token(1, 0), game.whose_turn is game.player2
+        ('x', True)
+        >>> game.unmake_move()
+        """
+        bits = self.square_bits
+        mask = (1 << bits) - 1
+        self._make_move(move & mask, move >> bits & mask, move >> 2 * bits)
+
+    def _make_move(self, origin: int, destination: int, used: int) -> None:
+        """
+        Moves the piece on the square <origin> to the square <destination>
+        with the style at index <used> of the styles, or no known style if it
+        is -1, and pushes the undo record described in make_move.
+        """
+        board = self._board
+        spare = board.get_spare_style()
+        # Exchanging the spare style (or an unknown one) leaves the owners as they are.
+        if used == -1 or spare == -1 or used == spare:
+            used = spare = 0
+        size = self.size
+        row_o, col_o = divmod(origin, size)
+        row_d, col_d = divmod(destination, size)
+        captured = board.get_token(row_d, col_d)
+        board.set_token(row_d, col_d, board.get_token(row_o, col_o))
+        board.set_token(row_o, col_o, Pieces.EMPTY)
+        if used != spare:
+            board.swap_style_owners(used, spare)
+        side = 0 if self.whose_turn is self.player1 else 1
+        bits = self.square_bits
+        self.onitama_stack.push(origin
+                                | destination << bits
+                                | (self._CAPTURE_CODES[captured]
+                                   | used << 3
+                                   | spare << 6
+                                   | side << 9) << 2 * bits)
+        self.whose_turn = self.other_player(self.whose_turn)
+
+    def unmake_move(self) -> None:
+        """
+        Reverts the last move recorded on <self.onitama_stack> in place.
+
+        Precondition: <self.onitama_stack> is not empty.
+        """
+        record = self.onitama_stack.pop()
+        board = self._board
+        size = self.size
+        bits = self.square_bits
+        mask = (1 << bits) - 1
+        row_o, col_o = divmod(record & mask, size)
+        row_d, col_d = divmod(record >> bits & mask, size)
+        changes = record >> 2 * bits
+        used = changes >> 3 & 0x7
+        spare = changes >> 6 & 0x7
+        board.set_token(row_o, col_o, board.get_token(row_d, col_d))
+        board.set_token(row_d, col_d, self._CAPTURED[changes & 0x7])
+        if used != spare:
+            board.swap_style_owners(used, spare)
+        self.whose_turn = self.player2 if changes >> 9 & 0x1 else self.player1
             
     def get_winner(self) -> Union[Player, None]:
         """
@@ -246,27 +374,24 @@ class OnitamaGame:
         >>> game.get_winner().player_id
         'id1'
         """
-        if self.get_token(0, int(self.size/2)) == Pieces.G2:
+        # The board keeps the grandmaster squares up to date, so no scan is needed.
+        middle = self.size // 2
+        g1_squares = self._board.get_grandmasters(Pieces.G1)
+        g2_squares = self._board.get_grandmasters(Pieces.G2)
+        if middle in g2_squares:
             return self.player2
-        if self.get_token(self.size - 1, int(self.size/2)) == Pieces.G1:
+        if (self.size - 1) * self.size + middle in g1_squares:
             return self.player1
-        g1_exist = True
-        g2_exist = True
-        
-        non_nested_board = []
-        for value in self.get_board():
-            for valuein in value:
-                non_nested_board.append(valuein)
-        if Pieces.G1 not in non_nested_board:
+        if not g1_squares:
             return self.player2
-        if Pieces.G2 not in non_nested_board:
+        if not g2_squares:
             return self.player1
         return None
 
     def undo(self) -> None:
         """
-        DO NOT MODIFY THIS!!!
         Undo's the Onitama game's state to the previous turn's state if possible.
+        Only the last move's delta is reverted, see make_move.
         
         >>> player1 = Player('id1')
         >>> player2 = Player('id2')
@@ -303,13 +428,218 @@ class OnitamaGame:
         True
         """
         if not self.onitama_stack.empty():
-            # The pop call here returns a board and a list of styles that we use
-            # to revert to the previous state of the game
-            board, styles = self.onitama_stack.pop()
-            self._board.set_board(board)
-            self._board.styles = styles
-            # Switch to the previous player's turn
-            self.whose_turn = self.other_player(self.whose_turn)
+            self._record_changes(self.onitama_stack.peek())
+            self.unmake_move()
+            self._clear_legal_turns()
+
+    def _record_changes(self, record: int) -> None:
+        """
+        Adds the squares and styles changed by the move of the undo <record>
+        to the changes reported by get_changes.
+        """
+        bits = self.square_bits
+        mask = (1 << bits) - 1
+        self._changed_squares.add(record & mask)
+        self._changed_squares.add(record >> bits & mask)
+        used = record >> (2 * bits + 3) & 0x7
+        spare = record >> (2 * bits + 6) & 0x7
+        if used != spare:
+            self._changed_styles.add(used)
+            self._changed_styles.add(spare)
+
+    def get_changes(self) -> Tuple[Set[int], Set[int]]:
+        """
+        Returns the squares (row * size + col) and the indices in get_styles()
+        of the styles changed by move, undo, set_board and set_style_owners
+        since the game was created or get_changes was last called, and starts
+        collecting changes again. make_move and unmake_move are not tracked,
+        as search code always pairs them up.
+
+        >>> game = OnitamaGame(5)
+        >>> _ = game.get_changes()
+        >>> game.move(0, 2, 1, 2, 'crab')
+        True
+        >>> game.get_changes()
+        ({2, 7}, {0, 4})
+        >>> game.undo()
+        >>> game.get_changes()
+        ({2, 7}, {0, 4})
+        """
+        changes = (self._changed_squares, self._changed_styles)
+        self._changed_squares = set()
+        self._changed_styles = set()
+        return changes
+
+    def _clear_legal_turns(self) -> None:
+        """
+        Forgets the cached legal turns.
+        """
+        self._legal_key = None
+        self._legal_turns = {}
+        self._legal_origins = None
+        self._moves_key = None
+        self._legal_moves = array(Move.TYPECODE)
+
+    def get_legal_turns(self) -> Dict[str, List[Turn]]:
+        """
+        Returns the legal turns of the player to move, keyed by style name, as
+        Player.get_valid_turns does. They are generated once per position:
+        the cache is keyed by get_hash() and cleared by move, undo, set_board
+        and set_style_owners, so it also stays correct across make_move and
+        unmake_move. The dictionary and its lists are shared by every caller
+        until the position changes, so they must not be modified.
+
+        >>> game = OnitamaGame(5)
+        >>> game.get_legal_turns() is game.get_legal_turns()
+        True
+        >>> sorted(game.get_legal_turns())
+        ['crab', 'horse']
+        """
+        key = self.get_hash()
+        if key != self._legal_key:
+            player = self.whose_turn
+            self._legal_turns = MoveGenerator.get_valid_turns(self, player.player_id, player.get_styles())
+            self._legal_origins = None
+            self._legal_key = key
+        return self._legal_turns
+
+    def get_legal_moves(self) -> array:
+        """
+        Returns the legal turns of the player to move as an array of packed
+        moves (see Move), in the order of get_legal_turns. Like the turns they
+        are generated once per position, and the array is shared, so it must
+        not be modified.
+
+        >>> [hex(move) for move in OnitamaGame(5).get_legal_moves()[:2]]
+        ['0x500', '0x601']
+        """
+        key = self.get_hash()
+        if key != self._moves_key:
+            self._legal_moves = MoveGenerator.get_valid_moves(self, self.whose_turn.player_id)
+            self._moves_key = key
+        return self._legal_moves
+
+    def iter_legal_moves(self) -> Iterator[Tuple[int, int, int, int, str]]:
+        """
+        Yields the legal turns of the player to move, in the order of
+        get_legal_turns, as (row_o, col_o, row_d, col_d, style_name). They come
+        from the cache if get_legal_turns was already called in this position,
+        and are generated lazily otherwise, so stopping early skips the rest
+        of the work. The position must not change until the generator is exhausted.
+
+        >>> game = OnitamaGame(5)
+        >>> next(game.iter_legal_moves())
+        (0, 0, 1, 0, 'crab')
+        """
+        if self._legal_key == self.get_hash():
+            for style_turns in self._legal_turns.values():
+                for turn in style_turns:
+                    yield turn.row_o, turn.col_o, turn.row_d, turn.col_d, turn.style_name
+        else:
+            player = self.whose_turn
+            yield from MoveGenerator.iter_moves(self, player.player_id, player.get_styles())
+
+    def count_legal_turns(self) -> int:
+        """
+        Returns the number of legal turns of the player to move without
+        creating them, e.g. for mobility scores.
+
+        >>> OnitamaGame(5).count_legal_turns()
+        10
+        """
+        if self._legal_key == self.get_hash():
+            return sum(len(style_turns) for style_turns in self._legal_turns.values())
+        player = self.whose_turn
+        return MoveGenerator.count_valid_turns(self, player.player_id, player.get_styles())
+
+    def get_legal_turns_from(self, row: int, col: int, style_name: Union[str, None] = None) -> List[Turn]:
+        """
+        Returns the legal turns of the player to move of the piece at <row>,
+        <col>, only with the style <style_name> unless it is None. The list
+        is a new one.
+
+        >>> game = OnitamaGame(5)
+        >>> [(turn.row_d, turn.col_d) for turn in game.get_legal_turns_from(0, 2, 'crab')]
+        [(1, 2)]
+        >>> len(game.get_legal_turns_from(0, 2)), game.get_legal_turns_from(4, 2)
+        (2, [])
+        """
+        turns = self.get_legal_turns()
+        if self._legal_origins is None:
+            origins = {}
+            size = self.size
+            for style_turns in turns.values():
+                for turn in style_turns:
+                    origins.setdefault(turn.row_o * size + turn.col_o, []).append(turn)
+            self._legal_origins = origins
+        origin_turns = self._legal_origins.get(row * self.size + col, [])
+        if style_name is None:
+            return list(origin_turns)
+        return [turn for turn in origin_turns if turn.style_name == style_name]
+
+    def get_legal_turns_by_style(self, style_name: str) -> List[Turn]:
+        """
+        Returns the legal turns of the player to move with the style
+        <style_name>, or an empty list if the player does not own it. The list
+        is shared like those of get_legal_turns, so it must not be modified.
+
+        >>> game = OnitamaGame(5)
+        >>> len(game.get_legal_turns_by_style('horse')), game.get_legal_turns_by_style('mantis')
+        (5, [])
+        """
+        return self.get_legal_turns().get(style_name, [])
+
+    def get_squares(self, player_id: str) -> Set[int]:
+        """
+        Returns the set of squares (row * size + col) holding the pieces of the
+        player <player_id>, or an empty set if <player_id> is not a player token.
+        This is the board's own index, so it must not be modified.
+
+        >>> game = OnitamaGame(5)
+        >>> sorted(game.get_squares(Pieces.G1))
+        [0, 1, 2, 3, 4]
+        >>> game.get_squares('id1')
+        set()
+        """
+        side = Pieces.SIDES.get(player_id)
+        if side is None:
+            return set()
+        return self._board.get_squares(side)
+
+    def get_grandmasters(self, player_id: str) -> Set[int]:
+        """
+        Returns the set of squares (row * size + col) holding the grandmaster of
+        the player <player_id>, which is empty once it has been captured.
+        This is the board's own index, so it must not be modified.
+
+        >>> game = OnitamaGame(5)
+        >>> game.get_grandmasters(Pieces.G2)
+        {22}
+        """
+        side = Pieces.SIDES.get(player_id)
+        if side is None:
+            return set()
+        return self._board.get_grandmasters(side)
+
+    def get_hash(self) -> int:
+        """
+        Returns the Zobrist hash of the current position: the pieces, the owner
+        of every style and whose turn it is. It is updated incrementally by
+        every move and undo, so this is constant-time.
+
+        >>> game = OnitamaGame(5)
+        >>> start = game.get_hash()
+        >>> game.move(0, 2, 1, 2, 'crab')
+        True
+        >>> game.get_hash() == start
+        False
+        >>> game.undo()
+        >>> game.get_hash() == start
+        True
+        """
+        if self.whose_turn is self.player2:
+            return self._board.get_hash() ^ Zobrist.SIDE
+        return self._board.get_hash()
 
     def get_styles(self) -> List[Style]:
         """
@@ -318,6 +648,34 @@ class OnitamaGame:
         """
         return self._board.styles
 
+    def get_player_styles(self, player_id: str) -> List[Style]:
+        """
+        Returns the styles owned by the player <player_id>, in the order of
+        get_styles(), or an empty list if <player_id> is not a player token.
+        They are looked up in the board's owner assignment, not by scanning
+        the styles.
+
+        >>> OnitamaGame(5).get_player_styles(Pieces.G2)
+        [mantis, rooster]
+        """
+        return self._board.get_player_styles(player_id)
+
+    def get_style_indices(self, player_id: str) -> Tuple[int, ...]:
+        """
+        Returns the indices in get_styles() of the styles owned by the player
+        <player_id>, or an empty tuple if <player_id> is not a player token.
+        """
+        return self._board.get_style_indices(player_id)
+
+    def set_style_owners(self, owners: List[str]) -> None:
+        """
+        Sets the owner of each style of get_styles() to the owner at the same
+        index of <owners>, e.g. to restore a position saved elsewhere.
+        """
+        self._board.set_style_owners(owners)
+        self._changed_styles.update(range(len(owners)))
+        self._clear_legal_turns()
+
     def get_styles_deep_copy(self) -> List[Style]:
         """
         DO NOT MODIFY THIS!!!
@@ -335,12 +693,17 @@ class OnitamaGame:
 
     def set_board(self, size: int, board: List[List[str]]) -> None:
         """
-        DO NOT MODIFY THIS!!!
         Construct a new OnitamaBoard with the given size and preset board.
+        The undo history belongs to the previous board, so it is cleared.
         """
         self.size = size
-        self._board = OnitamaBoard(
+        self.square_bits = Move.get_square_bits(size)
+        self.onitama_stack = OnitamaStack()
+        self._board = self.board_class(
             self.size, self.player1, self.player2, board=board)
+        self._changed_squares.update(range(size * size))
+        self._changed_styles.update(range(len(self._board.styles)))
+        self._clear_legal_turns()
 
     def get_board_string(self) -> str:
         """
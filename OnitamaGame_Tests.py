@@ -1,7 +1,16 @@
 from typing import List
 from OnitamaGame import OnitamaGame
+from BitboardBoard import BitboardBoard
+from OnitamaBoard import OnitamaBoard
+from GameState import GameState
+from Move import Move
+from MoveGenerator import MoveGenerator
 from Player import Player, PlayerRandom
 from Pieces import Pieces
+from random import Random
+import os
+import subprocess
+import sys
 
 def test_other_player() -> None:
     """ 
@@ -246,6 +255,237 @@ def test_undo_initial_state() -> None:
     assert board == game.get_board()
     assert styles == game.get_styles()
 
+def test_bitboard_game() -> None:
+    """
+    This test checks if a game played on a 'BitboardBoard' behaves like one
+    played on the default board, including the winner and undo.
+    """
+    player1 = PlayerRandom('id1')
+    player2 = PlayerRandom('id2')
+    game = OnitamaGame(5, player1, player2, board_class=BitboardBoard)
+    assert isinstance(game._board, BitboardBoard)
+    assert game.move(0, 2, 1, 2, 'crab')
+    assert game.move(4, 2, 1, 2, 'mantis')
+    assert game.get_winner() == player2
+    game.undo()
+    assert game.get_winner() is None
+    assert game.get_token(4, 2) == Pieces.G2
+
+    game.set_board(7, OnitamaGame(7).get_board())
+    assert isinstance(game._board, BitboardBoard)
+    assert game.get_token(0, 3) == Pieces.G1
+
+def test_undo_restores_every_position() -> None:
+    """
+    This test plays random games on both board classes and checks that undoing
+    every move restores the exact board, styles, turn and hash of each earlier
+    position, and that each move only grows the undo stack by one record.
+    """
+    for size, board_class in ((5, OnitamaBoard), (7, BitboardBoard), (9, OnitamaBoard)):
+        rng = Random(size)
+        game = OnitamaGame(size, PlayerRandom(Pieces.G1), PlayerRandom(Pieces.G2), board_class=board_class)
+        history = []
+        while game.get_winner() is None and len(history) < 80:
+            turns = [turn for style_turns in game.get_legal_turns().values() for turn in style_turns]
+            if not turns:
+                break
+            turn = rng.choice(turns)
+            history.append((game.get_board(), game.get_styles_deep_copy(), game.whose_turn, game.get_hash()))
+            game.move(turn.row_o, turn.col_o, turn.row_d, turn.col_d, turn.style_name)
+            assert len(game.onitama_stack) == len(history)
+        while history:
+            board, styles, whose_turn, key = history.pop()
+            game.undo()
+            assert game.get_hash() == key
+            assert game.get_board() == board
+            assert [(sty.name, sty.owner) for sty in game.get_styles()] == \
+                [(sty.name, sty.owner) for sty in styles]
+            assert game.whose_turn is whose_turn
+        assert game.onitama_stack.empty()
+
+def test_undo_on_large_board() -> None:
+    """
+    This test plays moves on a 17x17 board, whose square indices do not fit in
+    8 bits, on both board classes and checks that undo restores every board.
+    """
+    for board_class in (OnitamaBoard, BitboardBoard):
+        rng = Random(17)
+        game = OnitamaGame(17, PlayerRandom(Pieces.G1), PlayerRandom(Pieces.G2), board_class=board_class)
+        assert game.square_bits == 9
+        boards = []
+        while game.get_winner() is None and len(boards) < 20:
+            turns = [turn for style_turns in game.get_legal_turns().values() for turn in style_turns]
+            if not turns:
+                break
+            turn = rng.choice(turns)
+            boards.append(game.get_board())
+            game.move(turn.row_o, turn.col_o, turn.row_d, turn.col_d, turn.style_name)
+        while boards:
+            game.undo()
+            assert game.get_board() == boards.pop()
+        assert game.onitama_stack.empty()
+
+def test_packed_moves_on_large_board() -> None:
+    """
+    This test checks that on a 17x17 board the packed legal moves decode to
+    the legal turns, that the packed move a search returns is made on the
+    right squares, and that boards whose moves do not fit are refused.
+    """
+    game = OnitamaGame(17, PlayerRandom(Pieces.G1), PlayerRandom(Pieces.G2))
+    for _ in range(6):
+        player = game.whose_turn
+        turns = MoveGenerator.get_valid_turns(game, player.player_id, player.get_styles())
+        keys = [(turn.row_o, turn.col_o, turn.row_d, turn.col_d, turn.style_name)
+                for style_turns in turns.values() for turn in style_turns]
+        moves = MoveGenerator.get_valid_moves(game, player.player_id)
+        decoded = [Move.to_turn(game, move) for move in moves]
+        assert [(turn.row_o, turn.col_o, turn.row_d, turn.col_d, turn.style_name) for turn in decoded] == keys
+        assert list(moves) == [Move.from_turn(game, turn) for style_turns in turns.values() for turn in style_turns]
+        board = game.get_board()
+        game.make_packed_move(moves[-1])
+        row_o, col_o, row_d, col_d, _ = keys[-1]
+        assert game.get_token(row_d, col_d) == board[row_o][col_o]
+    try:
+        OnitamaGame(65)
+    except ValueError:
+        pass
+    else:
+        assert False, 'a 65x65 board was accepted'
+
+def test_hash_transposition() -> None:
+    """
+    This test checks if 'get_hash' gives the same value for a position reached
+    by two different move orders, and a different value when only the side to
+    move differs.
+    """
+    game1 = OnitamaGame(5, PlayerRandom(Pieces.G1), PlayerRandom(Pieces.G2))
+    assert game1.move(0, 0, 1, 0, 'crab')
+    assert game1.move(4, 0, 3, 0, 'rooster')
+    assert game1.move(0, 4, 1, 4, 'dragon')
+
+    game2 = OnitamaGame(5, PlayerRandom(Pieces.G1), PlayerRandom(Pieces.G2))
+    assert game2.move(0, 4, 1, 4, 'crab')
+    assert game2.move(4, 0, 3, 0, 'rooster')
+    assert game2.move(0, 0, 1, 0, 'dragon')
+
+    assert game1.get_board() == game2.get_board()
+    assert game1.get_hash() == game2.get_hash()
+    game2.whose_turn = game2.player1
+    assert game1.get_hash() != game2.get_hash()
+
+def test_game_state_round_trip() -> None:
+    """
+    This test plays random games and checks that the 'GameState' of every
+    position rebuilds the same position, survives 'to_bytes', and is equal
+    exactly when the hashes of the positions are equal.
+    """
+    states = {}
+    for size, board_class in ((5, OnitamaBoard), (7, BitboardBoard)):
+        rng = Random(size)
+        game = OnitamaGame(size, PlayerRandom(Pieces.G1), PlayerRandom(Pieces.G2), board_class=board_class)
+        for _ in range(60):
+            state = GameState.from_game(game)
+            copy = state.to_game(board_class=board_class)
+            assert copy.get_board() == game.get_board()
+            assert copy.get_styles_deep_copy() == game.get_styles_deep_copy()
+            assert copy.get_hash() == game.get_hash()
+            assert GameState.from_bytes(state.to_bytes()) == state
+            assert states.setdefault(game.get_hash(), state) == state
+            turns = [turn for style_turns in game.whose_turn.get_valid_turns().values() for turn in style_turns]
+            if not turns or game.get_winner() is not None:
+                break
+            turn = rng.choice(turns)
+            assert game.move(turn.row_o, turn.col_o, turn.row_d, turn.col_d, turn.style_name)
+    assert len(set(states.values())) == len(states)
+
+def test_game_state_limits() -> None:
+    """
+    This test checks that a 'GameState' round-trips the largest board it holds
+    and refuses larger boards and games with another number of styles.
+    """
+    game = OnitamaGame(GameState.MAX_SIZE)
+    state = GameState.from_game(game)
+    assert state.size == GameState.MAX_SIZE
+    assert state.to_game().get_board() == game.get_board()
+    extra_style = OnitamaGame(5)
+    extra_style.get_styles().append(extra_style.get_styles()[0])
+    for game in (OnitamaGame(GameState.MAX_SIZE + 2), extra_style):
+        try:
+            GameState.from_game(game)
+        except ValueError:
+            pass
+        else:
+            assert False, 'a position which does not fit was packed'
+
+def test_legal_turn_cache() -> None:
+    """
+    This test plays random games with moves, undos and search-style
+    'make_move'/'unmake_move' pairs, and checks that the cached legal turns,
+    the packed legal moves and the queries by origin and by style always
+    match freshly generated turns.
+    """
+    def keys(turns):
+        return [(turn.row_o, turn.col_o, turn.row_d, turn.col_d, turn.style_name) for turn in turns]
+
+    rng = Random(19)
+    game = OnitamaGame(5, PlayerRandom(Pieces.G1), PlayerRandom(Pieces.G2))
+    for _ in range(120):
+        player = game.whose_turn
+        fresh = MoveGenerator.get_valid_turns(game, player.player_id, player.get_styles())
+        cached = game.get_legal_turns()
+        assert game.get_legal_turns() is cached
+        assert {name: keys(turns) for name, turns in cached.items()} == \
+            {name: keys(turns) for name, turns in fresh.items()}
+        for style_name, style_turns in fresh.items():
+            assert keys(game.get_legal_turns_by_style(style_name)) == keys(style_turns)
+        moves = game.get_legal_moves()
+        assert list(moves) == [Move.from_turn(game, turn) for style_turns in fresh.values() for turn in style_turns]
+        assert [keys([Move.to_turn(game, move)])[0] for move in moves] == \
+            [key for style_turns in fresh.values() for key in keys(style_turns)]
+        for row, col in player.get_tokens():
+            assert keys(game.get_legal_turns_from(row, col)) == [
+                key for style_turns in fresh.values() for key in keys(style_turns) if key[:2] == (row, col)]
+        turns = [turn for style_turns in cached.values() for turn in style_turns]
+        if not turns or game.get_winner() is not None:
+            game = OnitamaGame(5, PlayerRandom(Pieces.G1), PlayerRandom(Pieces.G2))
+            continue
+        turn = rng.choice(turns)
+        action = rng.random()
+        if action < 0.2:
+            game.make_move(turn.row_o, turn.col_o, turn.row_d, turn.col_d, turn.style_name)
+            assert game.get_legal_turns() is not cached
+            game.unmake_move()
+        elif action < 0.3:
+            game.undo()
+        else:
+            assert game.move(turn.row_o, turn.col_o, turn.row_d, turn.col_d, turn.style_name)
+
+# Seconds a fresh interpreter may spend importing the rules engine, in the
+# fastest of IMPORT_RUNS imports.
+IMPORT_BUDGET = 1.0
+IMPORT_RUNS = 3
+
+def test_headless_import() -> None:
+    """
+    This test imports the rules engine in fresh interpreters and checks that
+    pygame is never loaded and that the fastest import stays within
+    IMPORT_BUDGET.
+    """
+    code = ('import sys, time\n'
+            'start = time.perf_counter()\n'
+            'import OnitamaGame, OnitamaBoard, BitboardBoard, MoveGenerator, Player\n'
+            'print(time.perf_counter() - start, "pygame" in sys.modules)\n')
+    times = []
+    for _ in range(IMPORT_RUNS):
+        result = subprocess.run([sys.executable, '-c', code], capture_output = True,
+                                text = True, check = True,
+                                cwd = os.path.dirname(os.path.abspath(__file__)))
+        seconds, pygame_loaded = result.stdout.split()
+        assert pygame_loaded == 'False'
+        times.append(float(seconds))
+    print(f'Rules engine import time: {min(times) * 1000:.1f} ms')
+    assert min(times) < IMPORT_BUDGET
+
 if __name__ == '__main__':
     import pytest
     pytest.main(['OnitamaGame_Tests.py'])
\ No newline at end of file
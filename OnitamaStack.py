@@ -1,34 +1,46 @@
-from typing import List, Tuple
+from array import array
+
 
 class OnitamaStack:
     """
-    A stack representing Onitama Game Boards.
+    A stack of Onitama undo records. Each record is one move packed into a
+    single integer by OnitamaGame, so the stack grows by eight bytes per move
+    whatever the size of the board.
     """
-    _items: List
+    _items: array
 
     def __init__(self) -> None:
         """
         Initializes the stack.
         """
-        self._items = []
+        self._items = array('q')
 
-    def pop(self) -> Tuple:
+    def pop(self) -> int:
         """
         Pop an item from the stack.
         """
-        styles = self._items.pop()
-        board = self._items.pop()
-        return (board, styles)
+        return self._items.pop()
+
+    def peek(self) -> int:
+        """
+        Returns the item on top of the stack without removing it.
+        """
+        return self._items[-1]
 
-    def push(self, board: any, styles: any) -> None:
+    def push(self, record: int) -> None:
         """
         Push an item to the stack.
         """
-        self._items.append(board)
-        self._items.append(styles)
-    
+        self._items.append(record)
+
     def empty(self) -> bool:
         """
         Check if stack is empty.
         """
-        return self._items == []
\ No newline at end of file
+        return len(self._items) == 0
+
+    def __len__(self) -> int:
+        """
+        Returns the number of records on the stack.
+        """
+        return len(self._items)
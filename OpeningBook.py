@@ -0,0 +1,216 @@
+from __future__ import annotations
+import argparse
+import json
+import mmap
+import struct
+import sys
+from typing import Dict, Iterable, List, Tuple, Union
+from Move import Move
+from OnitamaGame import OnitamaGame
+from Pieces import Pieces
+from Turn import Turn
+
+
+class OpeningBook:
+    """
+    A read-only opening book: for the early positions of many games, how often
+    each turn was played and how often the player who played it went on to
+    win, with one turn per position marked as recommended.
+
+    The file is a header followed by fixed-width records sorted by position
+    and move, so a position is found by binary search on the memory-mapped
+    file without reading the book into memory. A record is
+        key : the Zobrist hash of the position (OnitamaGame.get_hash), which
+              covers the pieces, the style owners and the side to move,
+        move : the packed move (see Move); bit 31 marks the recommended move,
+        games : the number of games in which the move was played there,
+        wins : how many of those the player who moved won.
+
+    === Attributes ===
+    RECOMMENDED : The bit of a record's move which marks the recommended move.
+    path : Path of the book file.
+    size : Size of the board of the book's games.
+    count : Number of records.
+
+    === Private Attributes ===
+    _file : The open file.
+    _map : The memory map of the file.
+    """
+    RECOMMENDED: int = 1 << 31
+    _MAGIC = b'ONIBOOK1'
+    _HEADER = struct.Struct('<8sII')
+    _RECORD = struct.Struct('<QIII')
+    path: str
+    size: int
+    count: int
+
+    def __init__(self, path: str) -> None:
+        """
+        Opens the book file at <path>.
+        """
+        self.path = path
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.size, self.count = self._HEADER.unpack_from(self._map, 0)
+        if magic != self._MAGIC:
+            self.close()
+            raise ValueError(f'{path} is not an opening book')
+
+    def close(self) -> None:
+        """
+        Closes the book file.
+        """
+        self._map.close()
+        self._file.close()
+
+    @staticmethod
+    def encode_turn(game: OnitamaGame, turn: Turn) -> int:
+        """
+        Returns the move of a book record for playing <turn> in <game>.
+
+        >>> game = OnitamaGame(5)
+        >>> hex(OpeningBook.encode_turn(game, Turn(0, 2, 1, 2, 'crab', Pieces.G1)))
+        '0x702'
+        """
+        return Move.from_turn(game, turn)
+
+    @staticmethod
+    def decode_turn(game: OnitamaGame, move: int) -> Turn:
+        """
+        Returns the turn of the player to move in <game> for the record <move>.
+        """
+        return Move.to_turn(game, move)
+
+    @classmethod
+    def build(cls, path: str, games: Iterable[Tuple[List, Union[str, None]]], size: int = 5,
+              plies: int = 10, min_games: int = 2) -> int:
+        """
+        Writes a book of the first <plies> plies of <games> to <path> and
+        returns its number of records. Each game is a list of turns, given as
+        packed moves (see Move) or, as in older record files,
+        [row_o, col_o, row_d, col_d, style_name], played from the start position
+        of a board of <size>, and the token of its winner or None for a draw.
+
+        In every position the recommended move is the one with the best win
+        rate, counting a draw as half a win, among the moves played in at
+        least <min_games> games, or the most played move if there is none.
+        """
+        stats: Dict[Tuple[int, int], List[int]] = {}
+        for turns, winner in games:
+            game = OnitamaGame(size)
+            for played_turn in turns[:plies]:
+                if game.get_winner() is not None:
+                    break
+                mover = game.whose_turn.player_id
+                key = game.get_hash()
+                if isinstance(played_turn, int):
+                    turn = Move.to_turn(game, played_turn)
+                else:
+                    turn = Turn(*played_turn, mover)
+                move = cls.encode_turn(game, turn)
+                if not game.move(turn.row_o, turn.col_o, turn.row_d, turn.col_d, turn.style_name):
+                    raise ValueError(f'Illegal turn in game: {played_turn}')
+                entry = stats.setdefault((key, move), [0, 0, 0])
+                entry[0] += 1
+                if winner == mover:
+                    entry[1] += 1
+                elif winner is None:
+                    entry[2] += 1
+        best: Dict[int, Tuple] = {}
+        for (key, move), (played, wins, draws) in stats.items():
+            rank = (played >= min_games, (wins + draws / 2) / played if played >= min_games else played, played)
+            if key not in best or rank > best[key][0]:
+                best[key] = (rank, move)
+        with open(path, 'wb') as file:
+            file.write(cls._HEADER.pack(cls._MAGIC, size, len(stats)))
+            for key, move in sorted(stats):
+                played, wins, _ = stats[(key, move)]
+                flag = cls.RECOMMENDED if best[key][1] == move else 0
+                file.write(cls._RECORD.pack(key, move | flag, played, wins))
+        return len(stats)
+
+    def _find(self, key: int) -> int:
+        """
+        Returns the index of the first record whose key is not less than <key>.
+        """
+        low, high = 0, self.count
+        offset, record = self._HEADER.size, self._RECORD.size
+        while low < high:
+            middle = (low + high) // 2
+            if struct.unpack_from('<Q', self._map, offset + middle * record)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def probe(self, game: OnitamaGame) -> List[Tuple[Turn, int, int, bool]]:
+        """
+        Returns (turn, games, wins, recommended) for every book move of the
+        current position of <game>, or an empty list if the position is not
+        in the book.
+        """
+        if game.size != self.size:
+            return []
+        key = game.get_hash()
+        moves = []
+        index = self._find(key)
+        while index < self.count:
+            stored, move, played, wins = self._RECORD.unpack_from(
+                self._map, self._HEADER.size + index * self._RECORD.size)
+            if stored != key:
+                break
+            moves.append((self.decode_turn(game, move & ~self.RECOMMENDED), played, wins,
+                          bool(move & self.RECOMMENDED)))
+            index += 1
+        return moves
+
+    def get_turn(self, game: OnitamaGame) -> Union[Turn, None]:
+        """
+        Returns the recommended turn of the current position of <game>, or None
+        if the position is not in the book or the turn is not legal there: the
+        player to move must own its style, and the style must allow its move.
+        """
+        for turn, _, _, recommended in self.probe(game):
+            if recommended:
+                if any((legal.row_o, legal.col_o, legal.row_d, legal.col_d)
+                       == (turn.row_o, turn.col_o, turn.row_d, turn.col_d)
+                       for legal in game.get_legal_turns_by_style(turn.style_name)):
+                    return turn
+                return None
+        return None
+
+    @staticmethod
+    def read_results(lines: Iterable[str]) -> Iterable[Tuple[List, Union[str, None]]]:
+        """
+        Yields the (turns, winner) of every game in Simulator results written
+        with record=True.
+        """
+        for line in lines:
+            if line.strip():
+                result = json.loads(line)
+                yield result['moves'], result['winner']
+
+
+def main(argv: Union[List[str], None] = None) -> None:
+    """
+    Builds a book from Simulator results from the command line.
+    """
+    parser = argparse.ArgumentParser(description='Build an Onitama opening book from recorded games.')
+    parser.add_argument('results', nargs='+', help='JSON lines files written by Simulator --record')
+    parser.add_argument('-o', '--output', default='book.bin', help='book file to write')
+    parser.add_argument('--size', type=int, default=5, help='size of the board')
+    parser.add_argument('--plies', type=int, default=10, help='plies of each game to keep')
+    parser.add_argument('--min-games', type=int, default=2, help='games a move needs to be recommended by win rate')
+    args = parser.parse_args(argv)
+
+    def games():
+        for name in args.results:
+            with open(name) as file:
+                yield from OpeningBook.read_results(file)
+
+    count = OpeningBook.build(args.output, games(), args.size, args.plies, args.min_games)
+    print(f'{count} records written to {args.output}')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
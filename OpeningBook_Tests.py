@@ -0,0 +1,87 @@
+from Move import Move
+from OnitamaGame import OnitamaGame
+from OpeningBook import OpeningBook
+from Pieces import Pieces
+from PlayerAlphaBeta import PlayerAlphaBeta
+from Simulator import Simulator
+from Turn import Turn
+
+
+def test_book_round_trip(tmp_path) -> None:
+    """
+    This test builds a book from recorded self-play games and checks that
+    every book position reached by replaying a game lists the turn played
+    there with the right counts, that the recommended turn is legal, and that
+    a search player answers from the book without searching.
+    """
+    results = [Simulator(seed=4, record=True).play_game(index) for index in range(40)]
+    path = str(tmp_path / 'book.bin')
+    games = [(result['moves'], result['winner']) for result in results]
+    count = OpeningBook.build(path, games, plies=4, min_games=1)
+    book = OpeningBook(path)
+    try:
+        assert book.count == count and book.size == 5
+        first_moves = {}
+        for moves, winner in games:
+            first = Move.to_turn(OnitamaGame(5), moves[0])
+            key = (first.row_o, first.col_o, first.row_d, first.col_d, first.style_name)
+            played, wins = first_moves.get(key, (0, 0))
+            first_moves[key] = (played + 1, wins + (winner == Pieces.G1))
+        entries = book.probe(OnitamaGame(5))
+        assert {(turn.row_o, turn.col_o, turn.row_d, turn.col_d, turn.style_name): (played, wins)
+                for turn, played, wins, _ in entries} == first_moves
+        assert sum(recommended for _, _, _, recommended in entries) == 1
+        for moves, _ in games:
+            game = OnitamaGame(5)
+            for move in moves[:4]:
+                if game.get_winner() is not None:
+                    break
+                turn = book.get_turn(game)
+                assert turn is not None
+                assert game.is_legal_move(turn.row_o, turn.col_o, turn.row_d, turn.col_d)
+                assert move in [Move.from_turn(game, t) for t, _, _, _ in book.probe(game)]
+                played = Move.to_turn(game, move)
+                assert game.move(played.row_o, played.col_o, played.row_d, played.col_d, played.style_name)
+        player = PlayerAlphaBeta(Pieces.G1, time_limit=None, max_depth=3, book=book)
+        game = OnitamaGame(5, player, None)
+        turn = player.get_turn()
+        assert player.nodes == 0
+        assert (turn.row_o, turn.col_o, turn.row_d, turn.col_d, turn.style_name) in first_moves
+        assert book.probe(OnitamaGame(7)) == []
+    finally:
+        book.close()
+
+
+class _OpponentStyleBook(OpeningBook):
+    """
+    A book whose moves are read back with a style of the player not to move.
+    """
+    @staticmethod
+    def decode_turn(game: OnitamaGame, move: int) -> Turn:
+        turn = OpeningBook.decode_turn(game, move)
+        opponent = game.other_player(game.whose_turn).player_id
+        return Turn(turn.row_o, turn.col_o, turn.row_d, turn.col_d,
+                    game.get_player_styles(opponent)[0].name, turn.player)
+
+
+def test_book_turn_checked_with_style(tmp_path) -> None:
+    """
+    This test checks that a book turn whose squares are legal, but whose style
+    the player to move does not own, is not played.
+    """
+    results = [Simulator(seed=4, record=True).play_game(index) for index in range(4)]
+    path = str(tmp_path / 'book.bin')
+    OpeningBook.build(path, [(result['moves'], result['winner']) for result in results], plies=1, min_games=1)
+    book = _OpponentStyleBook(path)
+    try:
+        game = OnitamaGame(5)
+        turn = [turn for turn, _, _, recommended in book.probe(game) if recommended][0]
+        assert game.is_legal_move(turn.row_o, turn.col_o, turn.row_d, turn.col_d)
+        assert book.get_turn(game) is None
+    finally:
+        book.close()
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main(['OpeningBook_Tests.py'])
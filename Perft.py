@@ -0,0 +1,142 @@
+from __future__ import annotations
+import argparse
+import sys
+from time import perf_counter
+from typing import Dict, List, Tuple, Type, Union
+from BitboardBoard import BitboardBoard
+from OnitamaBoard import OnitamaBoard
+from OnitamaGame import OnitamaGame
+from Player import Player
+from Pieces import Pieces
+
+
+class Perft:
+    """
+    A class which counts the leaf nodes of the game tree of an Onitama position
+    to a fixed depth, using Player.get_valid_turns, OnitamaGame.move and
+    OnitamaGame.undo. The counts measure the speed of move generation and,
+    because they must not depend on how the board is stored, check a board
+    class against the reference OnitamaBoard.
+
+    A position where the game is over has no legal turns, so it only counts
+    as a leaf at the exact depth it is reached.
+
+    === Attributes ===
+    BOARD_CLASSES : The board classes that can be selected by name.
+    """
+    BOARD_CLASSES: Dict[str, Type[OnitamaBoard]] = {'list': OnitamaBoard, 'bitboard': BitboardBoard}
+
+    @staticmethod
+    def perft(game: OnitamaGame, depth: int) -> int:
+        """
+        Returns the number of positions <depth> plies below the current
+        position of <game>. The game is left as it was found.
+
+        >>> Perft.perft(OnitamaGame(5), 1)
+        10
+        >>> Perft.perft(OnitamaGame(5), 3)
+        1476
+        """
+        if depth == 0:
+            return 1
+        if game.get_winner() is not None:
+            return 0
+        turns = game.whose_turn.get_valid_turns()
+        if depth == 1:
+            return sum(len(style_turns) for style_turns in turns.values())
+        nodes = 0
+        for style_turns in turns.values():
+            for turn in style_turns:
+                game.move(turn.row_o, turn.col_o, turn.row_d, turn.col_d, turn.style_name)
+                nodes += Perft.perft(game, depth - 1)
+                game.undo()
+        return nodes
+
+    @staticmethod
+    def divide(game: OnitamaGame, depth: int) -> List[Tuple[str, int]]:
+        """
+        Returns, for every legal turn of the current position, a description of
+        the turn and the number of positions <depth> - 1 plies below it.
+
+        >>> Perft.divide(OnitamaGame(5), 2)[0]
+        ('crab (0, 0) -> (1, 0)', 12)
+        """
+        counts = []
+        if game.get_winner() is not None:
+            return counts
+        for style_turns in game.whose_turn.get_valid_turns().values():
+            for turn in style_turns:
+                game.move(turn.row_o, turn.col_o, turn.row_d, turn.col_d, turn.style_name)
+                counts.append((f'{turn.style_name} ({turn.row_o}, {turn.col_o}) -> ({turn.row_d}, {turn.col_d})',
+                               Perft.perft(game, depth - 1)))
+                game.undo()
+        return counts
+
+    @staticmethod
+    def make_game(size: int = 5, board_class: Type[OnitamaBoard] = OnitamaBoard, board: Union[str, None] = None,
+                  styles: Union[str, None] = None, turn: str = Pieces.G1) -> OnitamaGame:
+        """
+        Returns a game of the given <size> stored in <board_class>. The start
+        position can be replaced by <board>, rows separated by '/' with '.'
+        for an empty square, and the style owners by <styles>, e.g.
+        'crab=X,horse=X,mantis=Y,rooster=Y,dragon=.'. <turn> is the token of
+        the player to move.
+
+        >>> game = Perft.make_game(5, board='..X../...../...../..y../..Y..', turn=Pieces.G2)
+        >>> game.get_token(3, 2), game.whose_turn is game.player2
+        ('y', True)
+        """
+        game = OnitamaGame(size, Player(Pieces.G1), Player(Pieces.G2), board_class=board_class)
+        if board is not None:
+            rows = [[Pieces.EMPTY if token == '.' else token for token in row] for row in board.split('/')]
+            game.set_board(len(rows), rows)
+        if styles is not None:
+            owners = {}
+            for pair in styles.split(','):
+                name, _, owner = pair.partition('=')
+                owners[name.strip()] = Pieces.EMPTY if owner.strip() in ('', '.') else owner.strip()
+            game.set_style_owners([owners.get(sty.name, sty.owner) for sty in game.get_styles()])
+        game.whose_turn = game.player2 if turn == Pieces.G2 else game.player1
+        return game
+
+
+def main(argv: Union[List[str], None] = None) -> int:
+    """
+    Runs perft from the command line. Returns 1 if --compare finds a board
+    class whose counts differ from the reference, 0 otherwise.
+    """
+    parser = argparse.ArgumentParser(description='Count the leaf nodes of the Onitama game tree.')
+    parser.add_argument('-d', '--depth', type=int, default=4, help='depth to count to')
+    parser.add_argument('--size', type=int, default=5, help='size of the board')
+    parser.add_argument('--board', default=None, help="rows separated by '/', '.' for empty (default: start position)")
+    parser.add_argument('--styles', default=None, help="style owners, e.g. 'crab=X,horse=X,mantis=Y,rooster=Y,dragon=.'")
+    parser.add_argument('--turn', default=Pieces.G1, choices=[Pieces.G1, Pieces.G2], help='player to move')
+    parser.add_argument('--board-class', default='list', choices=sorted(Perft.BOARD_CLASSES),
+                        help='how the board is stored')
+    parser.add_argument('--divide', action='store_true', help='print the count below every root turn')
+    parser.add_argument('--compare', action='store_true',
+                        help='also count with every other board class and check the counts match')
+    args = parser.parse_args(argv)
+
+    names = [args.board_class]
+    if args.compare:
+        names += [name for name in sorted(Perft.BOARD_CLASSES) if name != args.board_class]
+    counts = {}
+    for name in names:
+        game = Perft.make_game(args.size, Perft.BOARD_CLASSES[name], args.board, args.styles, args.turn)
+        if args.divide and name == args.board_class:
+            for description, nodes in Perft.divide(game, args.depth):
+                print(f'{description}: {nodes}')
+        start = perf_counter()
+        counts[name] = Perft.perft(game, args.depth)
+        seconds = perf_counter() - start
+        print(f'{name}: depth {args.depth}, {counts[name]} nodes in {seconds:.3f} s '
+              f'({counts[name] / seconds if seconds else 0:.0f} nodes/s)')
+    if len(set(counts.values())) > 1:
+        print('MISMATCH: node counts differ between board classes')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
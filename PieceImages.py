@@ -0,0 +1,69 @@
+import pygame
+from typing import Tuple, Union
+
+from AssetManager import AssetManager
+from ImageGenerator import ImageGenerator
+from Pieces import Pieces
+
+
+class PieceImages(ImageGenerator):
+    """
+    A class which returns images to represent each piece and empty square.
+
+    === Private Attributes ===
+    _BLACK: DON'T WORRY ABOUT IT! (ITALIAN ACCENT)
+    _WHITE: DON'T WORRY ABOUT IT! (ITALIAN ACCENT)
+
+    """
+    _BLACK: str = 'black'
+    _WHITE: str = 'white'
+    FILES = {
+        _BLACK:  'black',
+        _WHITE:  'white',
+        Pieces.M1: 'b_monk',
+        Pieces.M2: 'w_monk',
+        Pieces.G1: 'michael_gm',
+        Pieces.G2: 'ilir_gm'
+    }
+
+    def __init__(self, pygame: pygame, width: int, height: int,
+                 assets: Union[AssetManager, None] = None) -> None:
+        """
+        Initialize all of the pygame images based on the images in the assets folder.
+        """
+        super().__init__(pygame, assets, (width, height))
+        self.add_images(self.FILES)
+
+    def get_image(self, piece: str, i: int = -1, j: int = -1) -> pygame.Surface:
+        """
+        Returns the pygame image based on the piece and coordinate of the piece.
+        """
+        if piece == Pieces.EMPTY:
+            # Black
+            if i % 2 == j % 2:
+                piece = self._BLACK
+            else:
+                piece = self._WHITE
+        return self.images.get(piece, self.images[self._WHITE]).copy()
+
+    def get_tile_sprite(self, piece: str, i: int, j: int,
+                        tints: Tuple[Tuple[int, int, int, int], ...] = ()) -> pygame.Surface:
+        """
+        Returns the whole tile at the coordinate: the square with the piece on
+        top, where the piece (or the empty square) is multiplied by each colour
+        of <tints>. Each combination is built once and the same surface is
+        returned afterwards, so it must not be modified.
+        """
+        square = self._BLACK if i % 2 == j % 2 else self._WHITE
+        if piece == Pieces.EMPTY:
+            return self.get_sprite(square, tints)
+        sprite_key = ('tile', piece, square, tints)
+        sprite = self.sprites.get(sprite_key)
+        if sprite is None:
+            sprite = self.images[square].copy()
+            img = self.get_sprite(piece, tints)
+            # Draw the token image on top of the background
+            img.set_colorkey((0, 0, 0))
+            sprite.blit(img, (0, 0))
+            self.sprites[sprite_key] = sprite
+        return sprite
@@ -1,9 +1,10 @@
 from __future__ import annotations
 from Pieces import Pieces
 from Style import Style
-from typing import Dict, List, Tuple, Union
+from typing import Dict, Iterator, List, Tuple, Union
 from Turn import Turn
-from random import randint
+from MoveGenerator import MoveGenerator
+import random
 
 
 class Player:
@@ -29,49 +30,87 @@ class Player:
     def get_tokens(self) -> List[Tuple]:
         """
         This method returns a list of tuples in the form of (row, col) of the
-        positions of all the pieces of the specified player.
+        positions of all the pieces of the specified player, in row-major order.
         """
-        board = self.onitama.get_board()
-        tokens = []
-        for i, row in enumerate(board):
-            for j, token in enumerate(row):
-                if token.lower() == self.player_id.lower():
-                    tokens.append((i, j))
-        return tokens
+        size = self.onitama.size
+        return [divmod(square, size) for square in sorted(self.onitama.get_squares(self.player_id))]
 
     def get_styles(self) -> List[Style]:
         """
         This method returns a list of styles for the player 'self'.
         """
-        styles = []
-        for sty in self.onitama.get_styles():
-            if sty.owner == self.player_id:
-                styles.append(sty)
-        return styles
+        return self.onitama.get_player_styles(self.player_id)
 
     def get_valid_turns(self) -> Dict:
         """
         This method returns a dictionary of all the legal movements that can be
         made by a player in his turn according to the style cards they currently
-        have.
-        """
-        styles = self.get_styles()
-        tokens = self.get_tokens()
-        turns = {}
-        for sty in styles:
-            turns[sty.name] = []
-            for row, col in tokens:
-                for d_row, d_col in sty.get_moves():
-                    # Flip move direction if player is X
-                    if self.player_id == Pieces.G1:
-                        d_row *= -1
-                        d_col *= -1
-                    # Check is_legal_move
-                    if self.onitama.is_legal_move(row, col, row + d_row, col + d_col):
-                        turns[sty.name].append(Turn(row, col, row + d_row,
-                                                    col + d_col, sty.name, self.player_id))
-
-        return turns
+        have. The turns come from the precomputed tables of MoveGenerator and,
+        on the player's turn, from the game's cache (see
+        OnitamaGame.get_legal_turns), so they must not be modified.
+        """
+        if self.onitama.whose_turn is self:
+            return self.onitama.get_legal_turns()
+        return MoveGenerator.get_valid_turns(self.onitama, self.player_id, self.get_styles())
+
+    def iter_valid_turns(self) -> Iterator[Turn]:
+        """
+        This method yields the turns of get_valid_turns one at a time, in the
+        same order, without building the dictionary, so a caller that stops
+        early never generates the rest. The game must not change until the
+        iterator is exhausted.
+        """
+        if self.onitama.whose_turn is self:
+            for row_o, col_o, row_d, col_d, style_name in self.onitama.iter_legal_moves():
+                yield Turn(row_o, col_o, row_d, col_d, style_name, self.player_id)
+
+    def has_valid_turn(self) -> bool:
+        """
+        This method returns whether the player has at least one legal turn,
+        stopping at the first one found.
+        """
+        return self.onitama.whose_turn is self and next(self.onitama.iter_legal_moves(), None) is not None
+
+    def count_valid_turns(self) -> int:
+        """
+        This method returns the number of legal turns of the player without
+        creating them, e.g. for mobility scores.
+        """
+        if self.onitama.whose_turn is not self:
+            return 0
+        return self.onitama.count_legal_turns()
+
+    def get_capture_turn(self) -> Union[Turn, None]:
+        """
+        This method returns the first legal turn, in the order of
+        get_valid_turns, which captures a piece, or None if there is none.
+        """
+        if self.onitama.whose_turn is not self:
+            return None
+        get_token = self.onitama.get_token
+        for row_o, col_o, row_d, col_d, style_name in self.onitama.iter_legal_moves():
+            if get_token(row_d, col_d) != Pieces.EMPTY:
+                return Turn(row_o, col_o, row_d, col_d, style_name, self.player_id)
+        return None
+
+    def get_random_turn(self, rng: Union[random.Random, None] = None) -> Union[Turn, None]:
+        """
+        This method returns a legal turn chosen uniformly at random with <rng>,
+        or Python's random module if it is None, or None if there is no legal
+        turn. The turn is picked by reservoir sampling while the moves are
+        generated, so only the chosen turn is ever created.
+        """
+        if self.onitama.whose_turn is not self:
+            return None
+        draw = (rng or random).random
+        chosen = None
+        for count, move in enumerate(self.onitama.iter_legal_moves(), 1):
+            # Keep the count-th move with probability 1 / count.
+            if draw() * count < 1:
+                chosen = move
+        if chosen is None:
+            return None
+        return Turn(*chosen, self.player_id)
 
     def set_onitama(self, onitama):
         """
@@ -105,12 +144,5 @@ class PlayerRandom(Player):
         this method chooses a move randomly to be made by the computer through
         a random style card available to the current player.
         """
-        turns = []
-        valid_turns = self.get_valid_turns()
-        for style_name in valid_turns:
-            turns.extend(valid_turns[style_name])
-
-        # Return a random valid turn
-        if len(turns) == 0:
-            return None
-        return turns[randint(0, len(turns) - 1)]
+        # Return a random valid turn, or None if there is none.
+        return self.get_random_turn()
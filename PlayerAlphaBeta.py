@@ -0,0 +1,396 @@
+from __future__ import annotations
+from Player import Player
+from Move import Move
+from Pieces import Pieces
+from OpeningBook import OpeningBook
+from Turn import Turn
+from TranspositionTable import TranspositionTable
+from typing import Dict, List, Tuple, Union
+from time import perf_counter
+
+
+class _SearchTimeout(Exception):
+    """
+    Raised inside the search when the time or node budget runs out.
+    """
+
+
+class PlayerAlphaBeta(Player):
+    """
+    This class is a computer player which picks its turn with a negamax
+    alpha-beta search. The search deepens one ply at a time until the time or
+    node budget runs out and returns the best turn of the deepest completed
+    iteration. Moves are packed integers (see Move), made and unmade on the
+    live OnitamaGame, so neither the game nor any Turn is created while
+    searching; only the returned turn is converted. Results are kept in a
+    TranspositionTable keyed by the position's Zobrist hash, which can be
+    shared with other players.
+
+    A player can also ponder: search on the opponent's time, while the
+    opponent chooses its turn (see ponder). The results stay in the table,
+    so the next search finds the positions after the opponent's turn
+    already searched and gets deeper within the same budget.
+
+    === Attributes ===
+    time_limit : Seconds the search may spend on one turn, or None for no limit.
+    node_limit : Positions the search may visit on one turn, or None for no limit.
+    max_depth : The deepest iteration that will be searched.
+    nodes : Positions visited by the last search.
+    depth : Depth of the last completed iteration of the last search.
+    score : Score of the last returned turn for this player (WIN means a forced win).
+    table : The transposition table used by the search.
+    book : The opening book played from before searching, or None.
+
+    === Private Attributes ===
+    _deadline : perf_counter value at which the current search stops, or None for no limit.
+    _node_budget : Positions the current search may visit, or None for no limit.
+    _history : Cutoff counts of quiet moves, keyed by the squares of the packed move, used to order them.
+    _stopped : Whether stop was called during the current search.
+    _pondered : Whether the player pondered since its last search, which then continues the ponder's search.
+    """
+    WIN: int = 100000
+    MONK: int = 100
+    ADVANCE: int = 10
+    # Scores beyond this are wins or losses, whose distance depends on the ply.
+    _WIN_BOUND: int = WIN - 1000
+    player_id: str
+    time_limit: Union[float, None]
+    node_limit: Union[int, None]
+    max_depth: int
+    nodes: int
+    depth: int
+    score: int
+    table: TranspositionTable
+    book: Union[OpeningBook, None]
+    _deadline: Union[float, None]
+    _node_budget: Union[int, None]
+    _history: Dict[int, int]
+    _stopped: bool
+    _pondered: bool
+
+    def __init__(self, player_id: str, time_limit: Union[float, None] = 0.25,
+                 node_limit: Union[int, None] = None, max_depth: int = 64,
+                 table: Union[TranspositionTable, None] = None,
+                 book: Union[OpeningBook, str, None] = None) -> None:
+        """
+        This method initializes a PlayerAlphaBeta object. A new transposition
+        table is created unless one to share is given as <table>. <book> is an
+        opening book or the path of one.
+        """
+        super().__init__(player_id)
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.max_depth = max_depth
+        self.nodes = 0
+        self.depth = 0
+        self.score = 0
+        self.table = table if table is not None else TranspositionTable()
+        self.book = OpeningBook(book) if isinstance(book, str) else book
+        self._deadline = None
+        self._node_budget = None
+        self._history = {}
+        self._stopped = False
+        self._pondered = False
+
+    def get_turn(self) -> Union[Turn, None]:
+        """
+        This method searches the current position of the game and returns the
+        best turn found within the budget, or None if there is no legal turn.
+        A position in the opening book is answered from the book without
+        searching. The game is left exactly as it was found.
+
+        >>> from OnitamaGame import OnitamaGame
+        >>> game = OnitamaGame(5, PlayerAlphaBeta(Pieces.G1, time_limit=None, max_depth=2), None)
+        >>> turn = game.player1.get_turn()
+        >>> game.is_legal_move(turn.row_o, turn.col_o, turn.row_d, turn.col_d)
+        True
+        """
+        self._start_search()
+        if self.book is not None:
+            turn = self.book.get_turn(self.onitama)
+            if turn is not None:
+                return turn
+        self._deadline = perf_counter() + self.time_limit if self.time_limit is not None else None
+        self._node_budget = self.node_limit
+        if self._pondered:
+            # The table is kept as the ponder left it, as one search.
+            self._pondered = False
+        else:
+            self.table.new_search()
+        best = self._iterate(self.max_depth)
+        return Move.to_turn(self.onitama, best) if best is not None else None
+
+    def ponder(self, max_depth: Union[int, None] = None) -> Union[Turn, None]:
+        """
+        This method searches the current position of the game, in which the
+        opponent is to move, with no time or node budget until stop is called
+        or <max_depth> (by default the player's) is searched, and returns the
+        opponent's best turn found, or None if it has none. It is meant to run
+        on another thread while the opponent chooses its turn (see
+        AIWorker.ponder).
+
+        The search deepens one ply at a time. Each pass searches, for every
+        turn of the opponent, the position after it as get_turn would, the
+        likeliest turns first, and keeps the results in the table, so
+        whichever turn the opponent plays, the next get_turn finds its
+        position already searched. The likeliest turns are those which leave
+        this player the lowest score. The game is left exactly as it was
+        found.
+
+        >>> from OnitamaGame import OnitamaGame
+        >>> game = OnitamaGame(5, None, PlayerAlphaBeta(Pieces.G2, time_limit=None, max_depth=3))
+        >>> predicted = game.player2.ponder()
+        >>> game.move(predicted.row_o, predicted.col_o, predicted.row_d, predicted.col_d, predicted.style_name)
+        True
+        >>> turn = game.player2.get_turn()
+        >>> game.player2.depth, game.player2.nodes < 100
+        (3, True)
+        """
+        self._start_search()
+        self._deadline = None
+        self._node_budget = None
+        self.table.new_search()
+        self._pondered = True
+        game = self.onitama
+        replies = list(game.get_legal_moves())
+        if not replies:
+            return None
+        scores = {}
+        predicted = replies[0]
+        try:
+            for depth in range(1, (max_depth if max_depth is not None else self.max_depth) + 1):
+                for reply in replies:
+                    game.make_packed_move(reply)
+                    try:
+                        scores[reply] = self._search_reply(depth)
+                    finally:
+                        game.unmake_move()
+                replies.sort(key=scores.__getitem__)
+                predicted = replies[0]
+                self.depth = depth
+                self.score = scores[predicted]
+        except _SearchTimeout:
+            pass
+        return Move.to_turn(game, predicted)
+
+    def _search_reply(self, depth: int) -> int:
+        """
+        Searches the current position, in which this player is to move after
+        the opponent's turn, to <depth> as an iteration of get_turn would,
+        stores the result and returns its score for this player.
+        """
+        game = self.onitama
+        if game.get_winner() is not None:
+            return -self.WIN
+        key = game.get_hash()
+        entry = self.table.probe(key)
+        moves = self._ordered_moves(entry[3] if entry is not None else None)
+        if not moves:
+            return self._evaluate()
+        score, move = self._search_root(moves, depth)
+        self.table.store(key, depth, score, TranspositionTable.EXACT, move)
+        return score
+
+    def _start_search(self) -> None:
+        """
+        Resets the statistics and history of the last search.
+        """
+        self.nodes = 0
+        self.depth = 0
+        self.score = 0
+        self._history = {}
+        self._stopped = False
+
+    def _iterate(self, max_depth: int) -> Union[int, None]:
+        """
+        Searches the current position one ply deeper at a time, up to
+        <max_depth>, until the budget runs out, and returns the best packed
+        move of the deepest completed iteration, or None if there is no
+        legal move.
+        """
+        entry = self.table.probe(self.onitama.get_hash())
+        moves = self._ordered_moves(entry[3] if entry is not None else None)
+        if not moves:
+            return None
+        best = moves[0]
+        for depth in range(1, max_depth + 1):
+            try:
+                score, move = self._search_root(moves, depth)
+            except _SearchTimeout:
+                break
+            best = move
+            self.depth = depth
+            self.score = score
+            # Search the best move first in the next iteration.
+            moves.remove(move)
+            moves.insert(0, move)
+            self.table.store(self.onitama.get_hash(), depth, score, TranspositionTable.EXACT, move)
+            if abs(score) >= self.WIN - max_depth:
+                break
+        return best
+
+    def _search_root(self, moves: List[int], depth: int) -> Tuple[int, int]:
+        """
+        Searches every root move to <depth> and returns the best score and move.
+        """
+        game = self.onitama
+        alpha = -self.WIN - 1
+        best = moves[0]
+        for move in moves:
+            game.make_packed_move(move)
+            try:
+                score = -self._negamax(depth - 1, -self.WIN - 1, -alpha, 1)
+            finally:
+                game.unmake_move()
+            if score > alpha:
+                alpha = score
+                best = move
+        return alpha, best
+
+    def _negamax(self, depth: int, alpha: int, beta: int, ply: int) -> int:
+        """
+        Returns the score of the current position for the player to move,
+        searched to <depth> within the window (<alpha>, <beta>).
+        """
+        self.nodes += 1
+        if self._node_budget is not None and self.nodes >= self._node_budget:
+            raise _SearchTimeout
+        if self.nodes & 1023 == 0:
+            self._check_budget()
+        game = self.onitama
+        winner = game.get_winner()
+        if winner is not None:
+            # Prefer quicker wins and slower losses.
+            return self.WIN - ply if winner is game.whose_turn else ply - self.WIN
+        if depth == 0:
+            return self._evaluate()
+        key = game.get_hash()
+        entry = self.table.probe(key)
+        table_move = None
+        if entry is not None:
+            table_depth, table_score, bound, table_move = entry
+            if table_depth >= depth:
+                table_score = self._from_table(table_score, ply)
+                if bound == TranspositionTable.EXACT:
+                    return table_score
+                if bound == TranspositionTable.LOWER and table_score >= beta:
+                    return table_score
+                if bound == TranspositionTable.UPPER and table_score <= alpha:
+                    return table_score
+        moves = self._ordered_moves(table_move)
+        if not moves:
+            return self._evaluate()
+        alpha_start = alpha
+        best = -self.WIN - 1
+        best_move = moves[0]
+        for move in moves:
+            game.make_packed_move(move)
+            try:
+                score = -self._negamax(depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                game.unmake_move()
+            if score > best:
+                best = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        bits = game.square_bits
+                        if game.get_token(*divmod(move >> bits & (1 << bits) - 1, game.size)) == Pieces.EMPTY:
+                            key_history = move & (1 << 2 * bits) - 1
+                            self._history[key_history] = self._history.get(key_history, 0) + depth * depth
+                        break
+        if best <= alpha_start:
+            bound = TranspositionTable.UPPER
+        elif best >= beta:
+            bound = TranspositionTable.LOWER
+        else:
+            bound = TranspositionTable.EXACT
+        self.table.store(key, depth, self._to_table(best, ply), bound, best_move)
+        return best
+
+    def _ordered_moves(self, first: Union[int, None] = None) -> List[int]:
+        """
+        Returns the packed legal moves of the player to move with <first>
+        (the transposition table's best move) first, then captures, then the
+        remaining moves ordered by their history score.
+        """
+        game = self.onitama
+        enemy = game.get_squares(Pieces.G2 if game.whose_turn is game.player1 else Pieces.G1)
+        bits = game.square_bits
+        mask = (1 << bits) - 1
+        captures = []
+        quiet = []
+        for move in game.get_legal_moves():
+            if move >> bits & mask in enemy:
+                captures.append(move)
+            else:
+                quiet.append(move)
+        history = self._history
+        if history:
+            squares = (1 << 2 * bits) - 1
+            quiet.sort(key=lambda move: history.get(move & squares, 0), reverse=True)
+        captures.extend(quiet)
+        if first is not None and first in captures:
+            captures.remove(first)
+            captures.insert(0, first)
+        return captures
+
+    def _to_table(self, score: int, ply: int) -> int:
+        """
+        Converts a win or loss <score> found <ply> plies from the root into one
+        relative to the position itself, so it can be reused at any ply.
+        """
+        if score > self._WIN_BOUND:
+            return score + ply
+        if score < -self._WIN_BOUND:
+            return score - ply
+        return score
+
+    def _from_table(self, score: int, ply: int) -> int:
+        """
+        Converts a <score> read from the transposition table back to one
+        relative to the root, <ply> plies away.
+        """
+        if score > self._WIN_BOUND:
+            return score - ply
+        if score < -self._WIN_BOUND:
+            return score + ply
+        return score
+
+    def stop(self) -> None:
+        """
+        Makes a search running on another thread return its best turn so far
+        as soon as possible.
+        """
+        self._stopped = True
+
+    def _check_budget(self) -> None:
+        """
+        Raises _SearchTimeout if the time budget has run out or the search
+        was stopped. The node budget is checked on every node by _negamax.
+        """
+        if self._stopped:
+            raise _SearchTimeout
+        if self._deadline is not None and perf_counter() >= self._deadline:
+            raise _SearchTimeout
+
+    def _evaluate(self) -> int:
+        """
+        Returns a static score of the current position for the player to move:
+        the difference in pieces plus how far each grandmaster has advanced
+        towards the opponent's throne.
+        """
+        game = self.onitama
+        size = game.size
+        score = self.MONK * (len(game.get_squares(Pieces.G1)) - len(game.get_squares(Pieces.G2)))
+        for square in game.get_grandmasters(Pieces.G1):
+            score += self.ADVANCE * (square // size)
+        for square in game.get_grandmasters(Pieces.G2):
+            score -= self.ADVANCE * (size - 1 - square // size)
+        return score if game.whose_turn is game.player1 else -score
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
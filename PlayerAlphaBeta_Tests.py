@@ -0,0 +1,163 @@
+import threading
+import time
+from AIWorker import AIWorker
+from OnitamaGame import OnitamaGame
+from PlayerAlphaBeta import PlayerAlphaBeta
+from Player import PlayerRandom
+from Pieces import Pieces
+
+
+def test_finds_winning_move() -> None:
+    """
+    This test checks if 'get_turn' captures the opponent's grandmaster when it
+    can, and leaves the game unchanged after searching.
+    """
+    player1 = PlayerAlphaBeta(Pieces.G1, time_limit = None, max_depth = 3)
+    player2 = PlayerRandom(Pieces.G2)
+    game = OnitamaGame(5, player1, player2)
+    board = [[Pieces.EMPTY] * 5 for _ in range(5)]
+    board[0][0] = Pieces.M1
+    board[2][2] = Pieces.G1
+    board[3][2] = Pieces.G2
+    board[4][4] = Pieces.M2
+    game.set_board(5, board)
+    board = game.get_board()
+    turn = game.whose_turn.get_turn()
+    assert game.get_board() == board
+    assert game.whose_turn is player1
+    assert (turn.row_d, turn.col_d) == (3, 2)
+    assert player1.score >= PlayerAlphaBeta.WIN - 1
+
+
+def test_finds_winning_move_on_large_board() -> None:
+    """
+    This test checks if 'get_turn' finds the capture of the opponent's
+    grandmaster on a 17x17 board, whose squares do not fit in 8 bits.
+    """
+    player1 = PlayerAlphaBeta(Pieces.G1, time_limit = None, max_depth = 3)
+    game = OnitamaGame(17, player1, PlayerRandom(Pieces.G2))
+    board = [[Pieces.EMPTY] * 17 for _ in range(17)]
+    board[0][0] = Pieces.M1
+    board[15][8] = Pieces.G1
+    board[16][8] = Pieces.G2
+    board[16][16] = Pieces.M2
+    game.set_board(17, board)
+    turn = game.whose_turn.get_turn()
+    assert (turn.row_o, turn.col_o, turn.row_d, turn.col_d) == (15, 8, 16, 8)
+    assert game.is_legal_move(turn.row_o, turn.col_o, turn.row_d, turn.col_d)
+
+
+def test_node_limit() -> None:
+    """
+    This test checks if the search respects its node budget exactly, also
+    when it is not a multiple of the clock check interval, and still returns
+    a legal turn.
+    """
+    for node_limit in (2048, 300):
+        player1 = PlayerAlphaBeta(Pieces.G1, time_limit = None, node_limit = node_limit)
+        game = OnitamaGame(7, player1, PlayerRandom(Pieces.G2))
+        turn = player1.get_turn()
+        assert player1.nodes <= node_limit
+        assert player1.depth >= 1
+        assert game.move(turn.row_o, turn.col_o, turn.row_d, turn.col_d, turn.style_name)
+
+
+def test_beats_random_player() -> None:
+    """
+    This test checks if a shallow search wins against PlayerRandom.
+    """
+    player1 = PlayerAlphaBeta(Pieces.G1, time_limit = None, max_depth = 2)
+    player2 = PlayerRandom(Pieces.G2)
+    game = OnitamaGame(5, player1, player2)
+    for _ in range(200):
+        turn = game.whose_turn.get_turn()
+        if turn is None or game.get_winner() is not None:
+            break
+        game.move(turn.row_o, turn.col_o, turn.row_d, turn.col_d, turn.style_name)
+    assert game.get_winner() is player1
+
+
+def test_stop_from_worker() -> None:
+    """
+    This test checks that a search without a time limit, running on an
+    'AIWorker' thread, stops soon after the request is cancelled, and that the
+    game on screen is never changed by the search.
+    """
+    game = OnitamaGame(5, PlayerAlphaBeta(Pieces.G1, time_limit=None), PlayerRandom(Pieces.G2))
+    board = game.get_board()
+    worker = AIWorker()
+    worker.request(game)
+    time.sleep(0.2)
+    start = time.perf_counter()
+    worker.cancel()
+    worker.close()
+    for thread in threading.enumerate():
+        if thread.name.startswith('ai'):
+            thread.join(timeout = 5)
+    assert time.perf_counter() - start < 1
+    assert game.get_board() == board
+    assert game.player1.onitama is game
+    assert not worker.busy()
+
+
+def test_cancel_just_started() -> None:
+    """
+    This test checks that requests cancelled as soon as they are made, some
+    of them just as their search starts, never leave a search without a time
+    limit running on the 'AIWorker' thread.
+    """
+    game = OnitamaGame(5, PlayerAlphaBeta(Pieces.G1, time_limit = None), PlayerRandom(Pieces.G2))
+    worker = AIWorker()
+    for attempt in range(50):
+        worker.request(game)
+        time.sleep(attempt * 0.0001)
+        worker.cancel()
+    # The worker has one thread, so this turn only comes once no search runs.
+    worker.request(OnitamaGame(5, PlayerRandom(Pieces.G1), PlayerRandom(Pieces.G2)))
+    assert worker.result(timeout = 5) is not None
+    worker.close()
+    assert game.player1.onitama is game
+
+
+def test_ponder_reused_by_reply() -> None:
+    """
+    This test checks that after pondering, the reply to every turn of the
+    opponent searches the same depth with far fewer positions, and that a
+    ponder on an 'AIWorker' thread ends when the reply is requested, without
+    changing the game on screen.
+    """
+    replies = OnitamaGame(5).get_legal_turns()
+    for turns in replies.values():
+        for turn in turns:
+            fresh = PlayerAlphaBeta(Pieces.G2, time_limit = None, max_depth = 3)
+            game = OnitamaGame(5, None, fresh)
+            game.move(turn.row_o, turn.col_o, turn.row_d, turn.col_d, turn.style_name)
+            fresh.get_turn()
+            pondering = PlayerAlphaBeta(Pieces.G2, time_limit = None, max_depth = 3)
+            game = OnitamaGame(5, None, pondering)
+            board = game.get_board()
+            pondering.ponder()
+            assert game.get_board() == board
+            game.move(turn.row_o, turn.col_o, turn.row_d, turn.col_d, turn.style_name)
+            pondering.get_turn()
+            assert pondering.depth == fresh.depth == 3
+            assert pondering.nodes * 4 < fresh.nodes
+    player2 = PlayerAlphaBeta(Pieces.G2, time_limit = 0.1)
+    game = OnitamaGame(5, None, player2)
+    worker = AIWorker()
+    worker.ponder(game, player2)
+    time.sleep(0.3)
+    assert worker.pondering() and not worker.busy()
+    game.move(0, 2, 1, 2, 'crab')
+    board = game.get_board()
+    worker.request(game)
+    assert not worker.pondering()
+    turn = worker.result(timeout = 5)
+    worker.close()
+    assert game.get_board() == board
+    assert game.move(turn.row_o, turn.col_o, turn.row_d, turn.col_d, turn.style_name)
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main(['PlayerAlphaBeta_Tests.py'])
@@ -0,0 +1,369 @@
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from math import log, sqrt
+from multiprocessing import get_context
+from random import Random
+from time import perf_counter
+from typing import Dict, List, Tuple, Union
+from OnitamaGame import OnitamaGame
+from Move import Move
+from OpeningBook import OpeningBook
+from Player import Player
+from Pieces import Pieces
+from Turn import Turn
+
+
+class _Node:
+    """
+    A node of the search tree of PlayerMCTS, reached by playing <move>.
+
+    === Attributes ===
+    move : The packed move (see Move) leading to this node, None for the root.
+    parent : The parent node, None for the root.
+    children : The expanded children of this node.
+    untried : The packed legal moves of this node which have no child yet.
+    visits : Number of simulations through this node.
+    wins : Sum of the results of those simulations for the player who played <move>.
+    player1_moved : Whether <move> was played by player1.
+    """
+    __slots__ = ('move', 'parent', 'children', 'untried', 'visits', 'wins', 'player1_moved')
+    move: Union[int, None]
+    parent: Union[_Node, None]
+    children: List[_Node]
+    untried: List[int]
+    visits: int
+    wins: float
+    player1_moved: bool
+
+    def __init__(self, move: Union[int, None], parent: Union[_Node, None],
+                 untried: List[int], player1_moved: bool) -> None:
+        """
+        Initializes a node with no simulations.
+        """
+        self.move = move
+        self.parent = parent
+        self.children = []
+        self.untried = untried
+        self.visits = 0
+        self.wins = 0.0
+        self.player1_moved = player1_moved
+
+
+class PlayerMCTS(Player):
+    """
+    This class is a computer player which picks its turn with Monte Carlo Tree
+    Search using the UCT selection rule. Rollouts play uniformly random turns,
+    like PlayerRandom, until the game ends or max_plies is reached (a draw).
+    The tree and the rollouts use packed moves (see Move); only the returned
+    turn is a Turn.
+
+    The rollouts can run in a pool of worker processes:
+        parallelism None: every rollout runs in this process on the live game.
+        parallelism 'leaf': each new leaf is simulated leaf_rollouts times by
+            every worker and the results are backed up together.
+        parallelism 'root': every worker grows its own tree from the current
+            position for the whole budget, and the visit counts of the root
+            turns are summed.
+
+    === Attributes ===
+    exploration : The UCT exploration constant.
+    simulations : Rollouts per turn, or None for no limit.
+    time_limit : Seconds per turn, or None for no limit.
+    parallelism : None, 'leaf' or 'root'.
+    workers : Number of worker processes.
+    leaf_rollouts : Rollouts per worker for each leaf with 'leaf' parallelism.
+    max_plies : Plies after which a rollout is scored as a draw.
+    simulations_run : Rollouts run for the last turn.
+    simulations_per_second : Rollouts per second for the last turn.
+    book : The opening book played from before searching, or None.
+
+    === Private Attributes ===
+    _rng : Random number generator for expansion and rollouts.
+    _pool : The worker processes, started on the first parallel turn.
+    _stopped : Whether stop was called during the current search.
+    """
+    LEAF: str = 'leaf'
+    ROOT: str = 'root'
+    exploration: float
+    simulations: Union[int, None]
+    time_limit: Union[float, None]
+    parallelism: Union[str, None]
+    workers: int
+    leaf_rollouts: int
+    max_plies: int
+    simulations_run: int
+    simulations_per_second: float
+    book: Union[OpeningBook, None]
+    _rng: Random
+    _pool: Union[ProcessPoolExecutor, None]
+    _stopped: bool
+
+    def __init__(self, player_id: str, exploration: float = 1.4, simulations: Union[int, None] = None,
+                 time_limit: Union[float, None] = 1.0, parallelism: Union[str, None] = None,
+                 workers: int = 1, leaf_rollouts: int = 4, max_plies: int = 200,
+                 seed: Union[int, None] = None, book: Union[OpeningBook, str, None] = None) -> None:
+        """
+        This method initializes a PlayerMCTS object. At least one of
+        <simulations> and <time_limit> must be given. <book> is an opening
+        book or the path of one.
+        """
+        super().__init__(player_id)
+        if simulations is None and time_limit is None:
+            raise ValueError('PlayerMCTS needs a simulation or a time budget')
+        if parallelism not in (None, self.LEAF, self.ROOT):
+            raise ValueError(f'Unknown parallelism: {parallelism}')
+        self.exploration = exploration
+        self.simulations = simulations
+        self.time_limit = time_limit
+        self.parallelism = parallelism
+        self.workers = workers
+        self.leaf_rollouts = leaf_rollouts
+        self.max_plies = max_plies
+        self.simulations_run = 0
+        self.simulations_per_second = 0.0
+        self.book = OpeningBook(book) if isinstance(book, str) else book
+        self._rng = Random(seed)
+        self._pool = None
+        self._stopped = False
+
+    def get_turn(self) -> Union[Turn, None]:
+        """
+        This method searches the current position of the game and returns the
+        turn with the most visits, or None if there is no legal turn. A
+        position in the opening book is answered from the book without
+        searching. The game is left exactly as it was found.
+
+        >>> player = PlayerMCTS(Pieces.G1, simulations=50, time_limit=None, seed=1)
+        >>> game = OnitamaGame(5, player, None)
+        >>> turn = player.get_turn()
+        >>> game.is_legal_move(turn.row_o, turn.col_o, turn.row_d, turn.col_d), player.simulations_run
+        (True, 50)
+        """
+        self._stopped = False
+        if self.book is not None:
+            turn = self.book.get_turn(self.onitama)
+            if turn is not None:
+                self.simulations_run = 0
+                self.simulations_per_second = 0.0
+                return turn
+        start = perf_counter()
+        if self.parallelism == self.ROOT:
+            turn = self._search_root_parallel()
+        else:
+            root = self._search(start)
+            turn = Move.to_turn(self.onitama, self._best_child(root).move) if root.children else None
+        elapsed = perf_counter() - start
+        self.simulations_per_second = self.simulations_run / elapsed if elapsed > 0 else 0.0
+        return turn
+
+    def close(self) -> None:
+        """
+        Shuts down the worker processes, if they were started.
+        """
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def _search(self, start: float) -> _Node:
+        """
+        Grows a search tree from the current position of the game until the
+        budget runs out and returns its root.
+        """
+        game = self.onitama
+        self.simulations_run = 0
+        root = _Node(None, None, list(game.get_legal_moves()), game.whose_turn is game.player2)
+        if not root.untried:
+            return root
+        while not self._budget_spent(start):
+            node = root
+            depth = 0
+            # Selection
+            while not node.untried and node.children:
+                node = self._select(node)
+                game.make_packed_move(node.move)
+                depth += 1
+            # Expansion
+            if node.untried and game.get_winner() is None:
+                move = node.untried.pop(self._rng.randrange(len(node.untried)))
+                player1_moved = game.whose_turn is game.player1
+                game.make_packed_move(move)
+                depth += 1
+                child = _Node(move, node, list(game.get_legal_moves()) if game.get_winner() is None else [],
+                              player1_moved)
+                node.children.append(child)
+                node = child
+            # Simulation
+            if self.parallelism == self.LEAF:
+                player1_wins, count = self._rollouts_in_pool()
+            else:
+                player1_wins, count = self._rollout(game, self._rng, self.max_plies), 1
+            self.simulations_run += count
+            for _ in range(depth):
+                game.unmake_move()
+            # Backpropagation
+            while node is not None:
+                node.visits += count
+                node.wins += player1_wins if node.player1_moved else count - player1_wins
+                node = node.parent
+        return root
+
+    def _search_root_parallel(self) -> Union[Turn, None]:
+        """
+        Runs an independent search from the current position in every worker
+        and returns the root turn with the most visits over all of them.
+        """
+        moves = self.onitama.get_legal_moves()
+        if not moves:
+            self.simulations_run = 0
+            return None
+        position = self._position()
+        simulations = None if self.simulations is None else -(-self.simulations // self.workers)
+        futures = [self._get_pool().submit(PlayerMCTS._search_worker, position, self.exploration,
+                                           simulations, self.time_limit, self.max_plies,
+                                           self._rng.getrandbits(64))
+                   for _ in range(self.workers)]
+        visits = {}
+        self.simulations_run = 0
+        for future in futures:
+            stats, count = future.result()
+            self.simulations_run += count
+            for key, value in stats.items():
+                visits[key] = visits.get(key, 0) + value
+        return Move.to_turn(self.onitama, max(moves, key=lambda move: visits.get(move, 0)))
+
+    def _select(self, node: _Node) -> _Node:
+        """
+        Returns the child of <node> with the highest UCT value.
+        """
+        log_visits = log(node.visits)
+        exploration = self.exploration
+        best = None
+        best_value = -1.0
+        for child in node.children:
+            value = child.wins / child.visits + exploration * sqrt(log_visits / child.visits)
+            if value > best_value:
+                best = child
+                best_value = value
+        return best
+
+    @staticmethod
+    def _best_child(node: _Node) -> _Node:
+        """
+        Returns the most visited child of <node>.
+        """
+        return max(node.children, key=lambda child: child.visits)
+
+    def stop(self) -> None:
+        """
+        Makes a search running on another thread return its best turn so far
+        as soon as possible. Searches running in worker processes ('root'
+        parallelism) still use their whole budget.
+        """
+        self._stopped = True
+
+    def _budget_spent(self, start: float) -> bool:
+        """
+        Returns whether the simulation or time budget of this turn is spent,
+        or the search was stopped.
+        """
+        if self._stopped:
+            return True
+        if self.simulations is not None and self.simulations_run >= self.simulations:
+            return True
+        return self.time_limit is not None and perf_counter() - start >= self.time_limit
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """
+        Returns the pool of worker processes, starting it if needed.
+        """
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=get_context('spawn'))
+        return self._pool
+
+    def _rollouts_in_pool(self) -> Tuple[float, int]:
+        """
+        Runs leaf_rollouts rollouts of the current position in every worker
+        and returns the summed result for player1 and the number of rollouts.
+        """
+        position = self._position()
+        futures = [self._get_pool().submit(PlayerMCTS._rollout_worker, position, self.leaf_rollouts,
+                                           self.max_plies, self._rng.getrandbits(64))
+                   for _ in range(self.workers)]
+        player1_wins = 0.0
+        for future in futures:
+            player1_wins += future.result()
+        return player1_wins, self.leaf_rollouts * self.workers
+
+    def _position(self) -> Tuple[int, List[List[str]], List[str], bool]:
+        """
+        Returns the current position as a picklable (size, board, style owners,
+        player2 to move) tuple.
+        """
+        game = self.onitama
+        return (game.size, game.get_board(), [sty.owner for sty in game.get_styles()],
+                game.whose_turn is game.player2)
+
+    @staticmethod
+    def _game_from_position(position: Tuple[int, List[List[str]], List[str], bool]) -> OnitamaGame:
+        """
+        Returns a new OnitamaGame in the given <position>, see _position.
+        """
+        size, board, owners, player2_to_move = position
+        game = OnitamaGame(size, Player(Pieces.G1), Player(Pieces.G2))
+        game.set_board(size, board)
+        game.set_style_owners(owners)
+        game.whose_turn = game.player2 if player2_to_move else game.player1
+        return game
+
+    @staticmethod
+    def _rollout(game: OnitamaGame, rng: Random, max_plies: int) -> float:
+        """
+        Plays uniformly random turns in <game> until it ends or <max_plies>
+        turns were played, undoes them, and returns 1 if player1 won, 0 if
+        player2 won and 0.5 otherwise.
+        """
+        plies = 0
+        winner = game.get_winner()
+        while winner is None and plies < max_plies:
+            moves = game.get_legal_moves()
+            if not moves:
+                break
+            game.make_packed_move(moves[rng.randrange(len(moves))])
+            plies += 1
+            winner = game.get_winner()
+        for _ in range(plies):
+            game.unmake_move()
+        if winner is None:
+            return 0.5
+        return 1.0 if winner is game.player1 else 0.0
+
+    @staticmethod
+    def _rollout_worker(position: Tuple, count: int, max_plies: int, seed: int) -> float:
+        """
+        Runs <count> rollouts of <position> in a worker process and returns the
+        summed result for player1.
+        """
+        game = PlayerMCTS._game_from_position(position)
+        rng = Random(seed)
+        return sum(PlayerMCTS._rollout(game, rng, max_plies) for _ in range(count))
+
+    @staticmethod
+    def _search_worker(position: Tuple, exploration: float, simulations: Union[int, None],
+                       time_limit: Union[float, None], max_plies: int,
+                       seed: int) -> Tuple[Dict[int, int], int]:
+        """
+        Searches <position> in a worker process and returns the visits of each
+        root move, keyed by the packed move, and the number of rollouts run.
+        """
+        game = PlayerMCTS._game_from_position(position)
+        player = PlayerMCTS(game.whose_turn.player_id, exploration, simulations, time_limit,
+                            max_plies=max_plies, seed=seed)
+        player.set_onitama(game)
+        root = player._search(perf_counter())
+        stats = {child.move: child.visits for child in root.children}
+        return stats, player.simulations_run
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,56 @@
+from OnitamaGame import OnitamaGame
+from PlayerMCTS import PlayerMCTS
+from Player import PlayerRandom
+from Pieces import Pieces
+
+
+def winning_position(player1) -> OnitamaGame:
+    """
+    Returns a game where player1 (G1) can capture G2 with the crab style.
+    """
+    game = OnitamaGame(5, player1, PlayerRandom(Pieces.G2))
+    board = [[Pieces.EMPTY] * 5 for _ in range(5)]
+    board[0][0] = Pieces.M1
+    board[2][2] = Pieces.G1
+    board[3][2] = Pieces.G2
+    board[4][4] = Pieces.M2
+    game.set_board(5, board)
+    return game
+
+
+def test_finds_winning_move() -> None:
+    """
+    This test checks if 'get_turn' finds the capture of the grandmaster,
+    reports its rollouts and leaves the game unchanged.
+    """
+    player1 = PlayerMCTS(Pieces.G1, simulations = 300, time_limit = None, seed = 7)
+    game = winning_position(player1)
+    board = game.get_board()
+    turn = player1.get_turn()
+    assert (turn.row_d, turn.col_d) == (3, 2)
+    assert game.get_board() == board
+    assert game.whose_turn is player1
+    assert player1.simulations_run == 300
+    assert player1.simulations_per_second > 0
+
+
+def test_parallel_rollouts() -> None:
+    """
+    This test checks if leaf and root parallelism over worker processes return
+    legal turns and count the rollouts of every worker.
+    """
+    for parallelism in (PlayerMCTS.LEAF, PlayerMCTS.ROOT):
+        player1 = PlayerMCTS(Pieces.G1, simulations = 80, time_limit = None,
+                             parallelism = parallelism, workers = 2, seed = 7)
+        game = winning_position(player1)
+        try:
+            turn = player1.get_turn()
+        finally:
+            player1.close()
+        assert game.is_legal_move(turn.row_o, turn.col_o, turn.row_d, turn.col_d)
+        assert player1.simulations_run >= 80
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main(['PlayerMCTS_Tests.py'])
@@ -0,0 +1,210 @@
+from __future__ import annotations
+import math
+from statistics import NormalDist
+from typing import Callable, Dict, List, Tuple
+import numpy as np
+
+
+class Ratings:
+    """
+    A class which rates players from the results of the games they played
+    against each other, on the Elo scale, with confidence intervals.
+
+    Two models are fitted by maximum likelihood:
+        elo : the logistic Elo model, in which a draw counts as half a win
+              and half a loss and the first player has no advantage.
+        bayes_elo : the model of Remi Coulom's BayesElo, which also fits the
+                    advantage of moving first and how likely draws are
+                    between equal players (draw_elo).
+    To keep ratings finite when a player wins or loses every game, each pair
+    of players who met is given <prior> virtual draws, half with each player
+    moving first. Ratings are centred on 0. Confidence intervals come from
+    the Fisher information at the fitted ratings.
+
+    >>> ratings = Ratings(2)
+    >>> for _ in range(30):
+    ...     ratings.add(0, 1, 1.0)
+    ...     ratings.add(1, 0, 0.0)
+    ...     ratings.add(0, 1, 0.5)
+    >>> (strong, low, high), weak = ratings.elo()
+    >>> round(strong), round(-weak[0]), low < strong < high
+    (138, 138, True)
+
+    === Attributes ===
+    count : Number of players, numbered from 0.
+    results : For each (first, second) pair of players, the first player's
+              wins, draws and losses in the games where it moved first.
+    """
+    # Converts Elo differences into the natural log odds of the logistic model.
+    _SCALE: float = math.log(10) / 400
+    count: int
+    results: Dict[Tuple[int, int], List[int]]
+
+    def __init__(self, count: int) -> None:
+        """
+        Initializes ratings for <count> players with no games.
+        """
+        self.count = count
+        self.results = {}
+
+    def add(self, first: int, second: int, score: float) -> None:
+        """
+        Records a game in which player <first> moved first against player
+        <second> and scored <score>: 1 for a win, 0.5 for a draw, 0 for a loss.
+        """
+        counts = self.results.setdefault((first, second), [0, 0, 0])
+        counts[0 if score > 0.5 else 1 if score == 0.5 else 2] += 1
+
+    def elo(self, prior: float = 1.0, confidence: float = 0.95) -> List[Tuple[float, float, float]]:
+        """
+        Returns each player's (rating, low, high) in the Elo model, where
+        low and high bound the <confidence> interval of the rating.
+        """
+        groups = self._get_groups(prior)
+        scale = self._SCALE
+
+        def evaluate(params: np.ndarray) -> Tuple[float, np.ndarray, np.ndarray]:
+            log_likelihood = 0.0
+            gradient = np.zeros(self.count)
+            fisher = np.zeros((self.count, self.count))
+            for first, second, wins, draws, losses in groups:
+                score, games = wins + draws / 2, wins + draws + losses
+                p = 1 / (1 + math.exp(-scale * (params[first] - params[second])))
+                log_likelihood += score * math.log(p) + (games - score) * math.log(1 - p)
+                slope = scale * (score - games * p)
+                information = games * scale * scale * p * (1 - p)
+                gradient[first] += slope
+                gradient[second] -= slope
+                fisher[first, first] += information
+                fisher[second, second] += information
+                fisher[first, second] -= information
+                fisher[second, first] -= information
+            return log_likelihood, gradient, fisher
+
+        params, covariance = self._fit(np.zeros(self.count), evaluate, lambda params: True)
+        return self._intervals(params, covariance, confidence)
+
+    def bayes_elo(self, prior: float = 2.0, confidence: float = 0.95, advantage: float = 32.8,
+                  draw_elo: float = 97.3) -> Dict:
+        """
+        Returns the fit of the BayesElo model: 'ratings', each player's
+        (rating, low, high) with low and high bounding the <confidence>
+        interval, and the fitted 'advantage' and 'draw_elo'. <advantage> and
+        <draw_elo> are where the fit starts, at BayesElo's defaults.
+
+        In this model a game between <first>, moving first, and <second> is
+        won by <first> with probability f(d - draw_elo), won by <second> with
+        f(-d - draw_elo) and drawn otherwise, where d is rating[first] -
+        rating[second] + advantage and f(x) = 1 / (1 + 10 ** (-x / 400)).
+        """
+        groups = self._get_groups(prior)
+        count = self.count
+        scale = self._SCALE
+
+        def outcomes(params: np.ndarray, first: int, second: int) -> Tuple[Tuple[float, float, float], ...]:
+            # The probability of a win, draw and loss of <first> with its
+            # derivatives by d and draw_elo.
+            difference = params[first] - params[second] + params[count]
+            p_win = 1 / (1 + math.exp(-scale * (difference - params[count + 1])))
+            p_loss = 1 / (1 + math.exp(-scale * (-difference - params[count + 1])))
+            slope_win = scale * p_win * (1 - p_win)
+            slope_loss = scale * p_loss * (1 - p_loss)
+            return ((p_win, slope_win, -slope_win),
+                    (1 - p_win - p_loss, slope_loss - slope_win, slope_win + slope_loss),
+                    (p_loss, -slope_loss, -slope_loss))
+
+        def evaluate(params: np.ndarray) -> Tuple[float, np.ndarray, np.ndarray]:
+            log_likelihood = 0.0
+            gradient = np.zeros(count + 2)
+            fisher = np.zeros((count + 2, count + 2))
+            for first, second, *counts in groups:
+                # How d and draw_elo change with the parameters.
+                jacobian = np.zeros((2, count + 2))
+                jacobian[0, first] += 1
+                jacobian[0, second] -= 1
+                jacobian[0, count] = 1
+                jacobian[1, count + 1] = 1
+                games = sum(counts)
+                local_gradient = np.zeros(2)
+                local_fisher = np.zeros((2, 2))
+                for played, (p, by_difference, by_draw) in zip(counts, outcomes(params, first, second)):
+                    slopes = np.array([by_difference, by_draw])
+                    if played:
+                        log_likelihood += played * math.log(p)
+                        local_gradient += played * slopes / p
+                    local_fisher += games * np.outer(slopes, slopes) / p
+                gradient += jacobian.T @ local_gradient
+                fisher += jacobian.T @ local_fisher @ jacobian
+            return log_likelihood, gradient, fisher
+
+        def valid(params: np.ndarray) -> bool:
+            return params[count + 1] > 0
+        start = np.concatenate([np.zeros(count), [advantage, draw_elo]])
+        params, covariance = self._fit(start, evaluate, valid)
+        return {'ratings': self._intervals(params[:count], covariance[:count, :count], confidence),
+                'advantage': float(params[count]),
+                'draw_elo': float(params[count + 1])}
+
+    def _get_groups(self, prior: float) -> List[Tuple[int, int, float, float, float]]:
+        """
+        Returns the results as (first, second, wins, draws, losses), with
+        <prior> virtual draws added to every pair of players who met.
+        """
+        pairs = {tuple(sorted(pair)) for pair in self.results}
+        groups = []
+        for low, high in sorted(pairs):
+            for first, second in ((low, high), (high, low)):
+                wins, draws, losses = self.results.get((first, second), (0, 0, 0))
+                groups.append((first, second, wins, draws + prior / 2, losses))
+        return groups
+
+    def _fit(self, params: np.ndarray, evaluate: Callable[[np.ndarray], Tuple[float, np.ndarray, np.ndarray]],
+             valid: Callable[[np.ndarray], bool]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the parameters maximizing the log likelihood computed by
+        <evaluate>, starting from <params>, and their covariance. The first
+        count parameters are ratings, which are kept centred on 0.
+        <evaluate> returns the log likelihood, its gradient and the Fisher
+        information; <valid> tells whether parameters are allowed.
+        """
+        count = self.count
+        log_likelihood, gradient, fisher = evaluate(params)
+        for _ in range(100):
+            # Fisher scoring, halving steps which do not improve the fit.
+            # Ratings only matter up to a common shift, so the information
+            # is singular and its pseudo-inverse gives the centred step.
+            step = np.linalg.pinv(fisher) @ gradient
+            for _ in range(30):
+                candidate = params + step
+                candidate[:count] -= candidate[:count].mean()
+                if valid(candidate):
+                    result = evaluate(candidate)
+                    if result[0] >= log_likelihood - 1e-9:
+                        break
+                step /= 2
+            else:
+                break
+            params = candidate
+            improvement = result[0] - log_likelihood
+            log_likelihood, gradient, fisher = result
+            if improvement < 1e-10 and np.abs(step).max() < 1e-6:
+                break
+        return params, np.linalg.pinv(fisher)
+
+    @staticmethod
+    def _intervals(ratings: np.ndarray, covariance: np.ndarray,
+                   confidence: float) -> List[Tuple[float, float, float]]:
+        """
+        Returns (rating, low, high) for each of <ratings>, where low and high
+        bound the normal <confidence> interval of a rating of variance the
+        matching diagonal entry of <covariance>.
+        """
+        z = NormalDist().inv_cdf((1 + confidence) / 2)
+        errors = np.sqrt(np.maximum(np.diag(covariance), 0.0))
+        return [(float(rating), float(rating - z * error), float(rating + z * error))
+                for rating, error in zip(ratings, errors)]
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
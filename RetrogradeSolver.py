@@ -0,0 +1,263 @@
+from __future__ import annotations
+import argparse
+import sys
+from collections import deque
+from itertools import combinations
+from time import perf_counter
+from typing import Dict, List, Tuple, Union
+from MoveGenerator import MoveGenerator
+from OnitamaGame import OnitamaGame
+from Pieces import Pieces
+from SolutionTable import SolutionTable
+
+
+class RetrogradeSolver:
+    """
+    A class which strongly solves positions of the 5x5 game with the five
+    styles of OnitamaBoard.construct_styles by retrograde analysis, and writes
+    the results to a SolutionTable file.
+
+    The solver covers every position in which G1 has at most <monks1> monks
+    and G2 at most <monks2>, with both grandmasters on the board and the game
+    not over. Moves never add pieces, so these positions only lead to each
+    other or to the end of the game and can be solved on their own; the
+    complete game, with four monks each, has on the order of 10 ** 12
+    positions and needs the same algorithm run at a much larger scale.
+
+    Positions with an immediate win are won in 1. The solver then works
+    backwards from every solved position through the moves that lead to it:
+    a position with a move to a lost position is won, and a position whose
+    moves all lead to won positions is lost. Solved positions are handled in
+    order of distance, so a win is as fast and a loss as slow as possible.
+    Positions never solved are draws, which includes a player with no legal
+    turn (a game Simulator stops without a winner).
+
+    === Attributes ===
+    monks1 : Most monks G1 may have.
+    monks2 : Most monks G2 may have.
+    values : The SolutionTable value of every position, keyed by its SolutionTable key.
+
+    === Private Attributes ===
+    _destinations : [side][style][origin] is the list of destinations of a style's moves.
+    _origins : [side][style][destination] is the list of origins a style's moves come from.
+    _cards : [owners][side] is the list of the styles a side owns.
+    _previous :
+        [owners][side] is the list of (owners, style) of the positions before
+        <side> moved, given the style owners after its move.
+    """
+    # Square codes, as in SolutionTable keys.
+    _M1, _G1, _M2, _G2 = 1, 2, 3, 4
+    _SIZE = 5
+    _THRONES = ((_SIZE - 1) * _SIZE + _SIZE // 2, _SIZE // 2)
+    _POWERS = [5 ** square for square in range(_SIZE * _SIZE)]
+    monks1: int
+    monks2: int
+    values: Dict[int, int]
+    _destinations: List[List[List[List[int]]]]
+    _origins: List[List[List[List[int]]]]
+    _cards: List[Tuple[List[int], List[int]]]
+    _previous: List[Tuple[List[Tuple[int, int]], List[Tuple[int, int]]]]
+
+    def __init__(self, monks1: int = 0, monks2: int = 0) -> None:
+        """
+        Initializes a solver for the positions with at most <monks1> monks of
+        G1 and <monks2> monks of G2.
+
+        Precondition: 0 <= monks1, monks2 <= 4.
+        """
+        self.monks1 = monks1
+        self.monks2 = monks2
+        self.values = {}
+        size = self._SIZE
+        styles = OnitamaGame(size).get_styles()
+        self._destinations = []
+        self._origins = []
+        for side in (Pieces.G1, Pieces.G2):
+            destinations, origins = [], []
+            for sty in styles:
+                table = [[square for square, _, _ in squares]
+                         for squares in MoveGenerator.get_destinations(size, sty, side)]
+                reverse = [[] for _ in range(size * size)]
+                for origin, squares in enumerate(table):
+                    for square in squares:
+                        reverse[square].append(origin)
+                destinations.append(table)
+                origins.append(reverse)
+            self._destinations.append(destinations)
+            self._origins.append(origins)
+        index = {owners: i for i, owners in enumerate(SolutionTable.STYLE_OWNERS)}
+        self._cards, self._previous = [], []
+        for owners in SolutionTable.STYLE_OWNERS:
+            spare = owners.index(Pieces.EMPTY)
+            self._cards.append(tuple([i for i, owner in enumerate(owners) if owner == side]
+                                     for side in (Pieces.G1, Pieces.G2)))
+            previous = []
+            for side in (Pieces.G1, Pieces.G2):
+                # The mover used the now spare style and took one of its two styles.
+                before = []
+                for taken in (i for i, owner in enumerate(owners) if owner == side):
+                    earlier = list(owners)
+                    earlier[spare], earlier[taken] = side, Pieces.EMPTY
+                    before.append((index[tuple(earlier)], spare))
+                previous.append(before)
+            self._previous.append(tuple(previous))
+
+    def solve(self) -> Dict[int, int]:
+        """
+        Solves every position and returns <values>.
+
+        >>> values = RetrogradeSolver().solve()
+        >>> len(values)
+        33180
+        """
+        size_squared = self._SIZE * self._SIZE
+        remaining = {}
+        values = {}
+        queue = deque()
+        for key in self._positions():
+            moves, wins = self._count_moves(key)
+            if wins:
+                values[key] = SolutionTable.WIN | 1 << 2
+                queue.append(key)
+            elif moves:
+                remaining[key] = moves
+            else:
+                values[key] = SolutionTable.DRAW
+        powers = self._POWERS
+        while queue:
+            key = queue.popleft()
+            value = values[key]
+            result, distance = value & 0x3, value >> 2
+            board, side = divmod(key, 2)
+            board, owners = divmod(board, 30)
+            codes = self._decode(board)
+            mover = 1 - side
+            own = (self._M1, self._G1) if mover == 0 else (self._M2, self._G2)
+            grandmaster = own[1]
+            throne = self._THRONES[mover]
+            monk = self._M1 if side == 0 else self._M2
+            captures = [0]
+            if codes.count(monk) < (self.monks1 if side == 0 else self.monks2):
+                captures.append(monk)
+            for previous, style in self._previous[owners][mover]:
+                origins = self._origins[mover][style]
+                for square in range(size_squared):
+                    piece = codes[square]
+                    if piece not in own:
+                        continue
+                    for origin in origins[square]:
+                        if codes[origin] or (piece == grandmaster and origin == throne):
+                            continue
+                        moved = board + piece * (powers[origin] - powers[square])
+                        for captured in captures:
+                            parent = ((moved + captured * powers[square]) * 30 + previous) * 2 + mover
+                            moves = remaining.get(parent)
+                            if moves is None:
+                                continue
+                            if result == SolutionTable.LOSS:
+                                values[parent] = SolutionTable.WIN | (distance + 1) << 2
+                            elif moves > 1:
+                                remaining[parent] = moves - 1
+                                continue
+                            else:
+                                values[parent] = SolutionTable.LOSS | (distance + 1) << 2
+                            del remaining[parent]
+                            queue.append(parent)
+        for key in remaining:
+            values[key] = SolutionTable.DRAW
+        self.values = values
+        return values
+
+    def _positions(self):
+        """
+        Yields the key of every position the solver covers.
+        """
+        squares = range(self._SIZE * self._SIZE)
+        powers = self._POWERS
+        for g1 in squares:
+            if g1 == self._THRONES[0]:
+                continue
+            for g2 in squares:
+                if g2 == g1 or g2 == self._THRONES[1]:
+                    continue
+                free = [square for square in squares if square != g1 and square != g2]
+                grandmasters = self._G1 * powers[g1] + self._G2 * powers[g2]
+                for count1 in range(self.monks1 + 1):
+                    for monks1 in combinations(free, count1):
+                        rest = [square for square in free if square not in monks1]
+                        board1 = grandmasters + sum(self._M1 * powers[square] for square in monks1)
+                        for count2 in range(self.monks2 + 1):
+                            for monks2 in combinations(rest, count2):
+                                board = board1 + sum(self._M2 * powers[square] for square in monks2)
+                                for owners in range(len(SolutionTable.STYLE_OWNERS)):
+                                    yield (board * 30 + owners) * 2
+                                    yield (board * 30 + owners) * 2 + 1
+
+    def _count_moves(self, key: int) -> Tuple[int, bool]:
+        """
+        Returns the number of legal moves of the position <key> and whether
+        one of them wins at once.
+        """
+        board, side = divmod(key, 2)
+        board, owners = divmod(board, 30)
+        codes = self._decode(board)
+        own = (self._M1, self._G1) if side == 0 else (self._M2, self._G2)
+        grandmaster = own[1]
+        enemy = self._G2 if side == 0 else self._G1
+        throne = self._THRONES[side]
+        moves = 0
+        for style in self._cards[owners][side]:
+            destinations = self._destinations[side][style]
+            for square, piece in enumerate(codes):
+                if piece not in own:
+                    continue
+                for destination in destinations[square]:
+                    target = codes[destination]
+                    if target in own:
+                        continue
+                    if target == enemy or (piece == grandmaster and destination == throne):
+                        return moves + 1, True
+                    moves += 1
+        return moves, False
+
+    def _decode(self, board: int) -> List[int]:
+        """
+        Returns the square codes of the base-5 <board>.
+        """
+        codes = []
+        for _ in range(self._SIZE * self._SIZE):
+            board, code = divmod(board, 5)
+            codes.append(code)
+        return codes
+
+    def write(self, path: str) -> None:
+        """
+        Writes the solved positions to a SolutionTable file at <path>.
+        """
+        SolutionTable.write(path, self.values)
+
+
+def main(argv: Union[List[str], None] = None) -> None:
+    """
+    Solves the positions with the given numbers of monks from the command line.
+    """
+    parser = argparse.ArgumentParser(description='Solve 5x5 Onitama positions by retrograde analysis.')
+    parser.add_argument('--monks1', type=int, default=0, help='most monks of G1')
+    parser.add_argument('--monks2', type=int, default=0, help='most monks of G2')
+    parser.add_argument('-o', '--output', default='solution.bin', help='table file to write')
+    args = parser.parse_args(argv)
+
+    solver = RetrogradeSolver(args.monks1, args.monks2)
+    start = perf_counter()
+    values = solver.solve()
+    seconds = perf_counter() - start
+    results = [value & 0x3 for value in values.values()]
+    print(f'{len(values)} positions solved in {seconds:.1f} s: '
+          f'{results.count(SolutionTable.WIN)} wins, {results.count(SolutionTable.LOSS)} losses, '
+          f'{results.count(SolutionTable.DRAW)} draws for the player to move')
+    solver.write(args.output)
+    print(f'Table written to {args.output}')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
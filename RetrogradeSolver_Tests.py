@@ -0,0 +1,50 @@
+from random import Random
+from RetrogradeSolver import RetrogradeSolver
+from SolutionTable import SolutionTable
+
+
+def test_solution_is_consistent(tmp_path) -> None:
+    """
+    This test solves the positions with grandmasters only, writes them to a
+    table file and checks a sample of them against the rules of OnitamaGame:
+    a win needs a move to a loss one ply shorter, a loss needs every move to
+    lead to a win and the longest of them one ply shorter, and the best turn
+    of the table reaches the position it promises.
+    """
+    solver = RetrogradeSolver()
+    values = solver.solve()
+    path = str(tmp_path / 'solution.bin')
+    solver.write(path)
+    table = SolutionTable(path)
+    try:
+        assert table.count == len(values)
+        rng = Random(0)
+        for key in rng.sample(sorted(values), 300):
+            game = SolutionTable.get_game(key)
+            assert SolutionTable.get_key(game) == key
+            result, distance = table.probe(game)
+            assert (result, distance) == (values[key] & 0x3, values[key] >> 2)
+            children = []
+            for style_turns in game.whose_turn.get_valid_turns().values():
+                for turn in style_turns:
+                    game.make_move(turn.row_o, turn.col_o, turn.row_d, turn.col_d, turn.style_name)
+                    children.append(table.probe(game))
+                    game.unmake_move()
+            if result == SolutionTable.WIN:
+                assert (SolutionTable.LOSS, distance - 1) in children
+                assert min(d for r, d in children if r == SolutionTable.LOSS) == distance - 1
+            elif result == SolutionTable.LOSS:
+                assert all(r == SolutionTable.WIN for r, _ in children)
+                assert max(d for _, d in children) == distance - 1
+            turn = table.get_best_turn(game)
+            game.make_move(turn.row_o, turn.col_o, turn.row_d, turn.col_d, turn.style_name)
+            if result != SolutionTable.DRAW:
+                assert table.probe(game) == ({SolutionTable.WIN: SolutionTable.LOSS,
+                                              SolutionTable.LOSS: SolutionTable.WIN}[result], distance - 1)
+    finally:
+        table.close()
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main(['RetrogradeSolver_Tests.py'])
@@ -0,0 +1,239 @@
+from __future__ import annotations
+import argparse
+import importlib
+import json
+import os
+import random
+import sys
+from ast import literal_eval
+from multiprocessing import get_context
+from time import perf_counter
+from typing import Dict, Iterator, List, TextIO, Tuple, Union
+from Move import Move
+from OnitamaGame import OnitamaGame
+from Player import Player
+from Pieces import Pieces
+
+
+class Simulator:
+    """
+    A class which plays games of Onitama between two computer players without
+    the GUI, spread over a pool of worker processes.
+
+    Players are given as specs: the name of a Player subclass optionally
+    followed by keyword arguments, e.g. 'PlayerRandom' or
+    'PlayerAlphaBeta:time_limit=0.05,max_depth=4'. A name without a module
+    is looked up in the module of the same name (or Player for PlayerRandom);
+    'module.Class' names any other Player subclass.
+
+    Every game seeds Python's random module from the simulator's seed and the
+    game's index, so a run is reproducible whatever the number of workers.
+
+    === Attributes ===
+    CAPTURE : Win type of a game won by capturing the other grandmaster.
+    THRONE : Win type of a game won by reaching the opposite middle square.
+    size : Size of the board.
+    player1 : Spec of the player playing G1.
+    player2 : Spec of the player playing G2.
+    max_plies : Plies after which a game is stopped as a draw.
+    workers : Number of worker processes.
+    seed : Seed from which every game's seed is derived.
+    record : Whether each result lists the turns of its game (see OpeningBook).
+    """
+    CAPTURE: str = 'capture'
+    THRONE: str = 'throne'
+    size: int
+    player1: str
+    player2: str
+    max_plies: int
+    workers: int
+    seed: int
+    record: bool
+
+    def __init__(self, player1: str = 'PlayerRandom', player2: str = 'PlayerRandom', size: int = 5,
+                 max_plies: int = 500, workers: Union[int, None] = None, seed: int = 0,
+                 record: bool = False) -> None:
+        """
+        Initializes a simulator for games between <player1> and <player2>.
+        """
+        self.size = size
+        self.player1 = player1
+        self.player2 = player2
+        self.max_plies = max_plies
+        self.workers = workers if workers is not None else os.cpu_count() or 1
+        self.seed = seed
+        self.record = record
+
+    def run(self, games: int, output: Union[TextIO, None] = None, chunk_size: int = 64) -> Dict:
+        """
+        Plays <games> games, writing each result to <output> as one JSON line as
+        soon as it arrives, and returns a summary of the run. Results arrive in
+        chunks of <chunk_size> games per worker task.
+
+        >>> summary = Simulator(workers=1, seed=3).run(20)
+        >>> summary['games'], summary['wins'][Pieces.G1] + summary['wins'][Pieces.G2] + summary['draws']
+        (20, 20)
+        """
+        start = perf_counter()
+        summary = {'games': 0, 'wins': {Pieces.G1: 0, Pieces.G2: 0}, 'draws': 0,
+                   'win_types': {self.CAPTURE: 0, self.THRONE: 0}, 'plies': 0}
+        chunks = [(self, list(range(first, min(first + chunk_size, games))))
+                  for first in range(0, games, chunk_size)]
+        if self.workers == 1:
+            results = map(Simulator._play_chunk, chunks)
+            self._collect(results, output, summary)
+        else:
+            with get_context('spawn').Pool(self.workers) as pool:
+                self._collect(pool.imap_unordered(Simulator._play_chunk, chunks), output, summary)
+        summary['seconds'] = perf_counter() - start
+        summary['games_per_minute'] = summary['games'] * 60 / summary['seconds'] if summary['seconds'] else 0.0
+        return summary
+
+    @staticmethod
+    def _collect(results: Iterator[List[Dict]], output: Union[TextIO, None], summary: Dict) -> None:
+        """
+        Writes every result of <results> to <output> and adds it to <summary>.
+        """
+        for chunk in results:
+            for result in chunk:
+                if output is not None:
+                    output.write(json.dumps(result) + '\n')
+                summary['games'] += 1
+                summary['plies'] += result['plies']
+                if result['winner'] is None:
+                    summary['draws'] += 1
+                else:
+                    summary['wins'][result['winner']] += 1
+                    summary['win_types'][result['win_type']] += 1
+            if output is not None:
+                output.flush()
+
+    @staticmethod
+    def _play_chunk(chunk: Tuple[Simulator, List[int]]) -> List[Dict]:
+        """
+        Plays the games with the given indices and returns their results.
+        """
+        simulator, indices = chunk
+        return [simulator.play_game(index) for index in indices]
+
+    def play_game(self, index: int) -> Dict:
+        """
+        Plays game number <index> and returns its result: the game index, the
+        winner's token (None for a draw), the number of plies and the win type,
+        and with <record> the turns played as packed moves (see Move).
+
+        >>> result = Simulator(seed=1).play_game(0)
+        >>> result == Simulator(seed=1).play_game(0)
+        True
+        """
+        random.seed(f'{self.seed}:{index}')
+        game = OnitamaGame(self.size, self.make_player(self.player1, Pieces.G1),
+                           self.make_player(self.player2, Pieces.G2))
+        plies = 0
+        moves = []
+        while game.get_winner() is None and plies < self.max_plies:
+            turn = game.whose_turn.get_turn()
+            if turn is None or not game.move(turn.row_o, turn.col_o, turn.row_d, turn.col_d, turn.style_name):
+                break
+            if self.record:
+                moves.append(Move.from_turn(game, turn))
+            plies += 1
+        winner = game.get_winner()
+        for player in (game.player1, game.player2):
+            if hasattr(player, 'close'):
+                player.close()
+        result = {'game': index,
+                  'winner': winner.player_id if winner is not None else None,
+                  'plies': plies,
+                  'win_type': self.get_win_type(game)}
+        if self.record:
+            result['moves'] = moves
+        return result
+
+    @staticmethod
+    def get_win_type(game: OnitamaGame) -> Union[str, None]:
+        """
+        Returns THRONE if a grandmaster of <game> stands on the opposite middle
+        square, CAPTURE if a grandmaster was captured, and None otherwise.
+
+        >>> game = OnitamaGame(5)
+        >>> game.move(0, 2, 1, 2, 'crab')
+        True
+        >>> game.move(4, 2, 1, 2, 'mantis')
+        True
+        >>> Simulator.get_win_type(game)
+        'capture'
+        """
+        size = game.size
+        middle = size // 2
+        if middle in game.get_grandmasters(Pieces.G2) or \
+                (size - 1) * size + middle in game.get_grandmasters(Pieces.G1):
+            return Simulator.THRONE
+        if game.get_winner() is not None:
+            return Simulator.CAPTURE
+        return None
+
+    @staticmethod
+    def make_player(spec: str, player_id: str) -> Player:
+        """
+        Returns a new player with <player_id> built from the player <spec>.
+
+        >>> player = Simulator.make_player('PlayerAlphaBeta:time_limit=None,max_depth=2', Pieces.G1)
+        >>> type(player).__name__, player.max_depth, player.player_id
+        ('PlayerAlphaBeta', 2, 'X')
+        """
+        name, _, arguments = spec.partition(':')
+        kwargs = {}
+        for argument in filter(None, arguments.split(',')):
+            key, _, value = argument.partition('=')
+            try:
+                kwargs[key.strip()] = literal_eval(value.strip())
+            except (ValueError, SyntaxError):
+                kwargs[key.strip()] = value.strip()
+        if '.' in name:
+            module_name, _, class_name = name.rpartition('.')
+        else:
+            module_name, class_name = ('Player' if name == 'PlayerRandom' else name), name
+        player_class = getattr(importlib.import_module(module_name), class_name)
+        if not issubclass(player_class, Player):
+            raise TypeError(f'{name} is not a Player subclass')
+        return player_class(player_id, **kwargs)
+
+
+def main(argv: Union[List[str], None] = None) -> None:
+    """
+    Runs the simulator from the command line and prints a summary.
+    """
+    parser = argparse.ArgumentParser(description='Play Onitama games between two computer players without the GUI.')
+    parser.add_argument('-n', '--games', type=int, default=1000, help='number of games to play')
+    parser.add_argument('--player1', default='PlayerRandom', help='spec of the G1 player')
+    parser.add_argument('--player2', default='PlayerRandom', help='spec of the G2 player')
+    parser.add_argument('--size', type=int, default=5, help='size of the board')
+    parser.add_argument('--max-plies', type=int, default=500, help='plies after which a game is a draw')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: all cores)')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the run')
+    parser.add_argument('--chunk-size', type=int, default=64, help='games per worker task')
+    parser.add_argument('-o', '--output', default=None, help='JSON lines file for the results (default: none)')
+    parser.add_argument('--record', action='store_true', help='list the turns of each game in its result')
+    args = parser.parse_args(argv)
+
+    simulator = Simulator(args.player1, args.player2, args.size, args.max_plies, args.workers, args.seed,
+                          args.record)
+    output = open(args.output, 'w') if args.output else None
+    try:
+        summary = simulator.run(args.games, output, args.chunk_size)
+    finally:
+        if output is not None:
+            output.close()
+    games = summary['games']
+    print(f"{games} games in {summary['seconds']:.2f} s on {simulator.workers} workers "
+          f"({summary['games_per_minute']:.0f} games/min)")
+    print(f"{args.player1} (G1) wins: {summary['wins'][Pieces.G1]}, "
+          f"{args.player2} (G2) wins: {summary['wins'][Pieces.G2]}, draws: {summary['draws']}")
+    print(f"by capture: {summary['win_types'][Simulator.CAPTURE]}, "
+          f"by throne: {summary['win_types'][Simulator.THRONE]}, "
+          f"mean length: {summary['plies'] / games if games else 0:.1f} plies")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,204 @@
+from __future__ import annotations
+import mmap
+import struct
+from itertools import permutations
+from typing import Dict, List, Tuple, Union
+from OnitamaGame import OnitamaGame
+from Pieces import Pieces
+from Turn import Turn
+
+
+class SolutionTable:
+    """
+    A read-only file of solved Onitama positions of the 5x5 game with the five
+    styles of OnitamaBoard.construct_styles, written by RetrogradeSolver. The
+    file is memory-mapped, so a position is probed in constant time without
+    reading the table into memory.
+
+    A position is keyed by one 64-bit integer,
+        (board * 30 + styles) * 2 + side,
+    where board is the 25 squares as base-5 digits (square row * 5 + col is
+    the digit of 5 ** square: 0 for EMPTY, 1 for M1, 2 for G1, 3 for M2, 4 for
+    G2), styles is the index in STYLE_OWNERS of the style owners and side is 1
+    if it is G2's turn. The file is a header followed by an open-addressed
+    hash table of (key, value) slots; a value is the result for the player to
+    move (WIN, LOSS or DRAW) plus the distance in plies to the end of the game
+    shifted left by two bits.
+
+    === Attributes ===
+    WIN, LOSS, DRAW : Results for the player to move.
+    STYLE_OWNERS : Every assignment of the style owners: two styles each and one spare.
+    path : Path of the file.
+    capacity : Number of slots.
+    count : Number of positions stored.
+
+    === Private Attributes ===
+    _file : The open file.
+    _map : The memory map of the file.
+    """
+    WIN: int = 1
+    LOSS: int = 2
+    DRAW: int = 3
+    STYLE_OWNERS: List[Tuple[str, ...]] = sorted(set(permutations(
+        (Pieces.G1, Pieces.G1, Pieces.G2, Pieces.G2, Pieces.EMPTY))))
+    _STYLE_INDEX: Dict[Tuple[str, ...], int] = {owners: i for i, owners in enumerate(STYLE_OWNERS)}
+    _CODES = {Pieces.EMPTY: 0, Pieces.M1: 1, Pieces.G1: 2, Pieces.M2: 3, Pieces.G2: 4}
+    _MAGIC = b'ONISOLV1'
+    _HEADER = struct.Struct('<8sQQ')
+    _SLOT = struct.Struct('<QH')
+    _MULTIPLIER = 0x9E3779B97F4A7C15
+    path: str
+    capacity: int
+    count: int
+
+    def __init__(self, path: str) -> None:
+        """
+        Opens the table file at <path>.
+        """
+        self.path = path
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.capacity, self.count = self._HEADER.unpack_from(self._map, 0)
+        if magic != self._MAGIC:
+            self.close()
+            raise ValueError(f'{path} is not a solution table')
+
+    def close(self) -> None:
+        """
+        Closes the table file.
+        """
+        self._map.close()
+        self._file.close()
+
+    @classmethod
+    def _slot(cls, key: int, capacity: int) -> int:
+        """
+        Returns the first slot probed for <key> in a table of <capacity> slots,
+        a power of two.
+        """
+        return (key * cls._MULTIPLIER & 0xFFFFFFFFFFFFFFFF) >> (65 - capacity.bit_length())
+
+    @classmethod
+    def write(cls, path: str, values: Dict[int, int]) -> None:
+        """
+        Writes the positions of <values>, which maps keys to values, to a new
+        table file at <path>, keeping at most half of the slots in use.
+        """
+        capacity = 1
+        while capacity < 2 * len(values):
+            capacity *= 2
+        data = bytearray(cls._HEADER.size + capacity * cls._SLOT.size)
+        cls._HEADER.pack_into(data, 0, cls._MAGIC, capacity, len(values))
+        for key, value in values.items():
+            slot = cls._slot(key, capacity)
+            while cls._SLOT.unpack_from(data, cls._HEADER.size + slot * cls._SLOT.size)[0]:
+                slot = (slot + 1) & (capacity - 1)
+            cls._SLOT.pack_into(data, cls._HEADER.size + slot * cls._SLOT.size, key, value)
+        with open(path, 'wb') as file:
+            file.write(data)
+
+    def probe_key(self, key: int) -> Union[int, None]:
+        """
+        Returns the value stored for <key>, or None if the table does not hold it.
+        """
+        slot = self._slot(key, self.capacity)
+        while True:
+            stored, value = self._SLOT.unpack_from(self._map, self._HEADER.size + slot * self._SLOT.size)
+            if stored == key:
+                return value
+            if stored == 0:
+                return None
+            slot = (slot + 1) & (self.capacity - 1)
+
+    @classmethod
+    def get_key(cls, game: OnitamaGame) -> Union[int, None]:
+        """
+        Returns the key of the current position of <game>, or None if the game
+        is not the 5x5 game the table covers.
+
+        >>> game = OnitamaGame(5)
+        >>> SolutionTable.get_key(game) % 2, SolutionTable.get_key(game) != 0
+        (0, True)
+        """
+        if game.size != 5:
+            return None
+        owners = tuple(sty.owner for sty in game.get_styles())
+        styles = cls._STYLE_INDEX.get(owners)
+        if styles is None:
+            return None
+        board = 0
+        for row in range(4, -1, -1):
+            for col in range(4, -1, -1):
+                board = board * 5 + cls._CODES[game.get_token(row, col)]
+        return (board * 30 + styles) * 2 + (game.whose_turn is game.player2)
+
+    @classmethod
+    def get_game(cls, key: int) -> OnitamaGame:
+        """
+        Returns a new 5x5 OnitamaGame in the position with <key>.
+
+        >>> game = SolutionTable.get_game(SolutionTable.get_key(OnitamaGame(5)))
+        >>> game.get_board() == OnitamaGame(5).get_board(), game.whose_turn is game.player1
+        (True, True)
+        """
+        board, side = divmod(key, 2)
+        board, styles = divmod(board, 30)
+        tokens = (Pieces.EMPTY, Pieces.M1, Pieces.G1, Pieces.M2, Pieces.G2)
+        rows = [[Pieces.EMPTY] * 5 for _ in range(5)]
+        for square in range(25):
+            board, code = divmod(board, 5)
+            rows[square // 5][square % 5] = tokens[code]
+        game = OnitamaGame(5)
+        game.set_board(5, rows)
+        game.set_style_owners(list(cls.STYLE_OWNERS[styles]))
+        game.whose_turn = game.player2 if side else game.player1
+        return game
+
+    def probe(self, game: OnitamaGame) -> Union[Tuple[int, int], None]:
+        """
+        Returns the (result, distance) of the current position of <game> for
+        the player to move, or None if the table does not hold it. A finished
+        game is a result at distance 0.
+        """
+        winner = game.get_winner()
+        if winner is not None:
+            return (self.WIN if winner is game.whose_turn else self.LOSS), 0
+        key = self.get_key(game)
+        value = None if key is None else self.probe_key(key)
+        if value is None:
+            return None
+        return value & 0x3, value >> 2
+
+    def get_best_turn(self, game: OnitamaGame) -> Union[Turn, None]:
+        """
+        Returns a perfect turn for the player to move in <game>: the fastest
+        win, else a move keeping the draw, else the slowest loss. Returns None
+        if the game is over or the table does not hold every position the
+        turns lead to. The game is left as it was found.
+        """
+        if game.get_winner() is not None:
+            return None
+        best, best_rank = None, None
+        for style_turns in game.whose_turn.get_valid_turns().values():
+            for turn in style_turns:
+                game.make_move(turn.row_o, turn.col_o, turn.row_d, turn.col_d, turn.style_name)
+                child = self.probe(game)
+                game.unmake_move()
+                if child is None:
+                    return None
+                result, distance = child
+                # Rank turns so that a smaller rank is better for the mover.
+                if result == self.LOSS:
+                    rank = (0, distance)
+                elif result == self.DRAW:
+                    rank = (1, 0)
+                else:
+                    rank = (2, -distance)
+                if best_rank is None or rank < best_rank:
+                    best, best_rank = turn, rank
+        return best
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -1,35 +1,83 @@
 from __future__ import annotations
 from typing import List, Tuple, Union
 from Pieces import Pieces
+from StyleDefinition import StyleDefinition
 
 
 class Style:
     """
-    This class initializes a style.
-    
-    >>> style = Style([-2, 1]), 'style', Pieces.G1)
+    This class represents a style card: an interned, immutable
+    StyleDefinition and the card's owner. The styles of a board are bound to
+    it, and their owner is read from and written to the board's compact
+    owner assignment (see OnitamaBoard.get_style_assignment), so exchanging
+    styles or copying a position never copies move lists. A style which is
+    not bound to a board, such as a copy, keeps its own owner.
+
+    >>> style = Style([(-2, 1)], 'style', Pieces.G1)
     >>> style.get_moves()
-    [-2, 1]
-    >>> style.copy()
-    Style([-2, 1]), 'style', Pieces.G1)
+    [(-2, 1)]
+    >>> style.__copy__() == style, style.definition is Style([(-2, 1)], 'style').definition
+    (True, True)
+
+    === Attributes ===
+    definition : The name and moves of the style, shared by every style with the same ones.
+
+    === Private Attributes ===
+    _owner : The owner of a style which is not bound to a board.
+    _board : The board the style is bound to, or None.
+    _index : The index of the style in the styles of its board.
     """
-    name: str
-    _moves: List[Tuple]
-    owner: str
+    __slots__ = ('definition', '_owner', '_board', '_index')
+    definition: StyleDefinition
+    _owner: str
+    _board: Union[object, None]
+    _index: int
 
     def __init__(self, pairs: List[Tuple], name: str, owner: str = Pieces.EMPTY) -> None:
         """
         This class initializes a style object.
         """
-        self.name = name
-        self._moves = pairs.copy()
-        self.owner = owner
+        self.definition = StyleDefinition.get(name, pairs)
+        self._owner = owner
+        self._board = None
+        self._index = -1
+
+    def bind(self, board, index: int) -> None:
+        """
+        Makes <board>, whose styles hold this style at <index>, the keeper of
+        this style's owner from now on.
+        """
+        self._board = board
+        self._index = index
+
+    @property
+    def name(self) -> str:
+        """
+        The name of the style.
+        """
+        return self.definition.name
+
+    @property
+    def owner(self) -> str:
+        """
+        The token of the player owning the style, or EMPTY for the spare style.
+        """
+        if self._board is None:
+            return self._owner
+        return self._board.get_style_owner(self._index)
+
+    @owner.setter
+    def owner(self, owner: str) -> None:
+        if self._board is None:
+            self._owner = owner
+        else:
+            self._board.set_style_owner(self._index, owner)
 
     def get_moves(self) -> List[Tuple]:
         """
         This method copies and returns the movement rules for the style.
         """
-        return self._moves.copy()
+        return list(self.definition.moves)
 
     def __eq__(self, other: Style) -> bool:
         """
@@ -39,6 +87,18 @@ class Style:
 
     def __copy__(self) -> Style:
         """
-        This method creates a copy of the style 'self' and returns it
+        This method creates a copy of the style 'self', not bound to any
+        board, and returns it
+        """
+        style = Style.__new__(Style)
+        style.definition = self.definition
+        style._owner = self.owner
+        style._board = None
+        style._index = -1
+        return style
+
+    def __repr__(self) -> str:
+        """
+        Returns the name of the style.
         """
-        return Style(self._moves.copy(), self.name, self.owner)
+        return self.name
@@ -1,8 +1,5 @@
 # Import the pygame module
 import pygame
-from pygame.locals import (
-    BLEND_MULT,
-)
 
 from Entity import Entity
 from OnitamaGame import OnitamaGame
@@ -16,6 +13,8 @@ class StyleCard(Entity):
     """
     A class to represent and display a Style of Onitama.
     """
+    # The colours the card is tinted with when it is not hovered.
+    tints: Tuple[Tuple[int, int, int, int], ...]
 
     def __init__(self, screen: pygame.Surface, onitama: OnitamaGame, player_id: str, style_name: str, style_images: StyleImages, offset_x: int, offset_y: int):
         """
@@ -26,28 +25,33 @@ class StyleCard(Entity):
         self.style_name = style_name
         self.style_images = style_images
         self.player_id = player_id
+        self.tints = ()
 
     def hover(self, mouse_pos: Tuple[int, int]):
         if self.img_rect and self.img_rect.collidepoint(mouse_pos):
             color = self.COLOR_VALID if self.player_id == self.onitama.whose_turn.player_id else self.COLOR_INVALID
-            self.img.fill(color, special_flags=BLEND_MULT)
+            self.img = self.style_images.get_sprite(self.style_name, self.tints + (color,), self.get_rotation())
             self.img_rect = self.screen.blit(self.img, self.rect[0:2])
             return True
         return False
 
-    def draw(self):
-        self.img = self.style_images.get_image(self.style_name)
-        # Rotate image if player1.
-        if self.player_id == Pieces.G1:
-            self.img = pygame.transform.rotate(self.img, 180)
+    def get_rotation(self) -> int:
+        """
+        Returns the rotation of the card in degrees: player1's cards face them.
+        """
+        return 180 if self.player_id == Pieces.G1 else 0
 
+    def draw(self):
+        tints = []
         # If it is not the current player's style, add a grayed out tint
         if self.player_id != self.onitama.whose_turn.player_id:
-            self.img.fill(self.COLOR_GRAYED, special_flags=BLEND_MULT)
+            tints.append(self.COLOR_GRAYED)
 
         # If this style has been clicked, then set a color on it.
         if self.clicked:
             color = self.COLOR_VALID if self.player_id == self.onitama.whose_turn.player_id else self.COLOR_INVALID
-            self.img.fill(color, special_flags=BLEND_MULT)
-
+            tints.append(color)
+        self.tints = tuple(tints)
+        # The card sprites are rotated and tinted once and cached, so drawing is one blit.
+        self.img = self.style_images.get_sprite(self.style_name, self.tints, self.get_rotation())
         self.img_rect = self.screen.blit(self.img, self.rect[0:2])
@@ -0,0 +1,94 @@
+from __future__ import annotations
+from typing import Dict, List, Tuple
+from Pieces import Pieces
+
+
+class StyleDefinition:
+    """
+    The immutable definition of a movement style: its name and its moves.
+    Definitions are interned, so every Style with the same name and moves, in
+    every game, shares one definition, which can be compared by identity and
+    used as a dictionary key (see MoveGenerator.get_destinations). Who owns a
+    style is not part of its definition but of the board it is on.
+
+    >>> crab = StyleDefinition.get('crab', [(-1, 0), (0, -2), (0, 2)])
+    >>> crab is StyleDefinition.get('crab', [(-1, 0), (0, -2), (0, 2)])
+    True
+    >>> crab.get_moves(Pieces.G1)
+    ((1, 0), (0, 2), (0, -2))
+    >>> crab.name = 'horse'
+    Traceback (most recent call last):
+    ...
+    AttributeError: StyleDefinition is immutable
+
+    === Attributes ===
+    name : The name of the style.
+    moves : The (row, col) offsets of the style's moves, as seen by G2.
+
+    === Private Attributes ===
+    _side_moves : The moves as seen by G1, which plays towards the other side, and by G2.
+    _interned : Every definition created, keyed by (name, moves).
+    """
+    __slots__ = ('name', 'moves', '_side_moves')
+    _interned: Dict[Tuple[str, Tuple[Tuple[int, int], ...]], StyleDefinition] = {}
+    name: str
+    moves: Tuple[Tuple[int, int], ...]
+    _side_moves: Dict[str, Tuple[Tuple[int, int], ...]]
+
+    def __init__(self, name: str, moves: Tuple[Tuple[int, int], ...]) -> None:
+        """
+        Initializes a definition. Use get, which returns the interned one.
+        """
+        flipped = tuple((-d_row, -d_col) for d_row, d_col in moves)
+        object.__setattr__(self, 'name', name)
+        object.__setattr__(self, 'moves', moves)
+        object.__setattr__(self, '_side_moves', {Pieces.G1: flipped, Pieces.G2: moves})
+
+    @classmethod
+    def get(cls, name: str, moves: List[Tuple[int, int]]) -> StyleDefinition:
+        """
+        Returns the definition of the style <name> with <moves>, creating it
+        the first time it is asked for.
+        """
+        key = (name, tuple((d_row, d_col) for d_row, d_col in moves))
+        definition = cls._interned.get(key)
+        if definition is None:
+            definition = cls._interned[key] = cls(*key)
+        return definition
+
+    def get_moves(self, side: str) -> Tuple[Tuple[int, int], ...]:
+        """
+        Returns the moves of the style for the player <side>: the moves of G1
+        are flipped, as G1 plays from row 0 towards the last row.
+        """
+        return self._side_moves.get(side, self.moves)
+
+    def __setattr__(self, name: str, value: object) -> None:
+        """
+        Prevents changing a definition, which is shared.
+        """
+        raise AttributeError('StyleDefinition is immutable')
+
+    def __delattr__(self, name: str) -> None:
+        """
+        Prevents changing a definition, which is shared.
+        """
+        raise AttributeError('StyleDefinition is immutable')
+
+    def __reduce__(self) -> Tuple:
+        """
+        Pickles a definition as its name and moves, so unpickling returns the
+        interned definition.
+        """
+        return StyleDefinition.get, (self.name, self.moves)
+
+    def __repr__(self) -> str:
+        """
+        Returns the name of the style.
+        """
+        return self.name
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -1,5 +1,7 @@
 import pygame
+from typing import Union
 
+from AssetManager import AssetManager
 from ImageGenerator import ImageGenerator
 
 
@@ -12,18 +14,18 @@ class StyleImages(ImageGenerator):
     HORSE: str = 'horse'
     MANTIS: str = 'mantis'
     ROOSTER: str = 'rooster'
+    FILES = {
+        CRAB:  'crab',
+        DRAGON: 'dragon',
+        HORSE: 'horse',
+        MANTIS: 'mantis',
+        ROOSTER: 'rooster'
+    }
 
-    def __init__(self, pygame: pygame, width: int, height: int) -> None:
+    def __init__(self, pygame: pygame, width: int, height: int,
+                 assets: Union[AssetManager, None] = None) -> None:
         """
         Initialize all of the pygame images based on the images in the assets folder.
         """
-        super().__init__(pygame)
-        images = {
-            self.CRAB:  'crab',
-            self.DRAGON: 'dragon',
-            self.HORSE: 'horse',
-            self.MANTIS: 'mantis',
-            self.ROOSTER: 'rooster'
-        }
-        self.add_images(images)
-        self.scale_images(width, height)
+        super().__init__(pygame, assets, (width, height))
+        self.add_images(self.FILES)
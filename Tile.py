@@ -1,11 +1,9 @@
 # Import the pygame module
 import pygame
-from pygame.locals import (
-    BLEND_MULT,
-)
 from Entity import Entity
 from OnitamaGame import OnitamaGame
 from Pieces import Pieces
+from PieceImages import PieceImages
 
 from typing import Tuple
 
@@ -18,8 +16,10 @@ class Tile(Entity):
     height: int = 100
     row: int
     col: int
+    # The colours the piece is tinted with when it is not hovered.
+    tints: Tuple[Tuple[int, int, int, int], ...]
 
-    def __init__(self, screen: pygame.Surface, onitama: OnitamaGame, pieces: Pieces, row: int, col: int, offset_x: int = (1000 - 5 * 100) // 2, offset_y: int = (800 - 5 * 100) // 2):
+    def __init__(self, screen: pygame.Surface, onitama: OnitamaGame, pieces: PieceImages, row: int, col: int, offset_x: int = (1000 - 5 * 100) // 2, offset_y: int = (800 - 5 * 100) // 2):
         """
         Initialize this tile.
         """
@@ -28,34 +28,28 @@ class Tile(Entity):
         self.pieces = pieces
         self.row = row
         self.col = col
+        self.tints = ()
 
     def hover(self, mouse_pos: Tuple[int, int]):
         if self.img_rect and self.img_rect.collidepoint(mouse_pos):
-            token = self.onitama.get_token(self.row, self.col).lower()
-            color = self.COLOR_VALID if token == self.onitama.whose_turn.player_id.lower(
+            token = self.onitama.get_token(self.row, self.col)
+            color = self.COLOR_VALID if token.lower() == self.onitama.whose_turn.player_id.lower(
             ) else self.COLOR_INVALID
-            self.img.fill(color, special_flags=BLEND_MULT)
+            self.img = self.pieces.get_tile_sprite(token, self.row, self.col, self.tints + (color,))
             self.img_rect = self.screen.blit(self.img, self.rect)
             return True
         return False
 
     def draw(self):
         token = self.onitama.get_token(self.row, self.col)
-        self.img = self.pieces.get_image(Pieces.EMPTY, self.row, self.col)
-
-        self.img_rect = self.screen.blit(self.img,
-                                         self.rect)
-        if token != Pieces.EMPTY:
-            # Draw the token image on top of the background
-            self.img = self.pieces.get_image(token, self.row, self.col)
-            self.img.set_colorkey((0, 0, 0))
-
         if self.clicked:
             color = self.COLOR_VALID if token.lower() == self.onitama.whose_turn.player_id.lower(
             ) else self.COLOR_INVALID
-            self.img.fill(color, special_flags=BLEND_MULT)
-            self.img_rect = self.screen.blit(self.img, self.rect)
+            self.tints = (color,)
         elif self.highlighted:
-            self.img.fill(self.HIGHLIGHTED_COLOR, special_flags=BLEND_MULT)
-            self.img_rect = self.screen.blit(self.img, self.rect)
+            self.tints = (self.HIGHLIGHTED_COLOR,)
+        else:
+            self.tints = ()
+        # The tile sprites are tinted once and cached, so drawing is one blit.
+        self.img = self.pieces.get_tile_sprite(token, self.row, self.col, self.tints)
         self.img_rect = self.screen.blit(self.img, self.rect)
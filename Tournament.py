@@ -0,0 +1,236 @@
+from __future__ import annotations
+import argparse
+import json
+import os
+import sys
+from multiprocessing import get_context
+from time import perf_counter
+from typing import Dict, Iterator, List, TextIO, Tuple, Union
+from Pieces import Pieces
+from Ratings import Ratings
+from Simulator import Simulator
+
+
+class Tournament:
+    """
+    A class which plays a tournament between computer players, spread over a
+    pool of worker processes, and rates them.
+
+    Players are Simulator specs, e.g. 'PlayerRandom' or
+    'PlayerAlphaBeta:time_limit=0.05,max_depth=4'; the same class may enter
+    several times with different parameters. In a ROUND_ROBIN every player
+    meets every other, and in a GAUNTLET the first player meets every other.
+    Each pairing plays <games_per_pair> games, the players taking turns to
+    play G1, which moves first. The games are played round by round, every
+    pairing playing one game per round, so ratings from a run stopped early
+    are not biased towards some pairings.
+
+    Every game is played by Simulator.play_game with the tournament's seed and
+    the game's number, so a tournament is reproducible whatever the number of
+    workers.
+
+    >>> tournament = Tournament(['PlayerRandom', 'PlayerAlphaBeta:time_limit=None,max_depth=1',
+    ...                          'PlayerRandom'], games_per_pair=2)
+    >>> tournament.get_schedule()
+    [(0, 0, 1), (1, 0, 2), (2, 1, 2), (3, 1, 0), (4, 2, 0), (5, 2, 1)]
+
+    === Attributes ===
+    ROUND_ROBIN : Mode in which every player meets every other.
+    GAUNTLET : Mode in which the first player meets every other.
+    players : Specs of the players.
+    mode : ROUND_ROBIN or GAUNTLET.
+    games_per_pair : Games each pairing plays.
+    size : Size of the board.
+    max_plies : Plies after which a game is stopped as a draw.
+    workers : Number of worker processes.
+    seed : Seed from which every game's seed is derived.
+    """
+    ROUND_ROBIN: str = 'round-robin'
+    GAUNTLET: str = 'gauntlet'
+    players: List[str]
+    mode: str
+    games_per_pair: int
+    size: int
+    max_plies: int
+    workers: int
+    seed: int
+
+    def __init__(self, players: List[str], mode: str = ROUND_ROBIN, games_per_pair: int = 2, size: int = 5,
+                 max_plies: int = 500, workers: Union[int, None] = None, seed: int = 0) -> None:
+        """
+        Initializes a tournament between <players>.
+        """
+        if mode not in (self.ROUND_ROBIN, self.GAUNTLET):
+            raise ValueError(f'unknown mode {mode}')
+        if len(players) < 2:
+            raise ValueError('a tournament needs at least two players')
+        self.players = list(players)
+        self.mode = mode
+        self.games_per_pair = games_per_pair
+        self.size = size
+        self.max_plies = max_plies
+        self.workers = workers if workers is not None else os.cpu_count() or 1
+        self.seed = seed
+
+    def get_pairings(self) -> List[Tuple[int, int]]:
+        """
+        Returns the pairs of players who meet, as indices into <players>.
+
+        >>> Tournament(['PlayerRandom'] * 3, Tournament.GAUNTLET).get_pairings()
+        [(0, 1), (0, 2)]
+        """
+        count = len(self.players)
+        if self.mode == self.GAUNTLET:
+            return [(0, other) for other in range(1, count)]
+        return [(first, second) for first in range(count) for second in range(first + 1, count)]
+
+    def get_schedule(self) -> List[Tuple[int, int, int]]:
+        """
+        Returns every game of the tournament as (game number, player of G1,
+        player of G2), round by round.
+        """
+        schedule = []
+        for round_number in range(self.games_per_pair):
+            for first, second in self.get_pairings():
+                if round_number % 2:
+                    first, second = second, first
+                schedule.append((len(schedule), first, second))
+        return schedule
+
+    def run(self, output: Union[TextIO, None] = None, chunk_size: int = 1) -> Dict:
+        """
+        Plays the tournament, writing each result to <output> as one JSON line
+        as soon as it arrives, and returns its standings (see get_standings)
+        with the time it took. Results arrive in chunks of <chunk_size> games
+        per worker task.
+        """
+        start = perf_counter()
+        schedule = self.get_schedule()
+        chunks = [(self, schedule[first:first + chunk_size]) for first in range(0, len(schedule), chunk_size)]
+        results = []
+        if self.workers == 1:
+            self._collect(map(Tournament._play_chunk, chunks), output, results)
+        else:
+            with get_context('spawn').Pool(self.workers) as pool:
+                self._collect(pool.imap_unordered(Tournament._play_chunk, chunks), output, results)
+        standings = self.get_standings(results)
+        standings['seconds'] = perf_counter() - start
+        return standings
+
+    @staticmethod
+    def _collect(chunks: Iterator[List[Dict]], output: Union[TextIO, None], results: List[Dict]) -> None:
+        """
+        Writes every result of <chunks> to <output> and adds it to <results>.
+        """
+        for chunk in chunks:
+            for result in chunk:
+                if output is not None:
+                    output.write(json.dumps(result) + '\n')
+                results.append(result)
+            if output is not None:
+                output.flush()
+
+    @staticmethod
+    def _play_chunk(chunk: Tuple[Tournament, List[Tuple[int, int, int]]]) -> List[Dict]:
+        """
+        Plays the scheduled games of <chunk> and returns their results.
+        """
+        tournament, games = chunk
+        return [tournament.play_game(*game) for game in games]
+
+    def play_game(self, index: int, player1: int, player2: int) -> Dict:
+        """
+        Plays game number <index> between the players <player1>, playing G1,
+        and <player2> and returns its result: the result of
+        Simulator.play_game with the indices of the two players.
+        """
+        simulator = Simulator(self.players[player1], self.players[player2], self.size, self.max_plies,
+                              workers=1, seed=self.seed)
+        result = simulator.play_game(index)
+        result['player1'] = player1
+        result['player2'] = player2
+        return result
+
+    def get_standings(self, results: List[Dict], confidence: float = 0.95) -> Dict:
+        """
+        Returns the standings after <results>: the number of 'games', and for
+        each player, best first, a dict in 'players' of its 'index', 'spec',
+        'games', 'wins', 'draws', 'losses', 'score' (the fraction of points
+        won), 'elo' and 'bayes_elo' ratings with their <confidence> intervals
+        as (rating, low, high), and the fitted BayesElo 'advantage' of moving
+        first and 'draw_elo'.
+
+        >>> tournament = Tournament(['PlayerRandom', 'PlayerRandom'])
+        >>> standings = tournament.get_standings([{'player1': 0, 'player2': 1, 'winner': Pieces.G1},
+        ...                                       {'player1': 1, 'player2': 0, 'winner': None}])
+        >>> [(player['index'], player['wins'], player['draws'], player['score']) for player in standings['players']]
+        [(0, 1, 1, 0.75), (1, 0, 1, 0.25)]
+        """
+        ratings = Ratings(len(self.players))
+        players = [{'index': index, 'spec': spec, 'games': 0, 'wins': 0, 'draws': 0, 'losses': 0}
+                   for index, spec in enumerate(self.players)]
+        for result in results:
+            first, second = players[result['player1']], players[result['player2']]
+            first['games'] += 1
+            second['games'] += 1
+            if result['winner'] is None:
+                first['draws'] += 1
+                second['draws'] += 1
+                score = 0.5
+            elif result['winner'] == Pieces.G1:
+                first['wins'] += 1
+                second['losses'] += 1
+                score = 1.0
+            else:
+                first['losses'] += 1
+                second['wins'] += 1
+                score = 0.0
+            ratings.add(result['player1'], result['player2'], score)
+        elo = ratings.elo(confidence=confidence)
+        bayes_elo = ratings.bayes_elo(confidence=confidence)
+        for player in players:
+            games = player['games']
+            player['score'] = (player['wins'] + player['draws'] / 2) / games if games else 0.0
+            player['elo'] = elo[player['index']]
+            player['bayes_elo'] = bayes_elo['ratings'][player['index']]
+        players.sort(key=lambda player: player['bayes_elo'][0], reverse=True)
+        return {'games': len(results), 'players': players,
+                'advantage': bayes_elo['advantage'], 'draw_elo': bayes_elo['draw_elo']}
+
+
+def main(argv: Union[List[str], None] = None) -> None:
+    """
+    Runs a tournament from the command line and prints its standings.
+    """
+    parser = argparse.ArgumentParser(description='Play a tournament between Onitama computer players and rate them.')
+    parser.add_argument('players', nargs='+', help='specs of the players, e.g. PlayerAlphaBeta:time_limit=0.05')
+    parser.add_argument('--mode', choices=(Tournament.ROUND_ROBIN, Tournament.GAUNTLET),
+                        default=Tournament.ROUND_ROBIN, help='who meets whom (gauntlet: the first player meets all)')
+    parser.add_argument('-n', '--games', type=int, default=20, help='games each pairing plays')
+    parser.add_argument('--size', type=int, default=5, help='size of the board')
+    parser.add_argument('--max-plies', type=int, default=500, help='plies after which a game is a draw')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: all cores)')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the run')
+    parser.add_argument('--chunk-size', type=int, default=1, help='games per worker task')
+    parser.add_argument('-o', '--output', default=None, help='JSON lines file for the results (- for stdout)')
+    args = parser.parse_args(argv)
+
+    tournament = Tournament(args.players, args.mode, args.games, args.size, args.max_plies, args.workers, args.seed)
+    output = sys.stdout if args.output == '-' else open(args.output, 'w') if args.output else None
+    try:
+        standings = tournament.run(output, args.chunk_size)
+    finally:
+        if output is not None and output is not sys.stdout:
+            output.close()
+    print(f"{standings['games']} games in {standings['seconds']:.2f} s on {tournament.workers} workers, "
+          f"first move advantage {standings['advantage']:.0f}, draw elo {standings['draw_elo']:.0f}")
+    print(f"{'rank':>4}  {'elo':>14}  {'bayes elo':>14}  {'score':>6}  {'w-d-l':>11}  player")
+    for rank, player in enumerate(standings['players'], 1):
+        elo, low, high = player['elo']
+        bayes_elo, bayes_low, bayes_high = player['bayes_elo']
+        print(f"{rank:>4}  {elo:>6.0f} ±{(high - low) / 2:<6.0f}  {bayes_elo:>6.0f} ±{(bayes_high - bayes_low) / 2:<6.0f}  "
+              f"{player['score']:>6.1%}  {player['wins']:>3}-{player['draws']}-{player['losses']:<3}  {player['spec']}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
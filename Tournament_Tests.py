@@ -0,0 +1,60 @@
+import io
+import json
+from Ratings import Ratings
+from Tournament import Tournament
+
+
+def test_tournament_schedule_and_standings() -> None:
+    """
+    This test runs a small round robin on two worker processes and checks
+    that every pairing played the same number of games with each player
+    moving first, that every result was streamed, that the results match a
+    run on one worker, and that a searching player is rated above a random
+    one.
+    """
+    players = ['PlayerRandom', 'PlayerAlphaBeta:time_limit=None,max_depth=2', 'PlayerRandom']
+    output = io.StringIO()
+    standings = Tournament(players, games_per_pair=6, max_plies=200, workers=2, seed=5).run(output)
+    results = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert standings['games'] == len(results) == 18
+    for first in range(3):
+        for second in range(3):
+            if first != second:
+                assert sum((result['player1'], result['player2']) == (first, second) for result in results) == 3
+    serial = Tournament(players, games_per_pair=6, max_plies=200, workers=1, seed=5).run()
+    assert [(player['index'], player['wins'], player['draws']) for player in serial['players']] == \
+           [(player['index'], player['wins'], player['draws']) for player in standings['players']]
+    best = standings['players'][0]
+    assert best['index'] == 1 and best['games'] == 12
+    for rating, low, high in (best['elo'], best['bayes_elo']):
+        assert low < rating < high and rating > 0
+
+
+def test_ratings_recover_strengths() -> None:
+    """
+    This test checks that both rating models give equal players equal
+    ratings, and that a player scoring 3 of every 4 points is rated about 191
+    Elo above its opponent.
+    """
+    ratings = Ratings(3)
+    for _ in range(200):
+        ratings.add(0, 1, 1.0)
+        ratings.add(1, 0, 0.0)
+        ratings.add(0, 1, 0.5)
+        ratings.add(1, 0, 0.5)
+        ratings.add(1, 2, 1.0)
+        ratings.add(2, 1, 0.0)
+        ratings.add(1, 2, 0.0)
+        ratings.add(2, 1, 1.0)
+    elo = ratings.elo()
+    assert abs(elo[0][0] - elo[1][0] - 191) < 3
+    assert abs(elo[1][0] - elo[2][0]) < 1e-6
+    bayes_elo = ratings.bayes_elo()
+    assert bayes_elo['ratings'][0][0] > bayes_elo['ratings'][1][0]
+    assert abs(bayes_elo['ratings'][1][0] - bayes_elo['ratings'][2][0]) < 1e-6
+    assert abs(sum(rating for rating, _, _ in bayes_elo['ratings'])) < 1e-6
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main(['Tournament_Tests.py'])
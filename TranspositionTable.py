@@ -0,0 +1,140 @@
+from array import array
+from typing import Tuple, Union
+from Move import Move
+
+
+class TranspositionTable:
+    """
+    A fixed-capacity table of search results keyed by the Zobrist hash of a
+    position (see OnitamaGame.get_hash). The capacity follows from a memory
+    limit and never grows. Several search players, or a search player and an
+    analysis tool, can share one table.
+
+    When two positions map to the same slot the replacement policy decides
+    which one is kept:
+        DEPTH_PREFERRED: keep whichever result was searched deeper.
+        AGING: like DEPTH_PREFERRED, but results from an earlier search
+               (see new_search) are always replaced.
+
+    === Attributes ===
+    EXACT, LOWER, UPPER : Whether a stored score is exact, a lower bound or an upper bound.
+    capacity : Number of slots in the table.
+    replacement : The replacement policy, DEPTH_PREFERRED or AGING.
+    probes : Number of calls to probe.
+    hits : Number of calls to probe which found the position.
+
+    === Private Attributes ===
+    _keys : The hash stored in each slot.
+    _data : The depth, bound, age and score of each slot packed into one integer.
+    _moves : The best packed move (see Move) stored in each slot, 0 for none.
+    _age : The age of the current search, between 0 and 255.
+    """
+    EXACT: int = 0
+    LOWER: int = 1
+    UPPER: int = 2
+    DEPTH_PREFERRED: str = 'depth'
+    AGING: str = 'aging'
+    # Bytes used by one slot: two 8-byte array items and one 4-byte move.
+    ENTRY_BYTES: int = 20
+    _SCORE_OFFSET: int = 1 << 31
+    capacity: int
+    replacement: str
+    probes: int
+    hits: int
+    _keys: array
+    _data: array
+    _moves: array
+    _age: int
+
+    def __init__(self, memory_limit: int = 16 * 1024 * 1024, replacement: str = AGING) -> None:
+        """
+        Initializes an empty table which uses at most <memory_limit> bytes for
+        its slots, with the given <replacement> policy.
+
+        >>> table = TranspositionTable(memory_limit=20 * 1000)
+        >>> table.capacity
+        1000
+        """
+        if replacement not in (self.DEPTH_PREFERRED, self.AGING):
+            raise ValueError(f'Unknown replacement policy: {replacement}')
+        self.capacity = max(1, memory_limit // self.ENTRY_BYTES)
+        self.replacement = replacement
+        self.clear()
+
+    def clear(self) -> None:
+        """
+        Removes every entry from the table.
+        """
+        self._keys = array('Q', [0]) * self.capacity
+        self._data = array('q', [0]) * self.capacity
+        self._moves = array(Move.TYPECODE, [0]) * self.capacity
+        self._age = 0
+        self.probes = 0
+        self.hits = 0
+
+    def new_search(self) -> None:
+        """
+        Starts a new search, which makes every current entry one search older.
+        """
+        self._age = (self._age + 1) & 0xFF
+
+    def probe(self, key: int) -> Union[Tuple[int, int, int, Union[int, None]], None]:
+        """
+        Returns the (depth, score, bound, move) stored for the position with
+        hash <key>, or None if the table does not hold it. The move is a
+        packed move, or None if none was stored.
+
+        >>> table = TranspositionTable(memory_limit=20 * 64)
+        >>> table.store(12345, 3, -20, TranspositionTable.LOWER, 0x702)
+        >>> table.probe(12345)
+        (3, -20, 1, 1794)
+        >>> table.probe(54321) is None
+        True
+        """
+        self.probes += 1
+        index = key % self.capacity
+        data = self._data[index]
+        if data == 0 or self._keys[index] != key:
+            return None
+        self.hits += 1
+        return ((data >> 32) & 0xFF, (data & 0xFFFFFFFF) - self._SCORE_OFFSET,
+                (data >> 40) & 0x3, self._moves[index] or None)
+
+    def store(self, key: int, depth: int, score: int, bound: int, move: Union[int, None]) -> None:
+        """
+        Stores the result of searching the position with hash <key> to <depth>
+        with the best packed <move>, or None, unless the replacement policy
+        keeps the entry already in its slot.
+
+        >>> table = TranspositionTable(memory_limit=20, replacement=TranspositionTable.DEPTH_PREFERRED)
+        >>> table.store(1, 5, 0, TranspositionTable.EXACT, None)
+        >>> table.store(2, 3, 0, TranspositionTable.EXACT, None)
+        >>> table.probe(2) is None
+        True
+        >>> table = TranspositionTable(memory_limit=20, replacement=TranspositionTable.AGING)
+        >>> table.store(1, 5, 0, TranspositionTable.EXACT, None)
+        >>> table.new_search()
+        >>> table.store(2, 3, 0, TranspositionTable.EXACT, None)
+        >>> table.probe(2)
+        (3, 0, 0, None)
+        """
+        index = key % self.capacity
+        old = self._data[index]
+        if old != 0 and self._keys[index] != key and depth < (old >> 32) & 0xFF:
+            if self.replacement == self.DEPTH_PREFERRED or (old >> 42) & 0xFF == self._age:
+                return
+        self._keys[index] = key
+        self._data[index] = ((score + self._SCORE_OFFSET) | min(depth, 0xFF) << 32
+                             | bound << 40 | self._age << 42)
+        self._moves[index] = move or 0
+
+    def __len__(self) -> int:
+        """
+        Returns the number of slots holding an entry.
+        """
+        return self.capacity - self._data.count(0)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
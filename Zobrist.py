@@ -0,0 +1,68 @@
+from random import Random
+from typing import Dict, List, Tuple
+from Pieces import Pieces
+
+
+class Zobrist:
+    """
+    A class which holds the random 64-bit keys used to hash Onitama positions.
+    The hash of a position is the XOR of the key of every (piece, square), of
+    every (style, owner) pair and, when it is G2's turn, of SIDE. Moving a
+    piece or exchanging a style therefore updates the hash with a few XORs.
+
+    Every key is drawn from a generator seeded with what it stands for, so all
+    processes compute the same hash for the same position.
+
+    === Attributes ===
+    SIDE : The key XOR-ed in when it is G2's turn to move.
+
+    === Private Attributes ===
+    _pieces : Cache of the piece keys of each board size.
+    _styles : Cache of the key of each (style name, owner) pair.
+    """
+    SIDE: int = Random('onitama:side').getrandbits(64)
+    _pieces: Dict[int, Dict[str, List[int]]] = {}
+    _styles: Dict[Tuple[str, str], int] = {}
+
+    @classmethod
+    def get_piece_keys(cls, size: int) -> Dict[str, List[int]]:
+        """
+        Returns, for a board of <size>, a dictionary mapping each piece token to
+        the list of its keys indexed by square (row * size + col). EMPTY maps to
+        a list of zeros so that empty squares do not change the hash.
+
+        >>> keys = Zobrist.get_piece_keys(5)
+        >>> len(keys[Pieces.G1]), keys[Pieces.EMPTY][3]
+        (25, 0)
+        >>> keys is Zobrist.get_piece_keys(5)
+        True
+        """
+        keys = cls._pieces.get(size)
+        if keys is None:
+            keys = {Pieces.EMPTY: [0] * (size * size)}
+            for token in (Pieces.M1, Pieces.G1, Pieces.M2, Pieces.G2):
+                rng = Random(f'onitama:{size}:{token}')
+                keys[token] = [rng.getrandbits(64) for _ in range(size * size)]
+            cls._pieces[size] = keys
+        return keys
+
+    @classmethod
+    def get_style_key(cls, name: str, owner: str) -> int:
+        """
+        Returns the key of the style <name> being owned by <owner>.
+
+        >>> Zobrist.get_style_key('crab', Pieces.G1) == Zobrist.get_style_key('crab', Pieces.G1)
+        True
+        >>> Zobrist.get_style_key('crab', Pieces.G1) == Zobrist.get_style_key('crab', Pieces.G2)
+        False
+        """
+        key = cls._styles.get((name, owner))
+        if key is None:
+            key = Random(f'onitama:style:{name}:{owner}').getrandbits(64)
+            cls._styles[(name, owner)] = key
+        return key
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
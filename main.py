@@ -4,18 +4,25 @@ import pygame
 # Updated to conform to flake8 and black standards
 from pygame.locals import (
     MOUSEBUTTONUP,
+    MOUSEMOTION,
     K_ESCAPE,
     KEYDOWN,
     QUIT,
 )
+from time import perf_counter
+from AIWorker import AIWorker
+from AssetManager import AssetManager
 from Player import Player, PlayerRandom
+from PlayerAlphaBeta import PlayerAlphaBeta
 from OnitamaGame import OnitamaGame
 from Pieces import Pieces
+from PieceImages import PieceImages
 from Button import Button
 from StyleImages import StyleImages
 from Tile import Tile
 from StyleCard import StyleCard
-from typing import List, Tuple
+from Entity import Entity
+from typing import Iterable, List, Tuple, Union
 
 
 class Screen:
@@ -26,18 +33,43 @@ class Screen:
     SCREEN_WIDTH: int = 1000
     SCREEN_HEIGHT: int = 800
     BG: Tuple[int, int, int] = (0, 255, 0)
-    BG_IMG: str = './assets/img/space.png'
-    # BG_IMG: str = './assets/img/sayu_cry.gif'
+    BG_IMG: str = 'space.png'
+    # BG_IMG: str = 'sayu_cry.gif'
+    STYLE_SIZE: Tuple[int, int] = (200, 125)
+    # The Player class used for the computer in the HvR and RvR game modes,
+    # e.g. PlayerAlphaBeta, PlayerMCTS or PlayerRandom.
+    AI_PLAYER: type = PlayerAlphaBeta
+    # Whether the computer searches during the human's turn in HvR, if
+    # AI_PLAYER can (see PlayerAlphaBeta.ponder).
+    PONDER: bool = True
+    # Most frames per second; the main loop sleeps the rest of each frame.
+    FPS: int = 30
     tiles: List[Tile]
     dest_tiles: List[Tile]
     player_styles: List[StyleCard]
     buttons: List[Button]
-    pieces: Pieces
+    # Loads every image once, from the atlas cache when it can.
+    assets: AssetManager
+    # Seconds from the start of __init__ to the first frame on screen.
+    startup_seconds: float
+    pieces: PieceImages
     style_images: StyleImages
     mouse_pos: Tuple[int, int]
     tile_origin: Tile
     tile_dest: Tile
     chosen_style: StyleCard
+    background: pygame.Surface
+    clock: pygame.time.Clock
+    # Rectangles of the screen drawn since the last display update.
+    dirty: List[pygame.Rect]
+    # The entity under the mouse, drawn with its hover tint.
+    hovered: Union[Entity, None]
+    # Whether everything must be drawn again, e.g. after a reset.
+    full_redraw: bool
+    # Computes the AI players' turns off the render loop.
+    ai_worker: AIWorker
+    # pygame ticks at which the current AI request was made.
+    ai_requested: int
     # 0: HvH, 1: HvR 2: RvR
     game_mode: int = 0
     # Variable to keep the main loop running
@@ -48,7 +80,13 @@ class Screen:
         """
         Initialize the Screen of the GUI
         """
+        start = perf_counter()
         self.mouse_pos = (-1, -1)
+        self.dirty = []
+        self.hovered = None
+        self.full_redraw = True
+        self.ai_worker = AIWorker()
+        self.ai_requested = 0
         # Initialize pygame
         pygame.init()
 
@@ -57,13 +95,18 @@ class Screen:
         self.screen = pygame.display.set_mode(
             (self.SCREEN_WIDTH, self.SCREEN_HEIGHT))
 
-        self.pieces = Pieces(pygame, Tile.width, Tile.height)
-        self.style_images = StyleImages(pygame, 200, 125)
+        # Load every scaled image at once, from the atlas cache if possible.
+        self.assets = AssetManager()
+        screen_size = (self.SCREEN_WIDTH, self.SCREEN_HEIGHT)
+        self.assets.load_atlas(
+            [(filename, (Tile.width, Tile.height)) for filename in PieceImages.get_filenames()]
+            + [(filename, self.STYLE_SIZE) for filename in StyleImages.get_filenames()]
+            + [(self.BG_IMG, screen_size)])
+        self.pieces = PieceImages(pygame, Tile.width, Tile.height, self.assets)
+        self.style_images = StyleImages(pygame, *self.STYLE_SIZE, self.assets)
         # Load the background
-        img = pygame.image.load(self.BG_IMG).convert()
-        img = pygame.transform.smoothscale(
-            img, (self.SCREEN_WIDTH, self.SCREEN_HEIGHT))
-        self.screen.blit(img, (0, 0))
+        self.background = self.assets.get_image(self.BG_IMG, screen_size)
+        self.clock = pygame.time.Clock()
         self.reset()  # Initialize the game, tiles and style cards.
         # Create buttons that will be needed for the game.
         # Different Game Modes
@@ -76,7 +119,9 @@ class Screen:
         self.buttons = [hvh, hvr, rvr, undo, reset]
         # Update the display
         self.draw()
-        pygame.display.flip()
+        self.startup_seconds = perf_counter() - start
+        print(f'First frame in {self.startup_seconds * 1000:.0f} ms '
+              f'({"cached" if self.assets.atlas_cached else "new"} asset atlas)')
 
     def init_tiles(self, offset_x, offset_y) -> None:
         """
@@ -202,6 +247,8 @@ class Screen:
         self.init_player_styles(offset_x=offset_x)
         self.update_styles()
         self.set_op(0)
+        self.hovered = None
+        self.full_redraw = True
 
     def check_winner(self) -> None:
         """
@@ -211,22 +258,45 @@ class Screen:
         if self.onitama.get_winner() is not None:
             print("Winner: " + winner.player_id + "!")
             self.game_running = False
+            self.ai_worker.stop_pondering()
 
     def move_ai(self) -> None:
         """
-        Make an AI player's move on onitama if needed.
+        Make an AI player's move on onitama if needed. The turn is computed by
+        <ai_worker> while the main loop keeps running, and made once it is
+        ready and the AI's time delay has passed.
         """
-        if isinstance(self.onitama.whose_turn, PlayerRandom):
-            # time delay in milliseconds for the AI when watching RvR simulation is 500, 250 for HvR
-            time_delay = 500 if self.game_mode == 2 else 250
-            pygame.time.delay(time_delay)
-            turn = self.onitama.whose_turn.get_turn()
-            if turn is not None:
-                self.onitama.move(turn.row_o, turn.col_o,
-                                  turn.row_d, turn.col_d, turn.style_name)
-                self.update_styles()
-                self.reset_clicks()
-            self.check_winner()
+        if not isinstance(self.onitama.whose_turn, self.AI_PLAYER):
+            self.ponder()
+            return
+        if not self.ai_worker.busy():
+            self.ai_worker.request(self.onitama)
+            self.ai_requested = pygame.time.get_ticks()
+            return
+        # time delay in milliseconds for the AI when watching RvR simulation is 500, 250 for HvR
+        # The time the AI spends choosing its turn counts towards the delay.
+        time_delay = 500 if self.game_mode == 2 else 250
+        if not self.ai_worker.done() or pygame.time.get_ticks() - self.ai_requested < time_delay:
+            return
+        turn = self.ai_worker.result()
+        if turn is not None:
+            self.onitama.move(turn.row_o, turn.col_o,
+                              turn.row_d, turn.col_d, turn.style_name)
+            self.update_styles()
+            self.reset_clicks()
+        self.check_winner()
+
+    def ponder(self) -> None:
+        """
+        In HvR, starts the AI pondering on the human's turn, if it is not
+        already, so its reply starts from the search done meanwhile. The
+        ponder ends when the AI is asked for its turn or a button is clicked.
+        """
+        if not self.PONDER or self.game_mode != 1 or self.ai_worker.pondering():
+            return
+        op = self.onitama.other_player(self.onitama.whose_turn)
+        if isinstance(op, self.AI_PLAYER) and hasattr(op, 'ponder'):
+            self.ai_worker.ponder(self.onitama, op)
 
     def move(self) -> None:
         """
@@ -243,15 +313,16 @@ class Screen:
 
         self.check_winner()
 
-    def undo(self) -> None:
+    def undo(self, ai_thinking: bool = False) -> None:
         """
         Undo's a move in Onitama and update's the styles as well as resets clicks on the tiles and style cards.
+        In HvR the AI's last move is undone too, unless <ai_thinking> says it has not replied yet.
         """
         if not self.game_running:
             self.game_running = True
             self.set_op(0)
         self.onitama.undo()
-        if self.game_mode == 1:
+        if self.game_mode == 1 and not ai_thinking:
             self.onitama.undo()
         self.update_styles()
         self.reset_clicks()
@@ -263,10 +334,10 @@ class Screen:
         self.game_mode = game_mode
         curr_turn = self.onitama.whose_turn.player_id
         if game_mode == 0 or game_mode == 2:
-            # Set both players to PlayerRandom or a regular Player depending on the game mode.
-            self.onitama.player1 = Player(self.onitama.player1.player_id) if game_mode == 0 else PlayerRandom(
+            # Set both players to AI_PLAYER or a regular Player depending on the game mode.
+            self.onitama.player1 = Player(self.onitama.player1.player_id) if game_mode == 0 else self.AI_PLAYER(
                 self.onitama.player1.player_id)
-            self.onitama.player2 = Player(self.onitama.player2.player_id) if game_mode == 0 else PlayerRandom(
+            self.onitama.player2 = Player(self.onitama.player2.player_id) if game_mode == 0 else self.AI_PLAYER(
                 self.onitama.player2.player_id)
             self.onitama.player1.set_onitama(self.onitama)
             self.onitama.player2.set_onitama(self.onitama)
@@ -276,11 +347,11 @@ class Screen:
                 self.onitama.whose_turn = self.onitama.player2
             return
 
-        # Set the other player to PlayerRandom
+        # Set the other player to AI_PLAYER
         op = self.onitama.other_player(self.onitama.whose_turn)
         if not op:
             return
-        player = PlayerRandom(op.player_id)
+        player = self.AI_PLAYER(op.player_id)
         player.set_onitama(self.onitama)
         if self.onitama.whose_turn == self.onitama.player1:
             self.onitama.player2 = player
@@ -290,9 +361,13 @@ class Screen:
     def btn_click(self, btn: Button) -> None:
         """
         Check which button was clicked and perform the respective actions.
+        Any AI turn being computed is cancelled, as every button changes the
+        game or its players.
         """
+        ai_thinking = self.ai_worker.busy()
+        self.ai_worker.cancel()
         if btn.text == 'Undo':
-            self.undo()
+            self.undo(ai_thinking)
             btn.clicked = False
         elif btn.text == 'Reset':
             self.reset()
@@ -312,21 +387,13 @@ class Screen:
         if not self.tile_origin:
             return
         # Highlight the pieces which are valid destinations
-        valid_turns = self.onitama.whose_turn.get_valid_turns()
-        turns = []
-
         # Check if a style has been chosen and only display those turns.
-        if self.chosen_style and self.chosen_style.style_name in valid_turns:
-            turns = valid_turns[self.chosen_style.style_name]
-        else:
-            for style_name in valid_turns:
-                turns.extend(valid_turns[style_name])
+        style_name = None
+        if self.chosen_style and self.chosen_style.style_name in self.onitama.get_legal_turns():
+            style_name = self.chosen_style.style_name
+        turns = self.onitama.get_legal_turns_from(self.tile_origin.row, self.tile_origin.col, style_name)
         # Get all indices of tiles which are valid destinations for the chosen piece.
-        highlighted = set()
-        for turn in turns:
-            if (turn.row_o, turn.col_o) == (self.tile_origin.row, self.tile_origin.col):
-                highlighted.add(self.onitama.size *
-                                turn.row_d + turn.col_d)
+        highlighted = {self.onitama.size * turn.row_d + turn.col_d for turn in turns}
         # For each index, add the tile itself to the destination tiles.
         self.dest_tiles = []
         for i in highlighted:
@@ -335,8 +402,10 @@ class Screen:
 
     def draw(self):
         """
-        Draw all of the entities onto the screen.
+        Draw the background and all of the entities onto the screen, and
+        update the whole display.
         """
+        self.screen.blit(self.background, (0, 0))
         # Draw tiles
         for tile in self.tiles:
             tile.draw()
@@ -344,29 +413,71 @@ class Screen:
         for sty_img in self.player_styles:
             sty_img.draw()
 
+        # Update the current game_mode button to highlight it.
+        self.buttons[self.game_mode].set_highlight(True)
         # Draw all buttons
         for btn in self.buttons:
             btn.draw()
 
-        # Update the current game_mode button to highlight it.
+        if self.hovered:
+            self.hovered.hover(pygame.mouse.get_pos())
+        self.onitama.get_changes()
+        self.full_redraw = False
+        self.dirty = []
+        pygame.display.flip()
+
+    def redraw(self, entities: Iterable[Entity]) -> None:
+        """
+        Draw the given entities again and mark their rectangles as dirty.
+        """
+        for entity in entities:
+            entity.draw()
+            if entity is self.hovered:
+                entity.hover(pygame.mouse.get_pos())
+            self.dirty.append(entity.img_rect)
+
+    def get_states(self) -> Tuple[str, List[Tuple]]:
+        """
+        Returns whose turn it is and the state of every entity that changes how
+        it is drawn, to find the entities to redraw after handling events.
+        """
+        states = [(tile.clicked, tile.highlighted) for tile in self.tiles]
+        states.extend((sty.clicked, sty.style_name) for sty in self.player_styles)
+        states.extend((btn.clicked, btn.highlighted) for btn in self.buttons)
+        return self.onitama.whose_turn.player_id, states
+
+    def redraw_changes(self, before: Tuple[str, List[Tuple]]) -> None:
+        """
+        Redraw the squares the game reports as changed and every entity whose
+        state differs from <before>, a result of get_states.
+        """
+        squares, _ = self.onitama.get_changes()
+        # The current game_mode button stays highlighted.
         self.buttons[self.game_mode].set_highlight(True)
+        turn, states = self.get_states()
+        entities = self.tiles + self.player_styles + self.buttons
+        changed = set(squares)
+        changed.update(i for i, state in enumerate(states) if state != before[1][i])
+        if turn != before[0]:
+            # The cards of the player not to move are grayed out.
+            changed.update(range(len(self.tiles), len(self.tiles) + len(self.player_styles)))
+        self.redraw(entities[i] for i in sorted(changed))
 
     def hover(self):
         """
-        Check if any of the entities are being hovered.
+        Check which entity is being hovered, and draw the previously hovered
+        entity without and the new one with its hover tint.
         """
         mouse_pos = pygame.mouse.get_pos()
-
-        for tile in self.tiles:
-            # Check if hovered
-            if tile.hover(mouse_pos):
-                return
-        for sty_img in self.player_styles:
-            if sty_img.hover(mouse_pos):
-                return
-        for btn in self.buttons:
-            if btn.hover(mouse_pos):
+        hovered = None
+        for entity in self.tiles + self.player_styles + self.buttons:
+            if entity.img_rect and entity.img_rect.collidepoint(mouse_pos):
+                hovered = entity
                 break
+        if hovered is self.hovered:
+            return
+        previous, self.hovered = self.hovered, hovered
+        self.redraw(entity for entity in (previous, hovered) if entity)
 
     def click(self):
         """
@@ -385,8 +496,8 @@ class Screen:
         if clicked:
             self.btn_click(clicked)
             return
-        # If the game is not running, we do not want any clicks on the game.
-        if not self.game_running:
+        # If the game is not running, or an AI is choosing its turn, we do not want any clicks on the game.
+        if not self.game_running or self.ai_worker.busy():
             return
 
         # Check if any of the tiles have been clicked
@@ -429,6 +540,10 @@ class Screen:
         # Main loop
 
         while self.running:
+            # Sleep for the rest of the frame; nothing is drawn unless it changed.
+            self.clock.tick(self.FPS)
+            before = self.get_states()
+            moved = False
             # for loop through the event queue
             for event in pygame.event.get():
                 # Check for KEYDOWN event
@@ -443,15 +558,22 @@ class Screen:
                 if event.type == MOUSEBUTTONUP:
                     # Check for click event
                     self.click()
+                elif event.type == MOUSEMOTION:
+                    moved = True
             # If the game is moving, check if we need to move the AI.
             if self.game_running:
                 self.move_ai()
-            # Update the display
-            self.draw()
-            self.hover()
-
-            # Update the display
-            pygame.display.flip()
+            if self.full_redraw:
+                self.draw()
+                continue
+            self.redraw_changes(before)
+            if moved:
+                self.hover()
+            # Update only the parts of the display that were drawn.
+            if self.dirty:
+                pygame.display.update(self.dirty)
+                self.dirty = []
+        self.ai_worker.close()
 
 
 if __name__ == '__main__':